@@ -1,14 +1,22 @@
 # Orchestra package
 
-from .orchestra import run  # noqa: F401
+from .orchestra import run, arun, startup, astartup, shutdown, ashutdown, warmup  # noqa: F401
 from .core.agent import ToolAgent, BaseAgent  # noqa: F401
 from .core.tools import Tool  # noqa: F401
 from .core.task import TaskList  # noqa: F401
+from .core.cancellation import CancellationToken  # noqa: F401
 
 __all__ = [
     "run",
+    "arun",
+    "startup",
+    "astartup",
+    "shutdown",
+    "ashutdown",
+    "warmup",
     "ToolAgent",
     "BaseAgent",
     "Tool",
     "TaskList",
+    "CancellationToken",
 ]
@@ -5,6 +5,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
+# Comma separated Ollama hosts to load balance over, e.g. "http://gpu-1:11434,http://gpu-2:11434"
+OLLAMA_HOSTS = os.getenv("OLLAMA_HOSTS")
+# How long Ollama keeps a model loaded after a request, e.g. "30m", "-1" (forever) or "0"
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL")
 DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL")
 QWEN_MODEL = os.getenv("QWEN_MODEL")
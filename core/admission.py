@@ -0,0 +1,306 @@
+"""
+Admission control in front of `run()` / `arun()`.
+
+An `AdmissionController` bounds how many runs execute at once and decides which
+queued run goes next:
+
+- priority classes are served strictly in priority order (e.g. interactive before batch)
+- inside a class, tenants share capacity through weighted fair queueing, so one tenant
+  flooding the queue does not starve the others
+- when the queue is full, new work evicts the lowest-priority queued request, or is
+  rejected immediately when nothing queued has a lower priority (load shedding)
+- queued work that can no longer meet its class deadline is dropped instead of run
+
+Queue wait is reported with ADMISSION_QUEUED / ADMISSION_ADMITTED events, which the
+tracer turns into a ``queue`` span of the run.
+
+Usage::
+
+    admission = AdmissionController(max_concurrent=4, max_queue=100)
+    answer = admission.run(query, agents, priority="interactive", tenant="user-42")
+    answer = await admission.arun(query, agents, priority="batch", tenant="nightly-job")
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import CancellationToken, resolve_token
+from orchestra.core.events import events, Event, EventType, current_run_id
+
+import sys as _sys
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when work is shed because the queue is full"""
+
+
+class AdmissionDeadlineError(AdmissionRejectedError):
+    """Raised when queued work is dropped because it can no longer meet its deadline"""
+
+
+class PriorityClass(BaseModel):
+    """A class of work with its own priority, deadline and queue bound"""
+
+    priority: int = Field(..., description="Lower values are admitted first")
+    deadline: Optional[float] = Field(None, description="Max queue wait in seconds before the work is dropped")
+    max_queue: Optional[int] = Field(None, description="Max queued requests of this class")
+
+
+DEFAULT_CLASSES: Dict[str, PriorityClass] = {
+    "interactive": PriorityClass(priority=0, deadline=30.0),
+    "batch": PriorityClass(priority=10),
+}
+
+_QUEUED = "queued"
+_ADMITTED = "admitted"
+_DROPPED = "dropped"
+_ABANDONED = "abandoned"
+_EVICTED = "evicted"
+
+# How often a queued caller re-checks its cancellation token
+_CANCEL_POLL_INTERVAL = 0.05
+
+
+class _Ticket:
+    def __init__(self, priority_class: str, tenant: str, enqueued: float, expires: Optional[float]):
+        self.priority_class = priority_class
+        self.tenant = tenant
+        self.enqueued = enqueued
+        self.expires = expires
+        self.state = _QUEUED
+        self.ready = threading.Event()
+
+
+class AdmissionController:
+    """Bounded concurrency with priority classes and per-tenant fair queueing"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 100,
+        classes: Optional[Dict[str, PriorityClass]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.classes = classes or dict(DEFAULT_CLASSES)
+        self.tenant_weights = tenant_weights or {}
+
+        self.in_flight = 0
+        self.rejected = 0
+        self.dropped = 0
+        self._heap: List[tuple] = []
+        self._queued: Dict[str, int] = {name: 0 for name in self.classes}
+        self._virtual_time = 0.0
+        # (class, tenant) -> virtual finish time of its last request and its queued requests;
+        # entries are dropped once the tenant has nothing queued
+        self._tenant_finish: Dict[tuple, float] = {}
+        self._tenant_queued: Dict[tuple, int] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def queue_length(self) -> int:
+        return sum(self._queued.values())
+
+    def _emit(self, event_type: EventType, ticket: _Ticket, **data):
+        events.emit(Event(
+            type=event_type,
+            source="admission",
+            data={"priority": ticket.priority_class, "tenant": ticket.tenant, **data}
+        ))
+
+    def _enqueue(self, ticket: _Ticket):
+        # Weighted fair queueing: each tenant's requests get virtual finish times spaced by 1/weight
+        weight = self.tenant_weights.get(ticket.tenant, 1.0)
+        key = (ticket.priority_class, ticket.tenant)
+        finish = max(self._virtual_time, self._tenant_finish.get(key, 0.0)) + 1.0 / weight
+        self._tenant_finish[key] = finish
+        self._tenant_queued[key] = self._tenant_queued.get(key, 0) + 1
+        priority = self.classes[ticket.priority_class].priority
+        heapq.heappush(self._heap, (priority, finish, next(self._sequence), ticket))
+        self._queued[ticket.priority_class] += 1
+
+    def _dequeue(self, ticket: _Ticket, state: str):
+        """Take a queued ticket out of the counts (its heap entry is skipped later). Lock held."""
+        ticket.state = state
+        self._queued[ticket.priority_class] -= 1
+        key = (ticket.priority_class, ticket.tenant)
+        self._tenant_queued[key] -= 1
+        if not self._tenant_queued[key]:
+            del self._tenant_queued[key]
+            del self._tenant_finish[key]
+
+    def _evict_for(self, priority: int) -> bool:
+        """Drop the lowest-priority, last-served queued ticket if it ranks below `priority`. Lock held."""
+        queued = [entry for entry in self._heap if entry[3].state == _QUEUED]
+        if not queued:
+            return False
+        victim_priority, _, _, victim = max(queued, key=lambda entry: entry[:3])
+        if victim_priority <= priority:
+            return False
+        self._dequeue(victim, _EVICTED)
+        self.rejected += 1
+        victim.ready.set()
+        return True
+
+    def _dispatch(self):
+        """Admit queued tickets while capacity is free, dropping expired ones. Lock held."""
+        now = time.monotonic()
+        while self._heap and self.in_flight < self.max_concurrent:
+            _, finish, _, ticket = heapq.heappop(self._heap)
+            if ticket.state != _QUEUED:
+                continue
+            if ticket.expires is not None and now >= ticket.expires:
+                self._dequeue(ticket, _DROPPED)
+                self.dropped += 1
+                ticket.ready.set()
+                continue
+            self._virtual_time = max(self._virtual_time, finish)
+            self._dequeue(ticket, _ADMITTED)
+            self.in_flight += 1
+            ticket.ready.set()
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def _wait(self, ticket: _Ticket, cancel_token: Optional[CancellationToken]):
+        """Block until the ticket is decided, its class deadline passes or the run is cancelled"""
+        while True:
+            timeout = None if ticket.expires is None else max(0.0, ticket.expires - time.monotonic())
+            if cancel_token is not None:
+                timeout = _CANCEL_POLL_INTERVAL if timeout is None else min(timeout, _CANCEL_POLL_INTERVAL)
+            if ticket.ready.wait(timeout):
+                return
+            if cancel_token is not None and cancel_token.done:
+                return
+            if ticket.expires is not None and time.monotonic() >= ticket.expires:
+                return
+
+    @contextmanager
+    def admit(
+        self,
+        priority: str = "interactive",
+        tenant: str = "default",
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Iterator[None]:
+        """
+        Hold an execution slot, queueing until one is free.
+
+        Raises:
+            AdmissionRejectedError: The queue is full, or this request was evicted by higher-priority work
+            AdmissionDeadlineError: The class deadline passed while queued
+            RunCancelledError: `cancel_token` was cancelled (or expired) while queued
+        """
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority class '{priority}'. Classes: {', '.join(self.classes)}")
+        priority_class = self.classes[priority]
+        now = time.monotonic()
+        ticket = _Ticket(
+            priority,
+            tenant,
+            now,
+            now + priority_class.deadline if priority_class.deadline is not None else None,
+        )
+
+        with self._lock:
+            if self.in_flight < self.max_concurrent and self.queue_length == 0:
+                ticket.state = _ADMITTED
+                self.in_flight += 1
+            elif (priority_class.max_queue is not None and self._queued[priority] >= priority_class.max_queue) or (
+                self.queue_length >= self.max_queue and not self._evict_for(priority_class.priority)
+            ):
+                self.rejected += 1
+                ticket.state = _DROPPED
+            else:
+                self._enqueue(ticket)
+
+        if ticket.state == _DROPPED:
+            self._emit(EventType.ADMISSION_REJECTED, ticket, queue_length=self.queue_length)
+            raise AdmissionRejectedError(f"Admission queue is full; '{priority}' request from '{tenant}' rejected")
+
+        if ticket.state == _QUEUED:
+            self._emit(EventType.ADMISSION_QUEUED, ticket, queue_length=self.queue_length)
+            self._wait(ticket, cancel_token)
+            with self._lock:
+                if ticket.state == _QUEUED:
+                    # Deadline passed or run cancelled while still waiting: leave the heap
+                    # entry behind (lazy deletion)
+                    self._dequeue(ticket, _ABANDONED)
+                    self.dropped += 1
+
+            # Outcome events are emitted from the waiting thread so they carry its run id
+            waited = time.monotonic() - ticket.enqueued
+            if ticket.state == _EVICTED:
+                self._emit(EventType.ADMISSION_REJECTED, ticket, queue_length=self.queue_length, waited=waited, reason="evicted")
+                raise AdmissionRejectedError(
+                    f"'{priority}' request from '{tenant}' evicted from the full queue by higher-priority work"
+                )
+            if ticket.state != _ADMITTED:
+                cancelled = cancel_token is not None and cancel_token.done
+                self._emit(EventType.ADMISSION_DROPPED, ticket, waited=waited, reason="cancelled" if cancelled else "deadline")
+                if cancelled:
+                    cancel_token.check()
+                raise AdmissionDeadlineError(
+                    f"'{priority}' request from '{tenant}' dropped after waiting {waited:.2f}s"
+                )
+            self._emit(EventType.ADMISSION_ADMITTED, ticket, waited=waited)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def run(self, query: str, agent_list: List[Any], priority: str = "interactive", tenant: str = "default", **kwargs) -> str:
+        """`orchestra.run()` behind admission control; extra kwargs are passed to `run()`"""
+        from orchestra.orchestra import run
+
+        # Queue events share the id of the run they precede
+        run_id = kwargs.pop("run_id", None) or uuid.uuid4().hex
+        # The run's timeout starts counting when it is queued, not when it is admitted
+        cancel_token = resolve_token(kwargs.pop("timeout", None), kwargs.pop("deadline", None), kwargs.pop("cancel_token", None))
+        token = current_run_id.set(run_id)
+        try:
+            with self.admit(priority=priority, tenant=tenant, cancel_token=cancel_token):
+                return run(query, agent_list, run_id=run_id, cancel_token=cancel_token, **kwargs)
+        finally:
+            current_run_id.reset(token)
+
+    async def arun(self, query: str, agent_list: List[Any], priority: str = "interactive", tenant: str = "default", **kwargs) -> str:
+        """
+        Async variant of `run`; queueing and execution happen in a worker thread.
+
+        Cancelling the awaiting task cancels the run: a queued request leaves the queue and
+        a running one stops at its next check.
+        """
+        cancel_token = resolve_token(kwargs.pop("timeout", None), kwargs.pop("deadline", None), kwargs.pop("cancel_token", None))
+        try:
+            return await asyncio.to_thread(
+                self.run, query, agent_list, priority=priority, tenant=tenant, cancel_token=cancel_token, **kwargs
+            )
+        except asyncio.CancelledError:
+            # The worker thread cannot be killed; tell it to stop at its next check
+            cancel_token.cancel("awaiting task cancelled")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queued": dict(self._queued),
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+            }
+
+
+admission = _sys.modules[__name__]
@@ -1,17 +1,57 @@
 import os
 import sys
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
-import json
-
-from orchestra.core.tools import Tool
+from orchestra.core.tools import InvalidToolArgumentsError, Tool
+from orchestra.core.cancellation import RunCancelledError, check_cancelled
+from orchestra.core.catalog import tool_rounds
+from orchestra.core.prompts import COMPACT, dumps, native_tool_calling, render
+from orchestra.core.artifacts import offload
+from orchestra.core.executor import execute_tool
+from orchestra.core.streaming import collect_stream, is_stream
 from orchestra.core.events import events, Event, EventType
 from orchestra.llm.base import model_invoke
+from orchestra.llm.stages import StageConfig, agent_stage, stage_model
+from orchestra.llm.structured import get_structured_policy
 import sys as _sys
 
+class _NoValidTool(ValueError):
+    """The model's answer did not name a usable tool"""
+
+
+def _binding_validator(tools: List[Tool]):
+    """Cascade check of a tool-binding response: an offered tool with its required arguments"""
+    offered = {tool.name: tool for tool in tools}
+
+    def validate(response) -> Optional[str]:
+        execution = response.get("tool_execution") if isinstance(response, dict) else None
+        if not isinstance(execution, dict):
+            return "no_tool"
+        tool = offered.get(execution.get("tool_name"))
+        if tool is None:
+            return "unknown_tool"
+        arguments = execution.get("tool_args")
+        if not isinstance(arguments, dict):
+            return "invalid_args"
+        required = tool.get_schema().get("parameters", {}).get("required", [])
+        if any(name not in arguments for name in required):
+            return "missing_args"
+        return None
+
+    return validate
+
+
+_REASK_HINTS = {
+    "no_tool": "no tool_execution object",
+    "unknown_tool": "tool_name is not one of the offered tools",
+    "invalid_args": "tool_args is not an object",
+    "missing_args": "required tool arguments are missing",
+}
+
+
 class AgentTask(BaseModel):
     """Represents a task to be executed by an agent"""
 
@@ -28,6 +68,11 @@ class BaseAgent(ABC, BaseModel):
     name: str = Field(..., description="Unique name of the agent")
     description: str = Field(..., description="Agent description")
     backstory: str = Field(..., description="Backstory of the agent")
+    keywords: List[str] = Field(default_factory=list, description="Extra terms used to shortlist the agent for a query")
+    examples: List[str] = Field(default_factory=list, description="Example requests the agent handles, used for shortlisting")
+    stages: Dict[str, StageConfig] = Field(
+        default_factory=dict, description="Per-stage model and generation options for this agent (e.g. 'tool_binding')"
+    )
 
     @abstractmethod
     def execute(self, task: AgentTask) -> Dict[str, Any]:
@@ -62,15 +107,49 @@ class ToolAgent(BaseAgent):
             )
         return "\n".join(formatted_tools)
 
-    def execute(self, task: AgentTask) -> Dict[str, Any]:
-        """Execute a task and return the results"""
-        
-        events.emit(Event(
-            type=EventType.AGENT_START,
-            source=self.name,
-            data={"task": task.task, "expected_output": task.expected_output}
-        ))
+    def _binding_prompt(self, profile: str, task: AgentTask, tools: List[Tool]) -> Tuple[str, str]:
+        if profile == COMPACT:
+            lines = [
+                f"Tools: {dumps([tool.get_schema() for tool in tools], profile)}",
+                "Select the single most appropriate tool for the task and provide its arguments, with brief reasoning.",
+            ]
+            if not native_tool_calling(stage_model("tool_binding", self)):
+                lines.append('Answer as JSON: {"tool_execution":{"tool_name":str,"tool_args":{}},"reasoning":str}')
+            lines.append(f"Task: {task.task}")
+            lines.append(f"Expected output: {task.expected_output}")
+            return self.system_prompt, "\n".join(lines)
 
+        # The tools and instructions come first and the task last, so prompts of the same
+        # agent share a prefix the backend can reuse
+        user_message = (
+            f"Your task is to complete an objective, given at the end, as an expert agent.\n"
+            f"\n"
+            f"You have access to the following tools. Each tool has a name, a description, and a set of parameters you must provide as arguments:\n"
+            f"{dumps([tool.get_schema() for tool in tools], profile)}\n"
+            f"\n"
+            f"Instructions:\n"
+            f"- Carefully review the available tools and their parameters.\n"
+            f"- Select the single most appropriate tool to accomplish the task.\n"
+            f"- Provide the tool name and a dictionary of arguments (with values) for the tool's parameters.\n"
+            f"- Justify your tool selection and argument choices with clear reasoning.\n"
+            f"\n"
+            f"Respond ONLY in the following JSON format:\n"
+            f"{{\n"
+            f'  "tool_execution": {{\n'
+            f'    "tool_name": "<tool name>",\n'
+            f'    "tool_args": {{ "<param1>": <value1>, ... }}\n'
+            f"  }},\n"
+            f'  "reasoning": "<your explanation>"\n'
+            f"}}\n"
+            f"\n"
+            f"Task:\n{task.task}\n"
+            f"\n"
+            f"Expected Output:\n{task.expected_output}\n"
+        )
+        return self.system_prompt, user_message
+
+    def _bind_tool(self, task: AgentTask, tools: List[Tool]) -> Tuple[Tool, Dict[str, Any], str]:
+        """Ask the model to pick one of `tools` and its arguments for the task"""
         tools_schema = {
             "type": "object",
             "properties": {
@@ -79,7 +158,7 @@ class ToolAgent(BaseAgent):
                     "properties": {
                         "tool_name": {
                             "type": "string",
-                            "enum": [tool.name for tool in self.tools],
+                            "enum": [tool.name for tool in tools],
                             "description": "The name of the tool to use",
                         },
                         "tool_args": {
@@ -97,38 +176,32 @@ class ToolAgent(BaseAgent):
             "required": ["tool_execution", "reasoning"],
         }
 
-        user_message = (
-            f"Your task is to complete the following objective as an expert agent.\n"
-            f"\n"
-            f"Task:\n{task.task}\n"
-            f"\n"
-            f"Expected Output:\n{task.expected_output}\n"
-            f"\n"
-            f"You have access to the following tools. Each tool has a name, a description, and a set of parameters you must provide as arguments:\n"
-            f"{json.dumps([tool.get_schema() for tool in self.tools], indent=2)}\n"
-            f"\n"
-            f"Instructions:\n"
-            f"- Carefully review the available tools and their parameters.\n"
-            f"- Select the single most appropriate tool to accomplish the task.\n"
-            f"- Provide the tool name and a dictionary of arguments (with values) for the tool's parameters.\n"
-            f"- Justify your tool selection and argument choices with clear reasoning.\n"
-            f"\n"
-            f"Respond ONLY in the following JSON format:\n"
-            f"{{\n"
-            f'  "tool_execution": {{\n'
-            f'    "tool_name": "<tool name>",\n'
-            f'    "tool_args": {{ "<param1>": <value1>, ... }}\n'
-            f"  }},\n"
-            f'  "reasoning": "<your explanation>"\n'
-            f"}}\n"
-        )
+        _, user_message = render("tool_binding", lambda profile: self._binding_prompt(profile, task, tools))
 
-        response = model_invoke(
-            system_message=self.system_prompt,
-            user_message=user_message,
-            payload=tools_schema,
-            model=self.model,
-        )
+        config = agent_stage(self, "tool_binding")
+        validator = _binding_validator(tools)
+        prompt = user_message
+        for reask in range(get_structured_policy().reasks + 1):
+            response = model_invoke(
+                system_message=self.system_prompt,
+                user_message=prompt,
+                payload=tools_schema,
+                model=config.model,
+                stage="tool_binding",
+                options=config.options,
+                format=config.format,
+                validator=validator,
+                cascade_key=self.name,
+            )
+            reason = validator(response)
+            if reason is None:
+                break
+            # Re-ask once more with what was wrong appended, keeping the prompt prefix
+            prompt = (
+                f"{user_message}\n"
+                f"Your previous answer was unusable ({_REASK_HINTS[reason]}): {str(response)[:500]}\n"
+                f"Answer again with JSON matching the schema."
+            )
 
         # Handle different response formats
         if "tool_execution" in response:
@@ -143,7 +216,7 @@ class ToolAgent(BaseAgent):
             )
 
             if not selected_tool:
-                raise ValueError(
+                raise _NoValidTool(
                     f"Selected tool '{response['tool_execution']['tool_name']}' not found"
                 )
 
@@ -155,7 +228,7 @@ class ToolAgent(BaseAgent):
             best_match_tool = None
             best_match_score = 0
             
-            for tool in self.tools:
+            for tool in tools:
                 tool_schema = tool.get_schema()
                 tool_params = tool_schema.get('parameters', {}).get('properties', {})
                 
@@ -180,16 +253,70 @@ class ToolAgent(BaseAgent):
                 selected_tool = best_match_tool
                 tool_args = response if len(selected_tool.get_schema().get('parameters', {}).get('properties', {})) > 0 else {}
                 reasoning = f"Intelligently selected {selected_tool.name} based on parameter matching (score: {best_match_score:.2f})"
-            elif len(self.tools) == 1:
+            elif len(tools) == 1:
                 # Fallback: single tool available
-                selected_tool = self.tools[0]
+                selected_tool = tools[0]
                 tool_args = response
                 reasoning = "Automatically selected tool based on single available option."
             else:
-                raise ValueError(
+                raise _NoValidTool(
                     "Response format unrecognized and multiple tools are available; cannot determine tool to execute."
                 )
 
+        return selected_tool, tool_args, reasoning
+
+    def _repair_arguments(self, task: AgentTask, tool: Tool, arguments: Any, error: InvalidToolArgumentsError) -> Any:
+        """One targeted call asking the model to fix arguments that failed validation"""
+        schema = tool.get_schema()
+        errors = "\n".join(f"- {message}" for message in error.errors)
+        user_message = (
+            f"Tool: {dumps(schema, COMPACT)}\n"
+            f"Task: {task.task}\n"
+            f"These arguments for {tool.name} are invalid: {str(arguments)[:500]}\n"
+            f"Errors:\n{errors}\n"
+            f"Answer with the corrected arguments as a JSON object."
+        )
+        config = agent_stage(self, "tool_binding")
+        response = model_invoke(
+            system_message=self.system_prompt,
+            user_message=user_message,
+            payload=schema,
+            model=config.model,
+            stage="tool_binding",
+            options=config.options,
+            format=config.format,
+        )
+        if isinstance(response, dict) and isinstance(response.get("tool_execution"), dict):
+            return response["tool_execution"].get("tool_args")
+        return response
+
+    def _validated_arguments(self, task: AgentTask, tool: Tool, arguments: Any) -> Dict[str, Any]:
+        """Arguments checked against the tool's run() signature, repaired once by the model if invalid"""
+        try:
+            return tool.validate_arguments(arguments)
+        except InvalidToolArgumentsError as e:
+            repaired = self._repair_arguments(task, tool, arguments, e)
+        return tool.validate_arguments(repaired)
+
+    def execute(self, task: AgentTask) -> Dict[str, Any]:
+        """Execute a task and return the results"""
+        
+        events.emit(Event(
+            type=EventType.AGENT_START,
+            source=self.name,
+            data={"task": task.task, "expected_output": task.expected_output}
+        ))
+
+        # Large toolsets are shortlisted against the task; all tools are offered if the model picks nothing valid
+        rounds = tool_rounds(task.task, self.tools)
+        for attempt, candidates in enumerate(rounds, 1):
+            try:
+                selected_tool, tool_args, reasoning = self._bind_tool(task, candidates)
+                break
+            except _NoValidTool:
+                if attempt == len(rounds):
+                    raise
+
         events.emit(Event(
             type=EventType.TOOL_SELECTION,
             source=self.name,
@@ -200,20 +327,36 @@ class ToolAgent(BaseAgent):
             }
         ))
 
+        # Don't start a tool once the run is cancelled or out of time
+        check_cancelled()
+
         # Execute the selected tool with provided arguments
         try:
+            # Coerced and defaulted before the tool runs; invalid arguments get one repair call
+            tool_args = self._validated_arguments(task, selected_tool, tool_args)
+
             events.emit(Event(
                 type=EventType.TOOL_START,
                 source=self.name,
-                data={"tool": selected_tool.name, "arguments": tool_args}
+                data={"tool": selected_tool.name, "arguments": tool_args, "execution": selected_tool.execution}
             ))
             
-            result = selected_tool.run(**tool_args)
-            
+            result = execute_tool(selected_tool, tool_args)
+
+            stream = None
+            if is_stream(result):
+                # Forward chunks as they come; keep a bounded copy as the step result
+                buffer = collect_stream(result, selected_tool.name, self.name, timeout=selected_tool.timeout)
+                result = buffer.result()
+                stream = {"chunks": buffer.total_chunks, "truncated": buffer.truncated}
+
+            # Large results travel as artifact handles through outputs, events and prompts
+            result = offload(result)
+
             events.emit(Event(
                 type=EventType.TOOL_END,
                 source=self.name,
-                data={"tool": selected_tool.name, "result": result}
+                data={"tool": selected_tool.name, "result": result, **({"stream": stream} if stream else {})}
             ))
             
             output = {
@@ -222,6 +365,8 @@ class ToolAgent(BaseAgent):
                 "reasoning": reasoning,
                 "arguments": tool_args,
             }
+            if stream:
+                output["stream"] = stream
             
             events.emit(Event(
                 type=EventType.AGENT_END,
@@ -235,8 +380,15 @@ class ToolAgent(BaseAgent):
             events.emit(Event(
                 type=EventType.TOOL_ERROR,
                 source=self.name,
-                data={"tool": selected_tool.name, "error": str(e)}
+                data={
+                    "tool": selected_tool.name,
+                    "error": str(e),
+                    "error_type": type(e).__name__,
+                    "cause": getattr(e, "cause", None) or getattr(e, "status", None) or "exception",
+                }
             ))
+            if isinstance(e, RunCancelledError):
+                raise
             raise ValueError(f"Tool execution failed: {str(e)}")
 
     # @abstractmethod
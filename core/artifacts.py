@@ -0,0 +1,299 @@
+"""
+Out-of-band store for large tool results.
+
+Tool results are passed around inline: in the agent output, the run's results list,
+TASK_COMPLETE events and finally the synthesis prompt. A result larger than
+``threshold_bytes`` is instead put into the artifact store once and replaced by an
+`ArtifactHandle` carrying its id, size and a short preview:
+
+- the store keeps artifacts in memory up to ``memory_limit_bytes`` and spills the
+  oldest ones to memory-mapped files in ``spill_dir``, deleting the oldest spilled
+  artifacts beyond ``disk_limit_bytes``
+- prompts, events and logs only ever see the handle's size-capped preview
+- consumers resolve a handle when they need the data: `handle.view()` returns a
+  zero-copy ``memoryview`` of the stored bytes, `handle.load()` the decoded value
+
+Usage::
+
+    set_artifact_policy(ArtifactPolicy(threshold_bytes=256 * 1024))
+    output = agent.execute(task)
+    if isinstance(output["result"], ArtifactHandle):
+        data = output["result"].load()
+"""
+
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+import sys as _sys
+
+TEXT = "text"
+BYTES = "bytes"
+JSON = "json"
+
+
+class ArtifactNotFoundError(KeyError):
+    """Raised when a handle refers to an artifact that was deleted or never stored here"""
+
+
+class ArtifactPolicy(BaseModel):
+    """When results are moved out of band and how much of them stays in memory"""
+
+    enabled: bool = Field(True, description="Move large tool results into the artifact store")
+    threshold_bytes: int = Field(64 * 1024, description="Results at least this large become artifacts")
+    memory_limit_bytes: int = Field(64 * 1024 * 1024, description="Artifact bytes kept in memory before spilling to files")
+    spill_dir: Optional[str] = Field(None, description="Directory for spilled artifacts; defaults to a temporary directory")
+    disk_limit_bytes: Optional[int] = Field(
+        1 << 30, description="Spilled bytes kept on disk; the oldest artifacts are deleted beyond it"
+    )
+    preview_chars: int = Field(500, description="Characters of the result shown in previews")
+
+
+class ArtifactHandle(BaseModel):
+    """Lightweight reference to a stored result, safe to put into prompts and events"""
+
+    id: str = Field(..., description="Artifact id")
+    size: int = Field(..., description="Size of the stored data in bytes")
+    content_type: str = Field(..., description="text, bytes or json")
+    preview: str = Field("", description="Size-capped preview of the data")
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the stored bytes"""
+        return get_artifact_store().view(self.id)
+
+    def load(self) -> Any:
+        """The decoded value (str, bytes or the JSON value)"""
+        return get_artifact_store().load(self.id)
+
+    def __str__(self) -> str:
+        shown = self.preview + ("…" if len(self.preview) < self.size else "")
+        return f"<artifact {self.id} ({self.size} bytes {self.content_type}): {shown}>"
+
+    __repr__ = __str__
+
+
+def _encode(value: Any) -> Tuple[bytes, str]:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value), BYTES
+    if isinstance(value, str):
+        return value.encode("utf-8"), TEXT
+    return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"), JSON
+
+
+def _decode(data: Union[bytes, memoryview], content_type: str) -> Any:
+    if content_type == BYTES:
+        return bytes(data)
+    text = bytes(data).decode("utf-8", errors="replace")
+    return json.loads(text) if content_type == JSON else text
+
+
+def _preview(data: bytes, content_type: str, chars: int) -> str:
+    if content_type == BYTES:
+        return data[: max(1, chars // 2)].hex()
+    # Decode a bounded prefix only; a cut multi-byte character is dropped
+    return data[: chars * 4].decode("utf-8", errors="ignore")[:chars]
+
+
+class _Spilled:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def view(self) -> memoryview:
+        return memoryview(self.map) if self.map is not None else memoryview(b"")
+
+    def close(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # A view is still in use; the mapping goes away with it
+                pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ArtifactStore:
+    """In-memory artifact store that spills the oldest artifacts to memory-mapped files"""
+
+    def __init__(self, policy: Optional[ArtifactPolicy] = None):
+        self.policy = policy or ArtifactPolicy()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._spilled: Dict[str, _Spilled] = {}
+        self._types: Dict[str, str] = {}
+        self._memory_bytes = 0
+        self._spilled_bytes = 0
+        self._spill_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def put(self, value: Any) -> ArtifactHandle:
+        """Store a value and return its handle"""
+        data, content_type = _encode(value)
+        return self._put(data, content_type)
+
+    def _put(self, data: bytes, content_type: str) -> ArtifactHandle:
+        artifact_id = uuid.uuid4().hex
+        with self._lock:
+            self._memory[artifact_id] = data
+            self._types[artifact_id] = content_type
+            self._memory_bytes += len(data)
+            self._spill()
+        return ArtifactHandle(
+            id=artifact_id,
+            size=len(data),
+            content_type=content_type,
+            preview=_preview(data, content_type, self.policy.preview_chars),
+        )
+
+    def offload(self, value: Any) -> Any:
+        """Replace `value` by a handle when it is at least ``threshold_bytes``, else return it unchanged"""
+        if not self.policy.enabled or value is None or isinstance(value, (ArtifactHandle, int, float, bool)):
+            return value
+        # Cheap size checks before encoding: UTF-8 needs at most 4 bytes per character
+        if isinstance(value, (bytes, bytearray, memoryview)) and len(value) < self.policy.threshold_bytes:
+            return value
+        if isinstance(value, str) and len(value) * 4 < self.policy.threshold_bytes:
+            return value
+        data, content_type = _encode(value)
+        if len(data) < self.policy.threshold_bytes:
+            return value
+        return self._put(data, content_type)
+
+    def _spill(self):
+        """Move the oldest in-memory artifacts to files until the memory limit holds. Lock held."""
+        while self._memory_bytes > self.policy.memory_limit_bytes and self._memory:
+            artifact_id, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+            if self._spill_dir is None:
+                if self.policy.spill_dir:
+                    os.makedirs(self.policy.spill_dir, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="orchestra-artifacts-", dir=self.policy.spill_dir)
+            path = os.path.join(self._spill_dir, artifact_id)
+            with open(path, "wb") as f:
+                f.write(data)
+            self._spilled[artifact_id] = _Spilled(path, len(data))
+            self._spilled_bytes += len(data)
+
+        limit = self.policy.disk_limit_bytes
+        while limit is not None and self._spilled_bytes > limit and self._spilled:
+            # Dicts keep insertion order, so the first spilled artifact is the oldest
+            artifact_id = next(iter(self._spilled))
+            expired = self._spilled.pop(artifact_id)
+            self._types.pop(artifact_id, None)
+            self._spilled_bytes -= expired.size
+            expired.close()
+
+    def view(self, artifact_id: str) -> memoryview:
+        """Zero-copy view of an artifact's bytes"""
+        with self._lock:
+            data = self._memory.get(artifact_id)
+            if data is not None:
+                return memoryview(data)
+            spilled = self._spilled.get(artifact_id)
+            if spilled is not None:
+                return spilled.view()
+        raise ArtifactNotFoundError(artifact_id)
+
+    def load(self, artifact_id: str) -> Any:
+        with self._lock:
+            content_type = self._types.get(artifact_id)
+        if content_type is None:
+            raise ArtifactNotFoundError(artifact_id)
+        return _decode(self.view(artifact_id), content_type)
+
+    def delete(self, artifact_id: str):
+        with self._lock:
+            data = self._memory.pop(artifact_id, None)
+            if data is not None:
+                self._memory_bytes -= len(data)
+            spilled = self._spilled.pop(artifact_id, None)
+            if spilled is not None:
+                self._spilled_bytes -= spilled.size
+            self._types.pop(artifact_id, None)
+        if spilled is not None:
+            spilled.close()
+
+    def clear(self):
+        """Delete every artifact and the spill directory"""
+        with self._lock:
+            spilled = list(self._spilled.values())
+            self._memory.clear()
+            self._spilled.clear()
+            self._types.clear()
+            self._memory_bytes = 0
+            self._spilled_bytes = 0
+            spill_dir, self._spill_dir = self._spill_dir, None
+        for item in spilled:
+            item.close()
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "artifacts": len(self._types),
+                "memory_bytes": self._memory_bytes,
+                "spilled": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+            }
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+_policy = ArtifactPolicy()
+
+
+def get_artifact_policy() -> ArtifactPolicy:
+    return _policy
+
+
+def set_artifact_policy(policy: ArtifactPolicy):
+    """Replace the policy; the current store and its artifacts are dropped"""
+    global _policy
+    close_artifact_store()
+    _policy = policy
+
+
+def get_artifact_store() -> ArtifactStore:
+    """The shared artifact store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore(_policy)
+    return _store
+
+
+def offload(value: Any) -> Any:
+    """Move a large result into the shared store (see `ArtifactStore.offload`)"""
+    if not _policy.enabled:
+        return value
+    return get_artifact_store().offload(value)
+
+
+def resolve(value: Any) -> Any:
+    """The stored value behind a handle; other values unchanged"""
+    return value.load() if isinstance(value, ArtifactHandle) else value
+
+
+def close_artifact_store():
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.clear()
+
+
+artifacts = _sys.modules[__name__]
@@ -0,0 +1,142 @@
+"""
+Deadlines and cooperative cancellation for runs.
+
+`run()` binds a `CancellationToken` to the context it executes in. Every stage checks
+it: planning and synthesis before calling the model, `route()` before starting each
+step, `ToolAgent.execute()` before running the tool and `model_invoke()` while it
+waits for the backend. Long-running tools can call `check_cancelled()` themselves.
+
+A token expires at its deadline, or is cancelled explicitly by whoever holds it::
+
+    token = CancellationToken(timeout=30)
+    threading.Timer(5, token.cancel).start()
+    answer = run(query, agents, cancel_token=token)
+"""
+
+import contextvars
+import threading
+import time
+from typing import Optional
+
+import sys as _sys
+
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+
+class RunCancelledError(RuntimeError):
+    """Raised when the current run was cancelled"""
+
+    status = CANCELLED
+
+
+class DeadlineExceededError(RunCancelledError, TimeoutError):
+    """Raised when the current run has passed its deadline"""
+
+    status = TIMEOUT
+
+
+class CancellationToken:
+    """Deadline plus explicit cancellation, shared by everything a run does"""
+
+    def __init__(self, timeout: Optional[float] = None, deadline: Optional[float] = None):
+        """
+        Args:
+            timeout: Seconds from now until the token expires
+            deadline: Absolute expiry as a `time.time()` timestamp
+        """
+        self.deadline: Optional[float] = None  # time.monotonic() based
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self.shorten(timeout=timeout, deadline=deadline)
+
+    def shorten(self, timeout: Optional[float] = None, deadline: Optional[float] = None):
+        """Move the deadline earlier; a later timeout or deadline than the current one is ignored"""
+        if timeout is not None:
+            absolute = time.monotonic() + timeout
+            self.deadline = absolute if self.deadline is None else min(self.deadline, absolute)
+        if deadline is not None:
+            absolute = time.monotonic() + (deadline - time.time())
+            self.deadline = absolute if self.deadline is None else min(self.deadline, absolute)
+
+    def cancel(self, reason: str = "cancelled by caller"):
+        """Cancel the run holding this token"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def done(self) -> bool:
+        return self.cancelled or self.expired
+
+    @property
+    def status(self) -> Optional[str]:
+        """"cancelled", "timeout" or None while the run may continue"""
+        if self.cancelled:
+            return CANCELLED
+        if self.expired:
+            return TIMEOUT
+        return None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (None without a deadline)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise if the run was cancelled or its deadline passed"""
+        if self.cancelled:
+            raise RunCancelledError(self.reason)
+        if self.expired:
+            raise DeadlineExceededError("deadline exceeded")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep up to `timeout` seconds (bounded by the deadline); True if the token is done"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.done
+
+
+# Token of the run currently executing in this context; set by `orchestra.run()`
+current_cancellation: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "orchestra_cancellation", default=None
+)
+
+
+def resolve_token(
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    token: Optional[CancellationToken] = None,
+) -> CancellationToken:
+    """The token for a new run: the caller's token (narrowed by timeout/deadline) or a fresh one"""
+    if token is None:
+        return CancellationToken(timeout=timeout, deadline=deadline)
+    token.shorten(timeout=timeout, deadline=deadline)
+    return token
+
+
+def check_cancelled():
+    """Raise if the current run was cancelled or timed out; no-op outside a run"""
+    token = current_cancellation.get()
+    if token is not None:
+        token.check()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current run's deadline, or None"""
+    token = current_cancellation.get()
+    return token.remaining() if token is not None else None
+
+
+cancellation = _sys.modules[__name__]
@@ -0,0 +1,142 @@
+"""
+Agent shortlisting before planning.
+
+The planner prompt lists the agents it may route to. With a large catalog only the
+``top_k`` agents whose name, description, keywords and examples best match the query
+(BM25) are listed, so the planning prompt stays the same size as the catalog grows:
+
+- catalogs of at most ``shortlist_above`` agents are always listed in full
+- when no agent matches the query at least ``min_score``, the full catalog is used,
+  so vague queries ("do that again") are not routed blind
+
+Routing still sees every agent. The index is rebuilt only when the catalog changes.
+
+`ToolAgent.execute()` shortlists its tools the same way: only the ``tool_top_k`` tool
+schemas that best match the task text go into the tool-binding prompt, and the full
+toolset is offered in a second call when the model picks nothing valid.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, List, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from orchestra.utils.bm25 import BM25Index
+
+import sys as _sys
+
+
+class CatalogPolicy(BaseModel):
+    """How many agents the planner sees"""
+
+    enabled: bool = Field(True, description="Shortlist agents for large catalogs")
+    top_k: int = Field(8, description="Agents listed in the planning prompt")
+    shortlist_above: int = Field(12, description="Catalogs of at most this many agents are listed in full")
+    min_score: float = Field(0.0, description="Best BM25 score below which the full catalog is used")
+    tool_top_k: int = Field(6, description="Tool schemas included in an agent's tool-binding prompt")
+    tools_shortlist_above: int = Field(8, description="Toolsets of at most this many tools are offered in full")
+
+
+_policy = CatalogPolicy()
+
+
+def get_catalog_policy() -> CatalogPolicy:
+    return _policy
+
+
+def set_catalog_policy(policy: CatalogPolicy):
+    global _policy
+    _policy = policy
+
+
+def agent_document(agent: Any) -> str:
+    """Text an agent is matched on"""
+    keywords = getattr(agent, "keywords", None) or []
+    examples = getattr(agent, "examples", None) or []
+    return " ".join([agent.name, agent.description, *keywords, *examples])
+
+
+def tool_document(tool: Any) -> str:
+    """Text a tool is matched on: name, description and parameter names and descriptions"""
+    parameters = tool.get_schema().get("parameters", {}).get("properties", {})
+    terms = [tool.name, tool.description]
+    for name, spec in parameters.items():
+        terms.append(name)
+        if isinstance(spec, dict) and spec.get("description"):
+            terms.append(spec["description"])
+    return " ".join(terms)
+
+
+class CatalogIndex:
+    """BM25 index over a list of agents or tools"""
+
+    def __init__(self, items: Sequence[Any], documents: List[str]):
+        self.items = list(items)
+        self._index = BM25Index(documents)
+
+    def search(self, query: str, k: int) -> List[Tuple[Any, float]]:
+        return [(self.items[index], score) for index, score in self._index.top(query, k)]
+
+
+_MAX_INDEXES = 64
+_indexes: "OrderedDict[Tuple, CatalogIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _get_index(items: Sequence[Any], documents: List[str]) -> CatalogIndex:
+    """The index of a catalog, built once per distinct catalog"""
+    key = tuple(documents)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            # The same catalog may come as new objects; return the current ones
+            index.items = list(items)
+            return index
+    index = CatalogIndex(items, documents)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def get_agent_index(agent_list: Sequence[Any]) -> CatalogIndex:
+    return _get_index(agent_list, [agent_document(agent) for agent in agent_list])
+
+
+def get_tool_index(tools: Sequence[Any]) -> CatalogIndex:
+    return _get_index(tools, [tool_document(tool) for tool in tools])
+
+
+def shortlist_agents(query: str, agent_list: Sequence[Any], policy: CatalogPolicy = None) -> List[Any]:
+    """The agents to list in the planning prompt for `query`, in catalog order"""
+    policy = policy or _policy
+    if not policy.enabled or len(agent_list) <= max(policy.shortlist_above, policy.top_k):
+        return list(agent_list)
+    matches = get_agent_index(agent_list).search(query, policy.top_k)
+    if not matches or matches[0][1] < policy.min_score:
+        return list(agent_list)
+    chosen = {id(agent) for agent, _ in matches}
+    return [agent for agent in agent_list if id(agent) in chosen]
+
+
+
+def tool_rounds(task: str, tools: Sequence[Any], policy: CatalogPolicy = None) -> List[List[Any]]:
+    """
+    Toolsets to offer the model for `task`, in order: the best matching tools first, then
+    every tool if the model picked nothing valid from the shortlist.
+    """
+    policy = policy or _policy
+    tools = list(tools)
+    if not policy.enabled or len(tools) <= max(policy.tools_shortlist_above, policy.tool_top_k):
+        return [tools]
+    matches = get_tool_index(tools).search(task, policy.tool_top_k)
+    if not matches:
+        return [tools]
+    chosen = {id(tool) for tool, _ in matches}
+    return [[tool for tool in tools if id(tool) in chosen], tools]
+
+
+catalog = _sys.modules[__name__]
@@ -1,7 +1,28 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+"""
+Conversation context passed to the planner.
+
+History is packed into the planning prompt by token budget rather than message count.
+An `OrchestraContext` also keeps, per session:
+
+- each message formatted once, when it is added, with its token estimate
+- a rolling summary of older turns: once the verbatim window exceeds
+  ``ContextPolicy.history_tokens``, the oldest messages are folded into the summary
+  until the window is back under ``fold_to`` of the budget, so summarizing happens
+  once every few turns instead of on every message
+- the rendered history, which new messages extend instead of re-formatting the window
+
+A plain list of messages is packed by budget as well, but without a summary.
+"""
+
+from typing import Callable, List, Optional, Union
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 
+from orchestra.utils.tokens import estimate_tokens, truncate_to_tokens
+
+NO_HISTORY = "No previous conversation history."
+
+
 class MessageRole(str, Enum):
     USER = "user"
     ASSISTANT = "assistant"
@@ -12,6 +33,64 @@ class ChatMessage(BaseModel):
     content: str
     timestamp: float = Field(default_factory=lambda: __import__("time").time())
 
+
+class ContextPolicy(BaseModel):
+    """Token budget of the conversation history in planning prompts"""
+
+    history_tokens: int = Field(1500, description="Budget for the verbatim recent turns")
+    summary_tokens: int = Field(300, description="Budget for the rolling summary of older turns")
+    fold_to: float = Field(0.5, description="Fraction of history_tokens left verbatim after folding turns into the summary")
+    message_tokens: int = Field(500, description="Longer single messages are cut to this many tokens")
+    summarize: bool = Field(True, description="Fold older turns into a summary instead of dropping them")
+
+
+_policy = ContextPolicy()
+
+
+def get_context_policy() -> ContextPolicy:
+    return _policy
+
+
+def set_context_policy(policy: ContextPolicy):
+    global _policy
+    _policy = policy
+
+
+def format_message(message: ChatMessage, max_tokens: Optional[int] = None) -> str:
+    role_name = "User" if message.role == MessageRole.USER else "Assistant"
+    content = message.content if max_tokens is None else truncate_to_tokens(message.content, max_tokens)
+    return f"{role_name}: {content}"
+
+
+def pack_history(messages: List[ChatMessage], max_tokens: int, message_tokens: Optional[int] = None) -> List[str]:
+    """The most recent messages, formatted, that fit into `max_tokens` (always at least the last one)"""
+    packed: List[str] = []
+    used = 0
+    for message in reversed(messages):
+        line = format_message(message, message_tokens)
+        tokens = estimate_tokens(line) + 1
+        if packed and used + tokens > max_tokens:
+            break
+        packed.append(line)
+        used += tokens
+    packed.reverse()
+    return packed
+
+
+def summarize_turns(summary: str, turns: str, max_tokens: int) -> str:
+    """Fold conversation turns into the running summary with a model call"""
+    from orchestra.llm.base import model_invoke
+
+    system = (
+        "You maintain a running summary of a conversation for an assistant that plans tasks. "
+        "Merge the new turns into the existing summary. Keep names, numbers, decisions, open requests "
+        f"and user preferences; drop small talk. Answer with the summary only, at most {max_tokens * 3 // 4} words."
+    )
+    user_message = f"Existing summary:\n{summary or '(none)'}\n\nNew turns:\n{turns}"
+    response = model_invoke(system, user_message, None, stage="history_summary")
+    return str(response["content"] if isinstance(response, dict) else response)
+
+
 class OrchestraContext(BaseModel):
     """
     Holds the context for the current execution, including conversation history.
@@ -19,27 +98,125 @@ class OrchestraContext(BaseModel):
     session_id: str = "default"
     history: List[ChatMessage] = Field(default_factory=list)
 
+    # Formatted messages and their token estimates, parallel to `history`
+    _lines: List[str] = PrivateAttr(default_factory=list)
+    _tokens: List[int] = PrivateAttr(default_factory=list)
+    # Messages before this index are folded into `_summary`
+    _summarized: int = PrivateAttr(0)
+    _summary: str = PrivateAttr("")
+    _window_tokens: int = PrivateAttr(0)
+    _rendered: Optional[str] = PrivateAttr(None)
+
     def add_message(self, role: MessageRole, content: str):
         self.history.append(ChatMessage(role=role, content=content))
+        self._sync()
+
+    @property
+    def summary(self) -> str:
+        """Rolling summary of the turns no longer included verbatim"""
+        return self._summary
+
+    def _sync(self):
+        """Format messages appended since the last call; start over if the history was replaced"""
+        if len(self._lines) > len(self.history):
+            self._reset()
+        for message in self.history[len(self._lines):]:
+            line = format_message(message, _policy.message_tokens)
+            tokens = estimate_tokens(line) + 1
+            self._lines.append(line)
+            self._tokens.append(tokens)
+            self._window_tokens += tokens
+            if self._rendered is not None:
+                self._rendered = f"{self._rendered}\n{line}" if self._rendered else line
+
+    def _reset(self):
+        self._lines, self._tokens = [], []
+        self._summarized, self._summary = 0, ""
+        self._window_tokens, self._rendered = 0, None
+
+    def _fold(self, policy: ContextPolicy, summarizer: Callable[[str, str, int], str]):
+        """Move the oldest verbatim turns into the summary until the window is under ``fold_to``"""
+        target = int(policy.history_tokens * policy.fold_to)
+        end = self._summarized
+        tokens = self._window_tokens
+        # Always keep the latest message verbatim
+        while tokens > target and end < len(self._lines) - 1:
+            tokens -= self._tokens[end]
+            end += 1
+        if end == self._summarized:
+            return
+        if policy.summarize:
+            turns = "\n".join(self._lines[self._summarized:end])
+            self._summary = truncate_to_tokens(summarizer(self._summary, turns, policy.summary_tokens), policy.summary_tokens)
+        self._summarized = end
+        self._window_tokens = tokens
+        self._rendered = None
+
+    def render_history(
+        self,
+        policy: Optional[ContextPolicy] = None,
+        summarizer: Callable[[str, str, int], str] = summarize_turns,
+    ) -> str:
+        """
+        History for the planning prompt: the rolling summary followed by the recent turns
+        that fit ``history_tokens``. Older turns are folded into the summary as needed.
+        """
+        policy = policy or _policy
+        self._sync()
+        if not self._lines:
+            return NO_HISTORY
+        if self._window_tokens > policy.history_tokens:
+            self._fold(policy, summarizer)
+        if self._rendered is None:
+            self._rendered = "\n".join(self._lines[self._summarized:])
+        if self._summary:
+            return f"Summary of earlier conversation: {self._summary}\n{self._rendered}"
+        return self._rendered
 
     def get_formatted_history(self, limit: int = 10) -> str:
         """
         Returns the chat history formatted as a string for the LLM prompt.
         Limits to the last N messages to save tokens.
         """
-        if not self.history:
-            return "No previous conversation history."
-
-        formatted = []
-        # Take the last 'limit' messages
-        recent_history = self.history[-limit:]
-        
-        for msg in recent_history:
-            role_name = "User" if msg.role == MessageRole.USER else "Assistant"
-            formatted.append(f"{role_name}: {msg.content}")
-            
-        return "\n".join(formatted)
+        self._sync()
+        if not self._lines:
+            return NO_HISTORY
+        return "\n".join(self._lines[-limit:])
+
+    @property
+    def summarized(self) -> int:
+        """Number of leading messages in `history` already folded into the summary"""
+        return self._summarized
+
+    def restore(self, messages: List[ChatMessage], summary: str = ""):
+        """Replace the history by loaded messages that follow an already computed summary"""
+        self.history = list(messages)
+        self._reset()
+        self._summary = summary
+        self._sync()
+
+    def compact(self, count: int) -> int:
+        """Drop up to `count` leading messages that are already folded into the summary"""
+        count = min(count, self._summarized)
+        if count <= 0:
+            return 0
+        self._sync()
+        del self.history[:count]
+        del self._lines[:count]
+        del self._tokens[:count]
+        self._summarized -= count
+        return count
 
     def clear(self):
         self.history = []
+        self._reset()
+
 
+def render_history(history: Union[List[ChatMessage], OrchestraContext], policy: Optional[ContextPolicy] = None) -> str:
+    """Budgeted history for a context (with its rolling summary) or a plain message list"""
+    if isinstance(history, OrchestraContext):
+        return history.render_history(policy)
+    policy = policy or _policy
+    if not history:
+        return NO_HISTORY
+    return "\n".join(pack_history(history, policy.history_tokens, policy.message_tokens))
@@ -1,14 +1,28 @@
 import asyncio
+import contextvars
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 from pydantic import BaseModel, Field
 
+# Id of the run currently executing in this context; set by `orchestra.run()`
+current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "orchestra_run_id", default=None
+)
+
 class EventType(str, Enum):
     # Orchestra lifecycle
     ORCHESTRA_START = "orchestra_start"
     ORCHESTRA_END = "orchestra_end"
+    ORCHESTRA_ERROR = "orchestra_error"
+    ORCHESTRA_CANCELLED = "orchestra_cancelled"
     
+    # Admission control
+    ADMISSION_QUEUED = "admission_queued"
+    ADMISSION_ADMITTED = "admission_admitted"
+    ADMISSION_REJECTED = "admission_rejected"
+    ADMISSION_DROPPED = "admission_dropped"
+
     # Task Planning
     TASK_GENERATION_START = "task_generation_start"
     TASK_GENERATION_END = "task_generation_end"
@@ -17,6 +31,7 @@ class EventType(str, Enum):
     TASK_START = "task_start"
     TASK_COMPLETE = "task_complete"
     TASK_ERROR = "task_error"
+    TASK_CANCELLED = "task_cancelled"
     
     # Agent lifecycle
     AGENT_START = "agent_start"
@@ -25,8 +40,23 @@ class EventType(str, Enum):
     # Tool usage
     TOOL_SELECTION = "tool_selection"
     TOOL_START = "tool_start"
+    TOOL_CHUNK = "tool_chunk"
     TOOL_END = "tool_end"
     TOOL_ERROR = "tool_error"
+
+    # Model calls
+    LLM_START = "llm_start"
+    LLM_END = "llm_end"
+    LLM_ERROR = "llm_error"
+    LLM_RETRY = "llm_retry"
+    LLM_HEDGE = "llm_hedge"
+    LLM_ESCALATED = "llm_escalated"
+    LLM_REJECTED = "llm_rejected"
+    BUDGET_EXCEEDED = "budget_exceeded"
+
+    # Backend pools
+    ENDPOINT_EJECTED = "endpoint_ejected"
+    ENDPOINT_READMITTED = "endpoint_readmitted"
     
     # General
     LOG = "log"
@@ -36,6 +66,7 @@ class Event(BaseModel):
     source: str = Field(..., description="Component source of the event (e.g., 'orchestra', 'weather_agent')")
     data: Dict[str, Any] = Field(default_factory=dict, description="Event payload")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    run_id: Optional[str] = Field(default_factory=lambda: current_run_id.get(), description="Id of the run that emitted the event")
     
     class Config:
         json_encoders = {
@@ -0,0 +1,391 @@
+"""
+Execution classes for tools.
+
+A tool declares where its `run()` executes through its ``execution`` field:
+
+- ``inline`` (default): in the calling thread, as before
+- ``thread``: in a shared thread pool, so the caller can stop waiting on timeout or cancellation
+- ``process``: in a warm, managed `ProcessPoolExecutor`, for CPU-bound tools that would
+  otherwise hold the GIL and stall every other run in the process
+- ``sandbox``: in an isolated worker with hard timeouts and memory limits (see `core.sandbox`)
+
+Process tools and their arguments are pickled once up front, so unpicklable arguments
+fail with a clear error before reaching a worker. Large ``bytes`` results come back
+through shared memory instead of the result pipe. Tools are set up (`Tool.setup()`)
+once per process: in the caller for inline and thread tools, and once per worker for
+process and sandbox tools, where they are torn down when the worker exits. A tool that exceeds its ``timeout``
+raises `ToolTimeoutError`. A process tool is interrupted inside its worker at the
+deadline, so the worker and the calls running next to it are unaffected; only a tool
+that ignores the interrupt for ``kill_grace`` seconds gets the whole pool replaced. Calls
+that lose their worker that way fail, and are only run again if their tool is marked
+``idempotent``. Workers are also recycled after ``max_tasks_per_child`` tasks.
+
+Usage::
+
+    class ParsePdf(Tool):
+        name: str = "parse_pdf"
+        description: str = "Extract the text of a PDF"
+        execution: str = "process"
+        timeout: Optional[float] = 60
+
+    set_executor_policy(ExecutorPolicy(max_workers=8))
+    warmup()
+"""
+
+import contextvars
+import multiprocessing
+import multiprocessing.util
+import os
+import pickle
+import signal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import current_cancellation
+from orchestra.core.streaming import drain
+
+import sys as _sys
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+SANDBOX = "sandbox"
+EXECUTION_CLASSES = (INLINE, THREAD, PROCESS, SANDBOX)
+
+# How often a waiting caller re-checks the run's cancellation token
+_CANCEL_POLL_INTERVAL = 0.05
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool does not finish within its timeout"""
+
+    cause = "timeout"
+
+
+class ToolArgumentError(TypeError):
+    """Raised when a process tool or its arguments cannot be pickled"""
+
+    cause = "arguments"
+
+
+class _ToolInterrupted(BaseException):
+    """Raised inside a worker when a process tool reaches its deadline
+
+    A BaseException so that the tool's own ``except Exception`` blocks do not swallow it.
+    """
+
+
+class ExecutorPolicy(BaseModel):
+    """Settings of the tool thread and process pools"""
+
+    max_workers: int = Field(default_factory=lambda: os.cpu_count() or 1, description="Worker processes")
+    max_threads: int = Field(16, description="Threads for thread-class tools")
+    max_tasks_per_child: Optional[int] = Field(100, description="Tasks a worker process runs before it is replaced")
+    start_method: Optional[str] = Field(None, description="multiprocessing start method; defaults to forkserver, or spawn")
+    shm_threshold: int = Field(1 << 20, description="bytes results at least this large are returned through shared memory")
+    kill_grace: float = Field(
+        1.0, description="Seconds a timed-out process tool has to stop before its pool is replaced"
+    )
+
+
+class _SharedBytes:
+    """Handle of a bytes result left in shared memory by a worker"""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+
+# Set-up tool instances of a worker process, keyed by the pickled tool (class and field values)
+_worker_tools: "OrderedDict[bytes, Any]" = OrderedDict()
+_MAX_WORKER_TOOLS = 32
+
+
+def _pack_call(tool: Any, arguments: Dict[str, Any]) -> bytes:
+    """Pickle a tool call for a worker; the tool is pickled separately so workers can key on it"""
+    try:
+        state = pickle.dumps(tool, protocol=pickle.HIGHEST_PROTOCOL)
+        return pickle.dumps((state, arguments), protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise ToolArgumentError(f"Tool '{tool.name}' or its arguments cannot be pickled: {e}") from e
+
+
+def _unpack_call(payload: bytes) -> Tuple[Any, Dict[str, Any]]:
+    """In a worker: the set-up tool instance and the arguments of a packed call
+
+    setup() runs once per worker for each distinct tool configuration; the least recently
+    used instances are torn down when a worker sees many configurations.
+    """
+    from orchestra.core.tools import teardown_tool, teardown_tools
+
+    state, arguments = pickle.loads(payload)
+    instance = _worker_tools.get(state)
+    if instance is not None:
+        _worker_tools.move_to_end(state)
+        return instance, arguments
+
+    if not _worker_tools:
+        # Runs when the worker exits normally (recycling, shutdown)
+        multiprocessing.util.Finalize(None, teardown_tools, exitpriority=10)
+    instance = pickle.loads(state)
+    instance.ensure_setup()
+    _worker_tools[state] = instance
+    if len(_worker_tools) > _MAX_WORKER_TOOLS:
+        _, evicted = _worker_tools.popitem(last=False)
+        teardown_tool(evicted)
+    return instance, arguments
+
+
+def _interrupt(signum, frame):
+    raise _ToolInterrupted()
+
+
+def _run_pickled(payload: bytes, shm_threshold: int, deadline: Optional[float] = None) -> Any:
+    """Worker entry point: unpickle the tool and its arguments and run it until `deadline`"""
+    tool, arguments = _unpack_call(payload)
+    # The worker interrupts its own call at the deadline (wall clock, shared with the caller)
+    timer = deadline is not None and hasattr(signal, "setitimer")
+    if timer:
+        signal.signal(signal.SIGALRM, _interrupt)
+        signal.setitimer(signal.ITIMER_REAL, max(deadline - time.time(), 0.001))
+    try:
+        # Generators cannot be sent back to the caller; streamed results arrive as a list
+        result = drain(tool.run(**arguments))
+    finally:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    if isinstance(result, (bytes, bytearray, memoryview)) and len(result) >= shm_threshold:
+        data = memoryview(result).cast("B")
+        segment = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        segment.buf[:len(data)] = data
+        handle = _SharedBytes(segment.name, len(data))
+        segment.close()
+        return handle
+    return result
+
+
+def _read_shared(handle: _SharedBytes) -> bytes:
+    segment = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return bytes(segment.buf[:handle.size])
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+_policy = ExecutorPolicy()
+_process_pool: Optional[ProcessPoolExecutor] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_recycled = 0
+_interrupted = 0
+
+
+def get_executor_policy() -> ExecutorPolicy:
+    return _policy
+
+
+def set_executor_policy(policy: ExecutorPolicy):
+    """Replace the executor policy; running pools are shut down and recreated on next use"""
+    global _policy
+    shutdown(wait=False)
+    _policy = policy
+
+
+def _mp_context():
+    method = _policy.start_method
+    if method is None:
+        # Fork is unsafe with the threads this process runs and forbids max_tasks_per_child
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            kwargs = {"max_workers": _policy.max_workers, "mp_context": _mp_context()}
+            if _policy.max_tasks_per_child is not None and _sys.version_info >= (3, 11):
+                kwargs["max_tasks_per_child"] = _policy.max_tasks_per_child
+            _process_pool = ProcessPoolExecutor(**kwargs)
+        return _process_pool
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=_policy.max_threads, thread_name_prefix="orchestra-tool")
+        return _thread_pool
+
+
+def _terminate(pool: ProcessPoolExecutor):
+    terminate_workers = getattr(pool, "terminate_workers", None)
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _recycle(pool: ProcessPoolExecutor):
+    """Replace a pool whose worker is stuck or dead; other tasks running on it fail (last resort)"""
+    global _process_pool, _recycled
+    with _lock:
+        if _process_pool is not pool:
+            return
+        _process_pool = None
+        _recycled += 1
+    _terminate(pool)
+    # Start the replacement workers now so the next call does not pay for it
+    threading.Thread(target=_background_warmup, name="orchestra-tool-warmup", daemon=True).start()
+
+
+def warmup():
+    """Start every worker process now instead of on the first process-class tool call"""
+    pool = _get_process_pool()
+    futures = [pool.submit(_noop) for _ in range(_policy.max_workers)]
+    for future in futures:
+        future.result()
+
+
+def _background_warmup():
+    try:
+        warmup()
+    except Exception:
+        # The pool was shut down or replaced meanwhile; the next call starts its own workers
+        pass
+
+
+def shutdown(wait: bool = True):
+    """Stop the tool pools"""
+    global _process_pool, _thread_pool
+    with _lock:
+        process_pool, _process_pool = _process_pool, None
+        thread_pool, _thread_pool = _thread_pool, None
+    if process_pool is not None:
+        process_pool.shutdown(wait=wait, cancel_futures=True)
+    if thread_pool is not None:
+        thread_pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def executor_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "process_pool": _process_pool is not None,
+            "max_workers": _policy.max_workers,
+            "recycled": _recycled,
+            "interrupted": _interrupted,
+        }
+
+
+def _wait(future: Future, tool_name: str, timeout: Optional[float]) -> Any:
+    """Wait for a tool result, bounded by the tool timeout and the run's cancellation token"""
+    token = current_cancellation.get()
+    end = None if timeout is None else time.monotonic() + timeout
+    while True:
+        step = None
+        if token is not None:
+            token.check()
+            step = _CANCEL_POLL_INTERVAL
+        if end is not None:
+            remaining = max(0.0, end - time.monotonic())
+            step = remaining if step is None else min(step, remaining)
+        try:
+            return future.result(timeout=step)
+        except FutureTimeoutError:
+            if end is not None and time.monotonic() >= end:
+                future.cancel()
+                raise ToolTimeoutError(f"Tool '{tool_name}' did not finish within {timeout:.2f}s")
+
+
+def _execute_in_process(tool: Any, arguments: Dict[str, Any], timeout: Optional[float]) -> Any:
+    global _interrupted
+    payload = _pack_call(tool, arguments)
+    attempts = 2 if getattr(tool, "idempotent", False) else 1
+
+    for attempt in range(1, attempts + 1):
+        pool = _get_process_pool()
+        deadline = None if timeout is None else time.time() + timeout
+        try:
+            future = pool.submit(_run_pickled, payload, _policy.shm_threshold, deadline)
+            try:
+                result = _wait(future, tool.name, timeout)
+            except ToolTimeoutError:
+                # Not started yet: _wait cancelled it. Started: its worker interrupts it at the
+                # deadline; only a tool that ignores the interrupt costs the pool
+                if not future.cancelled():
+                    try:
+                        stopped = future.exception(timeout=_policy.kill_grace)
+                    except FutureTimeoutError:
+                        _recycle(pool)
+                    else:
+                        if isinstance(stopped, _ToolInterrupted):
+                            with _lock:
+                                _interrupted += 1
+                raise
+        except BrokenProcessPool:
+            # A worker died mid-call (crash, or a pool replaced because of a stuck tool). The
+            # tool may have had side effects, so it is only run again when it says that is safe
+            _recycle(pool)
+            if attempt == attempts:
+                raise
+            continue
+        except _ToolInterrupted:
+            # The worker's clock fired just before the caller's
+            with _lock:
+                _interrupted += 1
+            raise ToolTimeoutError(f"Tool '{tool.name}' did not finish within {timeout:.2f}s") from None
+        if isinstance(result, _SharedBytes):
+            return _read_shared(result)
+        return result
+
+
+def execute_tool(tool: Any, arguments: Dict[str, Any]) -> Any:
+    """
+    Run `tool.run(**arguments)` in the tool's execution class.
+
+    Raises:
+        ToolTimeoutError: The tool exceeded its timeout (not enforced for inline tools)
+        ToolArgumentError: A process or sandbox tool or its arguments cannot be pickled
+        SandboxError: A sandbox worker was killed, crashed or ran out of memory
+        RunCancelledError: The current run was cancelled while waiting for the tool
+    """
+    execution = getattr(tool, "execution", INLINE)
+    timeout = getattr(tool, "timeout", None)
+
+    if execution == INLINE:
+        tool.ensure_setup()
+        return tool.run(**arguments)
+
+    if execution == THREAD:
+        tool.ensure_setup()
+        context = contextvars.copy_context()
+        future = _get_thread_pool().submit(context.run, tool.run, **arguments)
+        return _wait(future, tool.name, timeout)
+
+    if execution == PROCESS:
+        return _execute_in_process(tool, arguments, timeout)
+
+    if execution == SANDBOX:
+        from orchestra.core.sandbox import get_sandbox
+
+        return get_sandbox().run(tool, arguments, timeout)
+
+    raise ValueError(f"Unknown execution class '{execution}' for tool '{tool.name}'. Use one of: {', '.join(EXECUTION_CLASSES)}")
+
+
+executor = _sys.modules[__name__]
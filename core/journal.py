@@ -0,0 +1,323 @@
+"""
+Memory-mapped binary event journal.
+
+Events are written into a fixed-size ring file made of equally sized slots, so
+disk and memory usage are bounded by ``capacity * slot_size`` no matter how many
+events are captured. Once the ring is full the oldest records are overwritten.
+
+File layout::
+
+    header (64 bytes): magic, version, slot_size, capacity, next_seq
+    slot[0] .. slot[capacity - 1]
+
+Each slot starts with a small fixed header followed by the UTF-8 encoded event
+type, run id, source and the compact JSON payload. Payloads that do not fit in
+a slot are cut and flagged as truncated.
+
+Slots are written like a seqlock so that another process can read the file while it
+is being written: the writer first marks the slot empty, then writes the record, and
+stores the record's sequence number last. A reader copies the slot and re-reads the
+sequence number afterwards, discarding the copy if the slot changed meanwhile.
+
+Usage::
+
+    journal = enable_journal("events.journal", capacity=100_000)
+    ...
+    for record in read_journal("events.journal", run_id="...", types=["tool_end"]):
+        print(record)
+
+Or from the command line::
+
+    python -m orchestra.core.journal events.journal --run <id> --type tool_end
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.events import events, Event
+
+import sys as _sys
+
+MAGIC = b"OEVJ"
+VERSION = 1
+
+# magic, version, reserved, slot_size, capacity, next_seq
+_FILE_HEADER = struct.Struct("<4sHHIIQ")
+FILE_HEADER_SIZE = 64
+
+# seq + 1 (0 marks an empty slot), timestamp ns, flags, type_len, run_len, source_len, data_len
+_SLOT_HEADER = struct.Struct("<QqBBHHI")
+
+FLAG_TRUNCATED = 0x01
+
+# Identifiers are clamped so that every slot always has room left for a payload
+MAX_TYPE_BYTES = 64
+MAX_RUN_ID_BYTES = 64
+MAX_SOURCE_BYTES = 128
+MIN_SLOT_SIZE = 512
+
+DEFAULT_CAPACITY = 65_536
+DEFAULT_SLOT_SIZE = 1024
+
+
+class JournalRecord(BaseModel):
+    """A decoded journal entry"""
+
+    seq: int = Field(..., description="Monotonic sequence number of the record")
+    timestamp: datetime = Field(..., description="Event timestamp (UTC)")
+    type: str = Field(..., description="Event type value")
+    run_id: Optional[str] = Field(None, description="Run that emitted the event")
+    source: str = Field(..., description="Component source of the event")
+    data: Any = Field(None, description="Decoded payload, or the raw text if truncated")
+    truncated: bool = Field(False, description="Whether the payload was cut to fit the slot")
+
+
+def _to_ns(timestamp: datetime) -> int:
+    # Event timestamps are naive UTC datetimes
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1_000_000_000)
+
+
+class EventJournal:
+    """Event bus sink writing events into a memory-mapped ring file"""
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = DEFAULT_CAPACITY,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+    ):
+        if slot_size < MIN_SLOT_SIZE:
+            raise ValueError(f"slot_size must be at least {MIN_SLOT_SIZE} bytes")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.path = path
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self._lock = threading.Lock()
+
+        size = FILE_HEADER_SIZE + capacity * slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            existing = os.fstat(fd).st_size
+            if existing != size:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, _, old_slot_size, old_capacity, next_seq = _FILE_HEADER.unpack_from(self._mmap, 0)
+        if (
+            existing == size
+            and magic == MAGIC
+            and version == VERSION
+            and old_slot_size == slot_size
+            and old_capacity == capacity
+        ):
+            # Resume an existing journal with the same geometry
+            self._next_seq = next_seq
+        else:
+            self._mmap[:] = bytes(size)
+            self._next_seq = 0
+            _FILE_HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, 0, slot_size, capacity, 0)
+
+    def __call__(self, event: Event):
+        self.write(event)
+
+    def write(self, event: Event):
+        """Append an event to the ring, overwriting the oldest record when full"""
+        type_bytes = event.type.value.encode()[:MAX_TYPE_BYTES]
+        run_bytes = (event.run_id or "").encode()[:MAX_RUN_ID_BYTES]
+        source_bytes = event.source.encode()[:MAX_SOURCE_BYTES]
+        data_bytes = json.dumps(event.data, default=str, separators=(",", ":")).encode()
+
+        room = self.slot_size - _SLOT_HEADER.size - len(type_bytes) - len(run_bytes) - len(source_bytes)
+        flags = 0
+        if len(data_bytes) > room:
+            data_bytes = data_bytes[:room]
+            flags |= FLAG_TRUNCATED
+
+        timestamp_ns = _to_ns(event.timestamp)
+
+        with self._lock:
+            seq = self._next_seq
+            slot = FILE_HEADER_SIZE + (seq % self.capacity) * self.slot_size
+            # Invalidate the slot before touching its body, so readers never accept a mix
+            # of the old and the new record
+            struct.pack_into("<Q", self._mmap, slot, 0)
+            offset = slot
+            _SLOT_HEADER.pack_into(
+                self._mmap,
+                offset,
+                0,
+                timestamp_ns,
+                flags,
+                len(type_bytes),
+                len(run_bytes),
+                len(source_bytes),
+                len(data_bytes),
+            )
+            offset += _SLOT_HEADER.size
+            for chunk in (type_bytes, run_bytes, source_bytes, data_bytes):
+                end = offset + len(chunk)
+                self._mmap[offset:end] = chunk
+                offset = end
+
+            # Publish the record only once its slot is fully written
+            struct.pack_into("<Q", self._mmap, slot, seq + 1)
+            self._next_seq = seq + 1
+            struct.pack_into("<Q", self._mmap, _FILE_HEADER.size - 8, self._next_seq)
+
+    def flush(self):
+        """Flush pending pages to disk"""
+        self._mmap.flush()
+
+    def close(self):
+        """Flush and unmap the journal file"""
+        if not self._mmap.closed:
+            self._mmap.flush()
+            self._mmap.close()
+
+
+def _decode_slot(buffer, offset: int, slot_size: int, expected_seq: int) -> Optional[JournalRecord]:
+    # Copy the slot, then check its sequence number did not change while copying
+    snapshot = bytes(buffer[offset:offset + slot_size])
+    if struct.unpack_from("<Q", buffer, offset)[0] != expected_seq + 1:
+        return None
+    stored_seq, timestamp_ns, flags, type_len, run_len, source_len, data_len = _SLOT_HEADER.unpack_from(snapshot, 0)
+    if stored_seq != expected_seq + 1:
+        # Slot was being written, overwritten or never written
+        return None
+    if _SLOT_HEADER.size + type_len + run_len + source_len + data_len > slot_size:
+        return None
+
+    position = _SLOT_HEADER.size
+    fields = []
+    for length in (type_len, run_len, source_len, data_len):
+        fields.append(snapshot[position:position + length])
+        position += length
+    type_bytes, run_bytes, source_bytes, data_bytes = fields
+
+    truncated = bool(flags & FLAG_TRUNCATED)
+    data_text = data_bytes.decode(errors="replace")
+    if truncated:
+        data = data_text
+    else:
+        try:
+            data = json.loads(data_text)
+        except json.JSONDecodeError:
+            data = data_text
+
+    return JournalRecord(
+        seq=expected_seq,
+        timestamp=datetime.fromtimestamp(timestamp_ns / 1_000_000_000, tz=timezone.utc),
+        type=type_bytes.decode(errors="replace"),
+        run_id=run_bytes.decode(errors="replace") or None,
+        source=source_bytes.decode(errors="replace"),
+        data=data,
+        truncated=truncated,
+    )
+
+
+def read_journal(
+    path: str,
+    run_id: Optional[str] = None,
+    types: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Iterator[JournalRecord]:
+    """
+    Decode the records of a journal file, oldest first.
+
+    Args:
+        path: Journal file path
+        run_id: Only return records of this run
+        types: Only return records whose event type value is in this list
+        since: Only return records at or after this time (naive values are UTC)
+        until: Only return records at or before this time (naive values are UTC)
+    """
+    since_ns = _to_ns(since) if since else None
+    until_ns = _to_ns(until) if until else None
+    wanted_types = set(types) if types else None
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        magic, version, _, slot_size, capacity, next_seq = _FILE_HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not an Orchestra event journal")
+
+        for seq in range(max(0, next_seq - capacity), next_seq):
+            offset = FILE_HEADER_SIZE + (seq % capacity) * slot_size
+
+            # Cheap pre-filter on the timestamp before decoding the payload
+            timestamp_ns = struct.unpack_from("<q", buffer, offset + 8)[0]
+            if since_ns is not None and timestamp_ns < since_ns:
+                continue
+            if until_ns is not None and timestamp_ns > until_ns:
+                continue
+
+            record = _decode_slot(buffer, offset, slot_size, seq)
+            if record is None:
+                continue
+            if run_id is not None and record.run_id != run_id:
+                continue
+            if wanted_types is not None and record.type not in wanted_types:
+                continue
+            yield record
+    finally:
+        buffer.close()
+
+
+def enable_journal(
+    path: str,
+    capacity: int = DEFAULT_CAPACITY,
+    slot_size: int = DEFAULT_SLOT_SIZE,
+) -> EventJournal:
+    """Open a journal and subscribe it to the global event bus"""
+    journal = EventJournal(path, capacity=capacity, slot_size=slot_size)
+    events.subscribe(journal)
+    return journal
+
+
+def disable_journal(journal: EventJournal):
+    """Unsubscribe a journal from the event bus and close it"""
+    events.unsubscribe(journal)
+    journal.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Decode and filter an Orchestra event journal")
+    parser.add_argument("path", help="Journal file")
+    parser.add_argument("--run", dest="run_id", help="Only show events of this run id")
+    parser.add_argument("--type", dest="types", action="append", help="Event type to show (repeatable)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ISO timestamp (UTC) lower bound")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="ISO timestamp (UTC) upper bound")
+    parser.add_argument("--limit", type=int, help="Only show the last N matching events")
+    args = parser.parse_args(argv)
+
+    records = read_journal(args.path, run_id=args.run_id, types=args.types, since=args.since, until=args.until)
+    if args.limit:
+        records = list(records)[-args.limit:]
+
+    for record in records:
+        sys.stdout.write(record.model_dump_json() + "\n")
+    return 0
+
+
+journal = _sys.modules[__name__]
+
+if __name__ == "__main__":
+    raise SystemExit(main())
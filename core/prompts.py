@@ -0,0 +1,117 @@
+"""
+Prompt profiles.
+
+The planning, tool-binding and synthesis prompts are rendered in one of two profiles:
+
+- ``verbose`` (default): the original prompts with pretty-printed schemas, full
+  instructions, a worked example and a hand-written JSON response template
+- ``compact``: minified schemas, each instruction stated once, the few-shot example
+  only when ``few_shot`` is set, and no textual response template when the model's
+  provider supports native tool calling (the schema is already sent as a tool)
+
+With ``report`` enabled, every compact prompt is also rendered verbose and the token
+estimates of both are added up per prompt in `prompt_report()`.
+
+Usage::
+
+    set_prompt_policy(PromptPolicy(profile="compact", report=True))
+    run(query, agents)
+    prompt_report()   # {"planning": {"prompts": 1, "verbose_tokens": 812, "compact_tokens": 301, ...}, ...}
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Literal, Tuple
+
+from pydantic import BaseModel, Field
+
+from orchestra.llm.registry import get_capabilities
+from orchestra.utils.tokens import estimate_tokens
+
+import sys as _sys
+
+VERBOSE = "verbose"
+COMPACT = "compact"
+
+
+class PromptPolicy(BaseModel):
+    """How prompts are rendered"""
+
+    profile: Literal["verbose", "compact"] = Field(VERBOSE, description="Prompt profile")
+    few_shot: bool = Field(False, description="Include few-shot examples in compact prompts")
+    report: bool = Field(False, description="Measure the tokens compact prompts save over verbose ones")
+
+
+_policy = PromptPolicy()
+_report: Dict[str, Dict[str, int]] = {}
+_report_lock = threading.Lock()
+
+
+def get_prompt_policy() -> PromptPolicy:
+    return _policy
+
+
+def set_prompt_policy(policy: PromptPolicy):
+    global _policy
+    _policy = policy
+
+
+def dumps(value: Any, profile: str) -> str:
+    """JSON for a prompt: indented in the verbose profile, minified in the compact one"""
+    if profile == COMPACT:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(value, indent=2)
+
+
+def native_tool_calling(model: str) -> bool:
+    """Whether the provider serving `model` receives the response schema as a native tool"""
+    try:
+        return get_capabilities(model).tool_calling
+    except ValueError:
+        return False
+
+
+def render(name: str, builder: Callable[[str], Tuple[str, str]]) -> Tuple[str, str]:
+    """
+    Build a prompt in the current profile.
+
+    Args:
+        name: Prompt name used in the report (e.g. "planning")
+        builder: Returns ``(system, user)`` for a given profile
+    """
+    policy = _policy
+    system, user = builder(policy.profile)
+    if policy.profile == COMPACT and policy.report:
+        verbose_system, verbose_user = builder(VERBOSE)
+        _record(name, estimate_tokens(verbose_system) + estimate_tokens(verbose_user), estimate_tokens(system) + estimate_tokens(user))
+    return system, user
+
+
+def _record(name: str, verbose_tokens: int, compact_tokens: int):
+    with _report_lock:
+        entry = _report.setdefault(name, {"prompts": 0, "verbose_tokens": 0, "compact_tokens": 0})
+        entry["prompts"] += 1
+        entry["verbose_tokens"] += verbose_tokens
+        entry["compact_tokens"] += compact_tokens
+
+
+def prompt_report() -> Dict[str, Dict[str, Any]]:
+    """Token estimates per prompt name, with the tokens and share the compact profile saved"""
+    with _report_lock:
+        report = {}
+        for name, entry in _report.items():
+            saved = entry["verbose_tokens"] - entry["compact_tokens"]
+            report[name] = {
+                **entry,
+                "saved_tokens": saved,
+                "saved_ratio": round(saved / entry["verbose_tokens"], 3) if entry["verbose_tokens"] else 0.0,
+            }
+        return report
+
+
+def reset_prompt_report():
+    with _report_lock:
+        _report.clear()
+
+
+prompts = _sys.modules[__name__]
@@ -0,0 +1,232 @@
+"""
+Pooled resources shared by tools.
+
+Tools open connections (databases, HTTP sessions, ...) once in `Tool.setup()` and
+borrow them per call from a `ResourcePool`, instead of reconnecting on every call or
+keeping module-level globals. A pool hands each resource to one caller at a time, so
+concurrent calls of the same tool never share a connection::
+
+    class OrdersTool(Tool):
+        def setup(self):
+            self._db = ResourcePool(lambda: psycopg.connect(DSN), close=lambda c: c.close(), max_size=8)
+
+        def teardown(self):
+            self._db.close()
+
+        def run(self, order_id: str) -> dict:
+            with self._db.lease() as conn:
+                return conn.execute("select ...", (order_id,)).fetchone()
+
+Pools used by several tools can be registered by name with `shared_pool()`. They are
+closed by `orchestra.shutdown()` after every tool has been torn down.
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Dict, Generic, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from orchestra.utils.logger import get_custom_logger
+
+import sys as _sys
+
+logger = get_custom_logger("RESOURCES")
+
+T = TypeVar("T")
+
+
+class ResourcePoolClosedError(RuntimeError):
+    """Raised when acquiring from a closed pool"""
+
+
+class ResourcePool(Generic[T]):
+    """Thread-safe bounded pool of reusable resources, created lazily"""
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        close: Optional[Callable[[T], None]] = None,
+        max_size: int = 8,
+        validate: Optional[Callable[[T], bool]] = None,
+        discard_on: Tuple[Type[BaseException], ...] = (ConnectionError,),
+        name: str = "resource",
+    ):
+        """
+        Args:
+            factory: Creates a new resource
+            close: Closes a resource that leaves the pool
+            max_size: Max resources alive at once; further callers wait
+            validate: Checks an idle resource before it is handed out; failing ones are replaced
+            discard_on: Exceptions raised inside `lease()` that mark the resource as broken
+            name: Name used in logs and stats
+        """
+        self.factory = factory
+        self._close = close
+        self.max_size = max_size
+        self.validate = validate
+        self.discard_on = discard_on
+        self.name = name
+        self.created = 0
+        self._idle: List[T] = []
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _destroy(self, resource: T):
+        if self._close is None:
+            return
+        try:
+            self._close(resource)
+        except Exception as e:
+            logger.warning(f"Closing a '{self.name}' resource failed: {e}")
+
+    def acquire(self, timeout: Optional[float] = None) -> T:
+        """
+        Borrow a resource, creating one if the pool is below `max_size`.
+
+        Raises:
+            TimeoutError: No resource became free within `timeout`
+            ResourcePoolClosedError: The pool was closed
+        """
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: self._closed or self._idle or self._size < self.max_size, timeout=timeout
+                ):
+                    raise TimeoutError(f"No '{self.name}' resource free within {timeout:.2f}s")
+                if self._closed:
+                    raise ResourcePoolClosedError(f"Resource pool '{self.name}' is closed")
+                if self._idle:
+                    resource = self._idle.pop()
+                    create = False
+                else:
+                    # Reserve the slot, then create outside the lock
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            if create:
+                try:
+                    resource = self.factory()
+                except BaseException:
+                    with self._condition:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self.created += 1
+                return resource
+
+            if self.validate is None or self._is_valid(resource):
+                return resource
+            self.release(resource, discard=True)
+
+    def _is_valid(self, resource: T) -> bool:
+        try:
+            return bool(self.validate(resource))
+        except Exception:
+            return False
+
+    def release(self, resource: T, discard: bool = False):
+        """Return a borrowed resource; `discard` closes it instead of keeping it"""
+        with self._condition:
+            self._in_use -= 1
+            keep = not discard and not self._closed
+            if keep:
+                self._idle.append(resource)
+            else:
+                self._size -= 1
+            self._condition.notify()
+        if not keep:
+            self._destroy(resource)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[T]:
+        """Borrow a resource for the duration of a `with` block"""
+        resource = self.acquire(timeout)
+        try:
+            yield resource
+        except self.discard_on:
+            self.release(resource, discard=True)
+            raise
+        except BaseException:
+            self.release(resource)
+            raise
+        self.release(resource)
+
+    @asynccontextmanager
+    async def alease(self, timeout: Optional[float] = None) -> AsyncIterator[T]:
+        """Async variant of `lease`; waiting for a resource does not block the event loop"""
+        resource = await asyncio.to_thread(self.acquire, timeout)
+        try:
+            yield resource
+        except self.discard_on:
+            self.release(resource, discard=True)
+            raise
+        except BaseException:
+            self.release(resource)
+            raise
+        self.release(resource)
+
+    def warm(self, count: Optional[int] = None):
+        """Create resources up front so the first calls do not pay for it"""
+        count = self.max_size if count is None else min(count, self.max_size)
+        resources = [self.acquire() for _ in range(max(0, count - self._size))]
+        for resource in resources:
+            self.release(resource)
+
+    def close(self):
+        """Close idle resources now and borrowed ones when they are released"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for resource in idle:
+            self._destroy(resource)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "created": self.created,
+                "max_size": self.max_size,
+            }
+
+
+_shared: Dict[str, ResourcePool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pool(name: str, factory: Callable[[], T], **kwargs) -> ResourcePool:
+    """The pool registered under `name`, created with `factory` and `kwargs` on first use"""
+    with _shared_lock:
+        pool = _shared.get(name)
+        if pool is None or pool.closed:
+            pool = _shared[name] = ResourcePool(factory, name=name, **kwargs)
+        return pool
+
+
+def close_shared_pools():
+    """Close every pool registered with `shared_pool`, newest first"""
+    with _shared_lock:
+        pools = list(_shared.values())
+        _shared.clear()
+    for pool in reversed(pools):
+        pool.close()
+
+
+def resource_stats() -> Dict[str, Dict]:
+    return {name: pool.stats() for name, pool in list(_shared.items())}
+
+
+resources = _sys.modules[__name__]
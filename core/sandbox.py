@@ -0,0 +1,341 @@
+"""
+Isolated tool runner with hard timeouts and memory limits.
+
+Tools declared with ``execution = "sandbox"`` run in a pool of pre-started worker
+processes instead of the serving process:
+
+- the wall-clock ``timeout`` of a tool is enforced by killing its worker
+- each worker runs under an address-space rlimit (``memory_limit_mb``) and, optionally,
+  a per-invocation CPU-time rlimit (``cpu_seconds``)
+- a worker that is killed, crashes or runs out of memory is replaced automatically
+- failures raise a `SandboxError` whose ``cause`` ("timeout", "memory_limit",
+  "cpu_limit", "crashed", ...) is reported in the agent's TOOL_ERROR event
+
+Unlike the ``process`` execution class, a sandbox worker only runs one call at a time,
+so killing it never affects another call.
+
+Usage::
+
+    set_sandbox_policy(SandboxPolicy(workers=4, memory_limit_mb=512))
+"""
+
+import multiprocessing
+import pickle
+import queue
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import current_cancellation
+from orchestra.core.executor import ToolTimeoutError, _pack_call, _unpack_call
+from orchestra.core.streaming import drain
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are then not enforced
+    resource = None
+
+import sys as _sys
+
+# How often a waiting caller re-checks the run's cancellation token
+_CANCEL_POLL_INTERVAL = 0.05
+
+
+class SandboxError(RuntimeError):
+    """Raised when a sandboxed tool call fails outside the tool's own code"""
+
+    cause = "crashed"
+
+    def __init__(self, message: str, cause: Optional[str] = None):
+        super().__init__(message)
+        if cause is not None:
+            self.cause = cause
+
+
+class SandboxTimeoutError(SandboxError, ToolTimeoutError):
+    """Raised when a sandboxed tool exceeded its timeout and its worker was killed"""
+
+    cause = "timeout"
+
+
+class SandboxMemoryError(SandboxError, MemoryError):
+    """Raised when a sandboxed tool exceeded the worker memory limit"""
+
+    cause = "memory_limit"
+
+
+class SandboxPolicy(BaseModel):
+    """Settings of the sandbox worker pool"""
+
+    workers: int = Field(2, description="Worker processes kept ready")
+    memory_limit_mb: Optional[int] = Field(1024, description="Address-space limit of each worker in MiB")
+    cpu_seconds: Optional[int] = Field(None, description="CPU time a single call may use")
+    max_tasks_per_worker: Optional[int] = Field(None, description="Calls a worker serves before it is replaced")
+    start_method: Optional[str] = Field(None, description="multiprocessing start method; defaults to forkserver, or spawn")
+
+
+def _set_limits(memory_limit_mb: Optional[int]):
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _start_cpu_budget(cpu_seconds: Optional[int]):
+    # RLIMIT_CPU counts the whole process lifetime: move the soft limit past the time used so far
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, memory_limit_mb: Optional[int], cpu_seconds: Optional[int]):
+    """Worker loop: run one pickled tool call at a time and send back the outcome"""
+    _set_limits(memory_limit_mb)
+    while True:
+        try:
+            payload = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+
+        _start_cpu_budget(cpu_seconds)
+        try:
+            tool, arguments = _unpack_call(payload)
+            reply = ("ok", drain(tool.run(**arguments)))
+        except MemoryError as e:
+            reply = ("memory", str(e) or "out of memory")
+        except Exception as e:
+            reply = ("error", e)
+
+        try:
+            data = pickle.dumps(reply, protocol=pickle.HIGHEST_PROTOCOL)
+            if reply[0] == "error":
+                # Exceptions with custom __init__ signatures pickle fine but fail to unpickle
+                pickle.loads(data)
+        except Exception:
+            status, value = reply
+            described = f"{type(value).__name__}: {value}" if status == "error" else f"Unpicklable result of type {type(value).__name__}"
+            data = pickle.dumps(("unpicklable", described))
+        conn.send_bytes(data)
+        if reply[0] == "memory":
+            # The heap may be fragmented or inconsistent; let the pool start a fresh worker
+            return
+
+
+def _exit_cause(exitcode: Optional[int]) -> str:
+    if exitcode == -signal.SIGXCPU:
+        return "cpu_limit"
+    if exitcode == -signal.SIGKILL:
+        return "killed"
+    return "crashed"
+
+
+class _Worker:
+    def __init__(self, context, policy: SandboxPolicy, index: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, policy.memory_limit_mb, policy.cpu_seconds),
+            name=f"orchestra-sandbox-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def stop(self, timeout: float = 2.0):
+        """Let the worker exit on its own (tearing down its tools), killing it if it does not"""
+        self.conn.close()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SandboxPool:
+    """Pool of isolated worker processes running one tool call each at a time"""
+
+    def __init__(self, policy: Optional[SandboxPolicy] = None):
+        self.policy = policy or SandboxPolicy()
+        method = self.policy.start_method
+        if method is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+        self.replaced = 0
+        self.failures: Dict[str, int] = {}
+        self.closed = False
+        for _ in range(self.policy.workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        with self._lock:
+            self._spawned += 1
+            index = self._spawned
+        return _Worker(self._context, self.policy, index)
+
+    def _replace(self, worker: _Worker, cause: Optional[str] = None):
+        worker.kill()
+        with self._lock:
+            self.replaced += 1
+            if cause is not None:
+                self.failures[cause] = self.failures.get(cause, 0) + 1
+        if not self.closed:
+            self._idle.put(self._spawn())
+
+    def _release(self, worker: _Worker):
+        worker.tasks += 1
+        if self.closed:
+            worker.stop()
+        elif self.policy.max_tasks_per_worker is not None and worker.tasks >= self.policy.max_tasks_per_worker:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+
+    def _acquire(self) -> _Worker:
+        token = current_cancellation.get()
+        while True:
+            if self.closed:
+                raise SandboxError("Sandbox pool is closed", cause="closed")
+            if token is not None:
+                token.check()
+            try:
+                return self._idle.get(timeout=_CANCEL_POLL_INTERVAL if token is not None else 1.0)
+            except queue.Empty:
+                continue
+
+    def run(self, tool: Any, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run `tool.run(**arguments)` in a worker.
+
+        Raises:
+            SandboxTimeoutError: The call exceeded `timeout`; its worker was killed
+            SandboxMemoryError: The call exceeded the memory limit
+            SandboxError: The worker died (crash, CPU limit, killed) or its reply could not be decoded
+            ToolArgumentError: The tool or its arguments cannot be pickled
+            RunCancelledError: The current run was cancelled; the worker was killed
+        """
+        payload = _pack_call(tool, arguments)
+
+        token = current_cancellation.get()
+        worker = self._acquire()
+        try:
+            worker.conn.send_bytes(payload)
+        except OSError:
+            # The worker died while idle
+            self._replace(worker, "crashed")
+            return self.run(tool, arguments, timeout)
+
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = _CANCEL_POLL_INTERVAL if token is not None else None
+            if end is not None:
+                remaining = max(0.0, end - time.monotonic())
+                step = remaining if step is None else min(step, remaining)
+            if worker.conn.poll(step):
+                break
+            if token is not None and token.done:
+                self._replace(worker)
+                token.check()
+            if end is not None and time.monotonic() >= end:
+                self._replace(worker, "timeout")
+                raise SandboxTimeoutError(f"Tool '{tool.name}' did not finish within {timeout:.2f}s; its worker was killed")
+
+        try:
+            data = worker.conn.recv_bytes()
+        except (EOFError, OSError):
+            worker.process.join(timeout=5)
+            cause = _exit_cause(worker.process.exitcode)
+            self._replace(worker, cause)
+            raise SandboxError(
+                f"Sandbox worker running tool '{tool.name}' died (exit code {worker.process.exitcode})", cause=cause
+            )
+
+        try:
+            status, value = pickle.loads(data)
+        except Exception as e:
+            # The worker's state is unknown after a reply we cannot read; never hand it out again
+            self._replace(worker, "unpicklable")
+            raise SandboxError(f"Reply of tool '{tool.name}' could not be decoded: {e}", cause="unpicklable") from e
+
+        if status == "memory":
+            self._replace(worker, "memory_limit")
+            raise SandboxMemoryError(f"Tool '{tool.name}' exceeded the sandbox memory limit: {value}")
+
+        self._release(worker)
+        if status == "ok":
+            return value
+        if status == "error":
+            raise value
+        raise SandboxError(f"Tool '{tool.name}' failed: {value}", cause="unpicklable")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.policy.workers,
+                "idle": self._idle.qsize(),
+                "replaced": self.replaced,
+                "failures": dict(self.failures),
+            }
+
+    def close(self):
+        """Stop every idle worker; busy ones are stopped when their call returns"""
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_policy = SandboxPolicy()
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_policy() -> SandboxPolicy:
+    return _policy
+
+
+def set_sandbox_policy(policy: SandboxPolicy):
+    """Replace the sandbox policy; the current pool is closed and recreated on next use"""
+    global _policy
+    shutdown()
+    _policy = policy
+
+
+def get_sandbox() -> SandboxPool:
+    """The shared sandbox pool, started on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SandboxPool(_policy)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+sandbox = _sys.modules[__name__]
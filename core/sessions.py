@@ -0,0 +1,299 @@
+"""
+Session store for `OrchestraContext`.
+
+A `SessionStore` keeps the contexts of recently active sessions in an LRU cache in
+front of an optional persistent backend (`SQLiteSessionBackend`):
+
+- sessions are loaded lazily on first use, and only the recent ``window`` of messages
+  that the rolling summary does not already cover is fetched
+- new messages are written behind: a background thread persists them in batches
+  every ``flush_interval`` seconds (or once ``batch_size`` are pending), together with
+  the session's rolling summary
+- sessions beyond ``max_sessions`` or idle for ``idle_seconds`` are flushed and evicted,
+  and messages already folded into the summary are dropped from memory, so memory per
+  worker stays bounded however many sessions exist
+
+Because everything a session needs is in the backend, any worker process sharing the
+database can pick a session up; call `release()` (or `flush()`) on the worker that
+served it last. Without a backend, evicted sessions are lost.
+
+Usage::
+
+    sessions = SessionStore(SQLiteSessionBackend("sessions.db"))
+    context = sessions.get("user-42")
+    sessions.append("user-42", MessageRole.USER, query)
+    answer = run(query, agents, chat_history=context)
+    sessions.append("user-42", MessageRole.ASSISTANT, answer)
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from orchestra.core.context import ChatMessage, MessageRole, OrchestraContext
+
+import sys as _sys
+
+# (session_id, seq, role, content, timestamp)
+_Row = Tuple[str, int, str, str, float]
+
+
+class SessionBackend:
+    """Persistent storage of session messages and summaries"""
+
+    def load(self, session_id: str, window: int) -> Tuple[List[ChatMessage], str, int]:
+        """
+        The session's summary and the messages after it, at most the last `window`.
+
+        Returns:
+            (messages, summary, seq of the first returned message)
+        """
+        raise NotImplementedError
+
+    def save(self, rows: List[_Row], summaries: Dict[str, Tuple[str, int]]):
+        """Persist messages and ``session_id -> (summary, seq of the first unsummarized message)``"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Embedded SQLite backend; a file in WAL mode can be shared by worker processes"""
+
+    def __init__(self, path: str = "orchestra_sessions.db"):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+                "content TEXT NOT NULL, timestamp REAL NOT NULL, PRIMARY KEY (session_id, seq))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, summarized_seq INTEGER NOT NULL)"
+            )
+
+    def load(self, session_id: str, window: int) -> Tuple[List[ChatMessage], str, int]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT summary, summarized_seq FROM summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            summary, start = row if row else ("", 0)
+            rows = self._connection.execute(
+                "SELECT seq, role, content, timestamp FROM messages WHERE session_id = ? AND seq >= ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, start, window),
+            ).fetchall()
+        rows.reverse()
+        messages = [ChatMessage(role=role, content=content, timestamp=timestamp) for _, role, content, timestamp in rows]
+        return messages, summary, rows[0][0] if rows else start
+
+    def save(self, rows: List[_Row], summaries: Dict[str, Tuple[str, int]]):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO summaries (session_id, summary, summarized_seq) VALUES (?, ?, ?)",
+                    [(session_id, summary, seq) for session_id, (summary, seq) in summaries.items()],
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._connection.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class _Session:
+    def __init__(self, context: OrchestraContext, base_seq: int, summary: str):
+        self.context = context
+        # seq of context.history[0] and how many history entries are persisted
+        self.base_seq = base_seq
+        self.saved = len(context.history)
+        self.saved_summary = (summary, base_seq)
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """LRU cache of session contexts with lazy loading and write-behind persistence"""
+
+    def __init__(
+        self,
+        backend: Optional[SessionBackend] = None,
+        max_sessions: int = 1000,
+        idle_seconds: Optional[float] = 900.0,
+        window: int = 50,
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+    ):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.window = window
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+    def get(self, session_id: str) -> OrchestraContext:
+        """The session's context, loaded from the backend on first use"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._load(session_id)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            self._compact(session)
+            self._evict()
+            return session.context
+
+    def _load(self, session_id: str) -> _Session:
+        context = OrchestraContext(session_id=session_id)
+        if self.backend is None:
+            return _Session(context, 0, "")
+        messages, summary, base_seq = self.backend.load(session_id, self.window)
+        context.restore(messages, summary)
+        return _Session(context, base_seq, summary)
+
+    def append(self, session_id: str, role: MessageRole, content: str) -> OrchestraContext:
+        """Add a message to the session; it is persisted by the next background flush"""
+        context = self.get(session_id)
+        context.add_message(role, content)
+        with self._lock:
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._wake.set()
+        self._start_writer()
+        return context
+
+    def _compact(self, session: _Session):
+        """Drop persisted messages already covered by the summary. Lock held."""
+        dropped = session.context.compact(session.saved)
+        session.base_seq += dropped
+        session.saved -= dropped
+
+    def _evict(self):
+        """Flush and drop sessions beyond ``max_sessions`` or idle too long. Lock held."""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            idle = self.idle_seconds is not None and now - session.last_used >= self.idle_seconds
+            if len(self._sessions) <= self.max_sessions and not idle:
+                break
+            self._persist([(session_id, session)])
+            del self._sessions[session_id]
+
+    def _collect(self, sessions: List[Tuple[str, _Session]]) -> Tuple[List[_Row], Dict[str, Tuple[str, int]], list]:
+        rows: List[_Row] = []
+        summaries: Dict[str, Tuple[str, int]] = {}
+        updates = []
+        for session_id, session in sessions:
+            history = session.context.history
+            end = len(history)
+            for index in range(session.saved, end):
+                message = history[index]
+                rows.append((session_id, session.base_seq + index, MessageRole(message.role).value, message.content, message.timestamp))
+            summary = (session.context.summary, session.base_seq + session.context.summarized)
+            if summary != session.saved_summary:
+                summaries[session_id] = summary
+            if end != session.saved or session_id in summaries:
+                updates.append((session, end, summary))
+        return rows, summaries, updates
+
+    def _persist(self, sessions: List[Tuple[str, _Session]]):
+        """Write unsaved messages and summaries of `sessions`. Lock held."""
+        if self.backend is None:
+            return
+        rows, summaries, updates = self._collect(sessions)
+        if not rows and not summaries:
+            return
+        self.backend.save(rows, summaries)
+        for session, saved, summary in updates:
+            session.saved = saved
+            session.saved_summary = summary
+
+    def flush(self):
+        """Persist every pending message now"""
+        with self._lock:
+            self._persist(list(self._sessions.items()))
+            self._pending = 0
+            self._evict()
+
+    def release(self, session_id: str):
+        """Persist and drop a session from memory, e.g. before another worker takes it over"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._persist([(session_id, session)])
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if self.backend is not None:
+                self.backend.delete(session_id)
+
+    def _start_writer(self):
+        if self._writer is not None or self.backend is None:
+            return
+        with self._lock:
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._write_behind, name="orchestra-sessions", daemon=True)
+                self._writer.start()
+
+    def _write_behind(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Flush, stop the writer and close the backend"""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        with self._lock:
+            self._sessions.clear()
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "messages": sum(len(session.context.history) for session in self._sessions.values()),
+                "pending": sum(len(session.context.history) - session.saved for session in self._sessions.values()),
+            }
+
+
+sessions = _sys.modules[__name__]
@@ -0,0 +1,175 @@
+"""
+Streaming tool results.
+
+A tool's `run()` may return a generator or an async iterator instead of a single value
+(a log scan, a paginated API read, ...). `ToolAgent.execute()` then consumes it chunk by
+chunk:
+
+- every chunk is forwarded as a TOOL_CHUNK event as soon as it is produced, so event
+  subscribers can start processing before the tool has finished
+- chunks are collected into a bounded `ChunkBuffer` that becomes the step result; once
+  ``max_chunks`` or ``max_bytes`` is reached further chunks are only forwarded, and the
+  result is flagged as truncated
+- the run's cancellation token and the tool's ``timeout`` are checked between chunks
+
+Streams are consumed in the calling thread for inline and thread tools. Process and
+sandbox workers cannot send a generator back, so they drain it into a list first.
+
+Usage::
+
+    class ScanLogs(Tool):
+        name: str = "scan_logs"
+        description: str = "Find matching log lines"
+
+        def run(self, pattern: str):
+            for line in open("/var/log/app.log"):
+                if pattern in line:
+                    yield line
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import check_cancelled
+from orchestra.core.events import events, Event, EventType
+
+import sys as _sys
+
+
+class StreamPolicy(BaseModel):
+    """Bounds of the buffer collecting a streamed tool result"""
+
+    max_chunks: int = Field(10_000, description="Chunks kept for the step result")
+    max_bytes: int = Field(1 << 20, description="Approximate size of the kept chunks in bytes")
+    emit_chunks: bool = Field(True, description="Forward every chunk as a TOOL_CHUNK event")
+
+
+_policy = StreamPolicy()
+
+
+def get_stream_policy() -> StreamPolicy:
+    return _policy
+
+
+def set_stream_policy(policy: StreamPolicy):
+    global _policy
+    _policy = policy
+
+
+def is_stream(value: Any) -> bool:
+    """Whether a tool result is a generator or an async iterator to be consumed incrementally"""
+    return inspect.isgenerator(value) or inspect.isasyncgen(value) or hasattr(value, "__aiter__")
+
+
+def _chunk_size(chunk: Any) -> int:
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        return len(chunk)
+    if isinstance(chunk, str):
+        return len(chunk.encode("utf-8", errors="replace"))
+    return len(repr(chunk))
+
+
+class ChunkBuffer:
+    """Keeps the first chunks of a stream, up to a chunk count and size"""
+
+    def __init__(self, max_chunks: int, max_bytes: int):
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.chunks: List[Any] = []
+        self.size = 0
+        self.total_chunks = 0
+        self.truncated = False
+
+    def add(self, chunk: Any):
+        self.total_chunks += 1
+        if self.truncated:
+            return
+        size = _chunk_size(chunk)
+        if len(self.chunks) >= self.max_chunks or self.size + size > self.max_bytes:
+            self.truncated = True
+            return
+        self.chunks.append(chunk)
+        self.size += size
+
+    def result(self) -> Any:
+        """The kept chunks, joined when they are all text or all bytes"""
+        if self.chunks and all(isinstance(chunk, str) for chunk in self.chunks):
+            return "".join(self.chunks)
+        if self.chunks and all(isinstance(chunk, (bytes, bytearray)) for chunk in self.chunks):
+            return b"".join(self.chunks)
+        return list(self.chunks)
+
+
+def _iterate_async(stream: AsyncIterator) -> Iterator[Any]:
+    # Agents run in worker threads without an event loop; drive the iterator on a private one
+    loop = asyncio.new_event_loop()
+    iterator = stream.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            loop.run_until_complete(close())
+        loop.close()
+
+
+def iterate(stream: Any) -> Iterator[Any]:
+    """Iterate a sync or async stream synchronously"""
+    if inspect.isasyncgen(stream) or hasattr(stream, "__aiter__"):
+        return _iterate_async(stream)
+    return iter(stream)
+
+
+def drain(value: Any) -> Any:
+    """A stream's chunks as a list (used where a generator cannot be passed on); other values unchanged"""
+    return list(iterate(value)) if is_stream(value) else value
+
+
+def collect_stream(
+    stream: Any,
+    tool_name: str,
+    source: str,
+    timeout: Optional[float] = None,
+    policy: Optional[StreamPolicy] = None,
+) -> ChunkBuffer:
+    """
+    Consume a streamed tool result, forwarding each chunk as a TOOL_CHUNK event.
+
+    Raises:
+        ToolTimeoutError: The stream was still producing after `timeout` seconds
+        RunCancelledError: The current run was cancelled between two chunks
+    """
+    from orchestra.core.executor import ToolTimeoutError
+
+    policy = policy or _policy
+    buffer = ChunkBuffer(policy.max_chunks, policy.max_bytes)
+    end = None if timeout is None else time.monotonic() + timeout
+    chunks = iterate(stream)
+    try:
+        for index, chunk in enumerate(chunks):
+            buffer.add(chunk)
+            if policy.emit_chunks:
+                events.emit(Event(
+                    type=EventType.TOOL_CHUNK,
+                    source=source,
+                    data={"tool": tool_name, "index": index, "chunk": chunk}
+                ))
+            check_cancelled()
+            if end is not None and time.monotonic() >= end:
+                raise ToolTimeoutError(f"Tool '{tool_name}' did not finish streaming within {timeout:.2f}s")
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    return buffer
+
+
+streaming = _sys.modules[__name__]
@@ -0,0 +1,132 @@
+"""
+Map-reduce synthesis for plans with many or large results.
+
+`generate_final_answer` puts every step result into a single synthesis prompt. When the
+estimated size of the results exceeds ``max_prompt_tokens`` they are condensed first:
+
+- map: results are grouped into chunks of at most ``chunk_tokens`` (a single oversized
+  result is split) and every chunk is summarized by its own model call, up to
+  ``max_parallel`` at a time
+- reduce: the summaries replace the results; if they are still too large, they are
+  grouped and summarized again, for at most ``max_rounds`` rounds
+
+The final answer is then synthesized from the condensed results as usual, so synthesis
+latency grows with the number of rounds rather than with the size of the results.
+``mode`` forces single-shot or map-reduce synthesis instead of choosing by size.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.llm.base import model_invoke
+from orchestra.utils.tokens import estimate_tokens, estimate_total, truncate_to_tokens
+
+import sys as _sys
+
+MAP_STAGE = "synthesis_map"
+
+
+class SynthesisPolicy(BaseModel):
+    """When and how step results are condensed before the final synthesis"""
+
+    mode: Literal["auto", "single", "map_reduce"] = Field("auto", description="auto picks map-reduce by prompt size")
+    max_prompt_tokens: int = Field(6000, description="Estimated result tokens above which auto mode condenses them")
+    chunk_tokens: int = Field(2000, description="Token budget of the results summarized by one map call")
+    summary_tokens: int = Field(300, description="Token budget asked of each chunk summary")
+    max_parallel: int = Field(4, description="Map calls running at once")
+    max_rounds: int = Field(3, description="Reduce rounds before the remaining text is cut to fit")
+
+
+_policy = SynthesisPolicy()
+
+
+def get_synthesis_policy() -> SynthesisPolicy:
+    return _policy
+
+
+def set_synthesis_policy(policy: SynthesisPolicy):
+    global _policy
+    _policy = policy
+
+
+def _split(entry: str, chunk_tokens: int) -> List[str]:
+    size = chunk_tokens * 4
+    return [entry[i:i + size] for i in range(0, len(entry), size)] or [entry]
+
+
+def plan_chunks(entries: List[str], chunk_tokens: int) -> List[str]:
+    """Group entries, in order, into chunks of at most `chunk_tokens` estimated tokens"""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for entry in entries:
+        for piece in _split(entry, chunk_tokens) if estimate_tokens(entry) > chunk_tokens else [entry]:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > chunk_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _summarize(message: str, chunk: str, summary_tokens: int) -> str:
+    system = (
+        "You condense intermediate task results for a later answer to the user's request. "
+        "Keep every fact, number, name and failure that could matter for the request; drop repetition and formatting. "
+        f"Answer in at most {summary_tokens * 3 // 4} words."
+    )
+    user_message = f"Original Request: {message}\n\nTask Results:\n{chunk}"
+    response = model_invoke(system, user_message, None, stage=MAP_STAGE)
+    summary = response["content"] if isinstance(response, dict) else response
+    return truncate_to_tokens(str(summary), summary_tokens * 2)
+
+
+def map_summaries(message: str, chunks: List[str], policy: SynthesisPolicy) -> List[str]:
+    """Summarize chunks in parallel, keeping their order"""
+    if len(chunks) == 1:
+        return [_summarize(message, chunks[0], policy.summary_tokens)]
+    with ThreadPoolExecutor(max_workers=max(1, policy.max_parallel), thread_name_prefix="orchestra-synthesis") as pool:
+        # Each call keeps the run's context (run id, usage, cancellation)
+        futures = [
+            pool.submit(contextvars.copy_context().run, _summarize, message, chunk, policy.summary_tokens)
+            for chunk in chunks
+        ]
+        return [future.result() for future in futures]
+
+
+def needs_condensing(entries: List[str], policy: Optional[SynthesisPolicy] = None) -> bool:
+    policy = policy or _policy
+    if policy.mode == "single":
+        return False
+    if policy.mode == "map_reduce":
+        return len(entries) > 1 or estimate_total(entries) > policy.chunk_tokens
+    return estimate_total(entries) > policy.max_prompt_tokens
+
+
+def condense(message: str, entries: List[str], policy: Optional[SynthesisPolicy] = None) -> List[str]:
+    """Summarize result entries until they fit ``max_prompt_tokens`` (see module docstring)"""
+    policy = policy or _policy
+    if not needs_condensing(entries, policy):
+        return entries
+
+    rounds = 0
+    while rounds < policy.max_rounds:
+        chunks = plan_chunks(entries, policy.chunk_tokens)
+        entries = [f"Summary of results part {i}: {summary}" for i, summary in enumerate(map_summaries(message, chunks, policy), 1)]
+        rounds += 1
+        if estimate_total(entries) <= policy.max_prompt_tokens or len(chunks) == 1:
+            break
+
+    if estimate_total(entries) > policy.max_prompt_tokens:
+        per_entry = max(1, policy.max_prompt_tokens // max(1, len(entries)))
+        entries = [truncate_to_tokens(entry, per_entry) for entry in entries]
+    return entries
+
+
+synthesis = _sys.modules[__name__]
@@ -1,12 +1,17 @@
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 from pydantic import BaseModel
 
 from .agent import AgentTask, BaseAgent
+from orchestra.core.cancellation import RunCancelledError, current_cancellation
+from orchestra.core.catalog import shortlist_agents
 from orchestra.core.events import events, Event, EventType
-from orchestra.core.context import ChatMessage
+from orchestra.core.context import ChatMessage, OrchestraContext, render_history
+from orchestra.core.prompts import COMPACT, dumps, get_prompt_policy, native_tool_calling, render
+from orchestra.core.synthesis import condense
 from orchestra.llm.base import model_invoke
+from orchestra.llm.stages import stage_model
 from orchestra.utils.logger import get_custom_logger
 import sys as _sys
 
@@ -65,36 +70,23 @@ class TaskList(BaseModel):
     steps: List[Task]
 
 
-def generate(user_message: str, agent_list: List[BaseAgent], history: Optional[List[ChatMessage]] = None) -> TaskList:
-    events.emit(Event(
-        type=EventType.TASK_GENERATION_START,
-        source="task_manager",
-        data={"query": user_message}
-    ))
+def _planning_prompt(
+    profile: str, user_message: str, candidates: List[BaseAgent], history_context: str, model: str
+) -> Tuple[str, str]:
+    if profile == COMPACT:
+        return _compact_planning_prompt(user_message, candidates, history_context, model)
 
     agents_available = "\n".join(
         [
             f"- **Name**: `{agent.name}`\n  **Description**: {agent.description}"
-            for agent in agent_list
+            for agent in candidates
         ]
     )
-    
-    history_context = ""
-    if history:
-        # Simple format for now
-        formatted = []
-        # Use last 10 messages for context
-        for msg in history[-10:]: 
-            role = "User" if msg.role == "user" else "Assistant"
-            formatted.append(f"{role}: {msg.content}")
-        history_context = "\nPrevious Conversation History:\n" + "\n".join(formatted) + "\n"
 
     system = f"""
                 You are an intelligent assistant responsible for routing queries to the appropriate agents.
                 When a query is simple and can be handled by a single agent, route it directly to that agent with the necessary task information.
                 
-                {history_context}
-                
                 For complex queries that require multiple steps or involve multiple agents:
                 - Identify each step needed to complete the query. Each step should be a distinct task with a specific goal.
                 - Assign a unique `step_number` to each task, starting from 1, indicating the order of execution.
@@ -134,10 +126,100 @@ def generate(user_message: str, agent_list: List[BaseAgent], history: Optional[L
                 Available agents:
                 {agents_available}
                 """
+    return system, _planning_user_message(user_message, history_context)
+
+
+def _planning_user_message(user_message: str, history_context: str) -> str:
+    # Per-request content goes last so consecutive prompts share the static prefix (KV cache reuse)
+    if not history_context:
+        return user_message
+    return f"{history_context.strip()}\n\nCurrent Query:\n{user_message}"
+
+
+_PLANNING_EXAMPLE = [
+    {
+        "step_number": 1,
+        "task": "Fetch the current weather for New York City",
+        "agent": "weather_agent",
+        "expected_output": "Current weather conditions in New York City",
+        "is_async": False,
+    },
+    {
+        "step_number": 2,
+        "task": "Add 'Buy groceries' to the user's to-do list",
+        "agent": "todo_agent",
+        "expected_output": "Confirmation that 'Buy groceries' was added to the to-do list",
+        "is_async": True,
+    },
+]
+
+
+def _compact_planning_prompt(
+    user_message: str, candidates: List[BaseAgent], history_context: str, model: str
+) -> Tuple[str, str]:
+    lines = [
+        "Route the user's query to the available agents as numbered steps (from 1, in execution order).",
+        "Use one step for a simple query; otherwise one step per distinct sub-task, splitting complex tasks further.",
+        "Per step: a detailed `task`, the best `agent`, the `expected_output`, and `is_async`=true if it does not need earlier steps.",
+    ]
+    if not native_tool_calling(model):
+        lines.append('Answer as JSON: {"steps":[{"step_number":int,"task":str,"agent":str,"expected_output":str,"is_async":bool}]}')
+    if get_prompt_policy().few_shot:
+        lines.append("Example steps: " + dumps(_PLANNING_EXAMPLE, COMPACT))
+    lines.append("Agents:")
+    lines.extend(f"- {agent.name}: {agent.description}" for agent in candidates)
+    return "\n".join(lines), _planning_user_message(user_message, history_context)
+
+
+def _plan_validator(agent_list: List[BaseAgent]):
+    """Cascade check of a planning response: a valid, non-empty `TaskList` naming known agents"""
+    known = {_normalize_agent_name(agent.name) for agent in agent_list} | {agent.name.lower() for agent in agent_list}
+
+    def validate(response) -> Optional[str]:
+        steps = response.get("steps") if isinstance(response, dict) else None
+        try:
+            if isinstance(steps, str):
+                steps = json.loads(steps)
+            plan = TaskList.model_validate({"steps": steps})
+        except (ValueError, TypeError):
+            return "invalid_schema"
+        if not plan.steps:
+            return "empty_plan"
+        if any(_normalize_agent_name(step.agent) not in known for step in plan.steps):
+            return "unknown_agent"
+        return None
+
+    return validate
+
+
+def generate(
+    user_message: str,
+    agent_list: List[BaseAgent],
+    history: Optional[Union[List[ChatMessage], OrchestraContext]] = None,
+) -> TaskList:
+    # Large catalogs are cut down to the agents that best match the query
+    candidates = shortlist_agents(user_message, agent_list)
+
+    events.emit(Event(
+        type=EventType.TASK_GENERATION_START,
+        source="task_manager",
+        data={"query": user_message, "agents": [agent.name for agent in candidates]}
+    ))
+
+    history_context = ""
+    if history:
+        # Packed by token budget; a session context also carries a rolling summary of older turns
+        history_context = "\nPrevious Conversation History:\n" + render_history(history) + "\n"
+
+    system, prompt = render(
+        "planning", lambda profile: _planning_prompt(profile, user_message, candidates, history_context, stage_model("planning"))
+    )
 
     # logger.info(f"Sending task generation request with message: {user_message}")
 
-    response = model_invoke(system, user_message, tasks_payload)
+    response = model_invoke(
+        system, prompt, tasks_payload, stage="planning", validator=_plan_validator(agent_list), cascade_key="planner"
+    )
     # logger.info(f"Generation response: {response}")
 
     # Handle both string and dict responses
@@ -161,31 +243,51 @@ def generate(user_message: str, agent_list: List[BaseAgent], history: Optional[L
     return tasks_list
 
 
+def _normalize_agent_name(name: str) -> str:
+    """Normalize agent name by converting to lowercase and replacing spaces with underscores"""
+    return name.lower().replace(" ", "_").replace("-", "_")
+
+
 def route(task_list: TaskList, agent_list: List[BaseAgent]) -> List[Dict]:
     results = []
 
     available_agents = {}
 
-    def normalize_agent_name(name: str) -> str:
-        """Normalize agent name by converting to lowercase and replacing spaces with underscores"""
-        return name.lower().replace(" ", "_").replace("-", "_")
-
     for agent in agent_list:
-        normalized_name = normalize_agent_name(agent.name)
+        normalized_name = _normalize_agent_name(agent.name)
         available_agents[normalized_name] = agent
         # Also add the original lowercase name for backward compatibility
         available_agents[agent.name.lower()] = agent
 
     # logger.info(f"Available agents: {available_agents}")
 
+    token = current_cancellation.get()
+
     for task in task_list.steps:
+        if token is not None and token.done:
+            # Steps that have not started are skipped once the run is cancelled or out of time
+            events.emit(Event(
+                type=EventType.TASK_CANCELLED,
+                source="orchestra_router",
+                data={"step": task.step_number, "status": token.status, "started": False}
+            ))
+            results.append(
+                {
+                    "step": task.step_number,
+                    "status": token.status,
+                    "result": "None",
+                    "message": "Step skipped: run cancelled" if token.cancelled else "Step skipped: deadline exceeded",
+                }
+            )
+            continue
+
         events.emit(Event(
             type=EventType.TASK_START,
             source="orchestra_router",
             data={"step": task.step_number, "task": task.task, "agent": task.agent}
         ))
 
-        target_agent_name = normalize_agent_name(task.agent)
+        target_agent_name = _normalize_agent_name(task.agent)
 
         if target_agent_name not in available_agents.keys():
             error_msg = f"Agent '{target_agent_name}' not found in agent list"
@@ -224,6 +326,20 @@ def route(task_list: TaskList, agent_list: List[BaseAgent]) -> List[Dict]:
                     "is_async": task.is_async,
                 }
             )
+        except RunCancelledError as e:
+            events.emit(Event(
+                type=EventType.TASK_CANCELLED,
+                source="orchestra_router",
+                data={"step": task.step_number, "status": e.status, "started": True, "error": str(e)}
+            ))
+            results.append(
+                {
+                    "step": task.step_number,
+                    "status": e.status,
+                    "result": "None",
+                    "message": f"Step interrupted: {e}",
+                }
+            )
         except Exception as e:
             events.emit(Event(
                 type=EventType.TASK_ERROR,
@@ -244,8 +360,11 @@ def route(task_list: TaskList, agent_list: List[BaseAgent]) -> List[Dict]:
     return results
 
 
-def generate_final_answer(message: str, results: List[Dict]) -> str:
-    # Format results for the LLM
+def _format_results(results: List[Dict]) -> str:
+    return "\n".join(_format_result_entries(results))
+
+
+def _format_result_entries(results: List[Dict]) -> List[str]:
     formatted_results = []
     for result in results:
         status = result.get("status", "unknown")
@@ -255,12 +374,24 @@ def generate_final_answer(message: str, results: List[Dict]) -> str:
             formatted_results.append(
                 f"Task {step}: Success - {result.get('result', {})}"
             )
+        elif status in ("cancelled", "timeout"):
+            formatted_results.append(
+                f"Task {step}: Not completed ({status}) - {result.get('message', '')}"
+            )
         else:
             formatted_results.append(
                 f"Task {step}: Failed - {result.get('message', 'Unknown error')}"
             )
+    return formatted_results
 
-    results_str = "\n".join(formatted_results)
+
+def _synthesis_prompt(profile: str, message: str, results_str: str) -> Tuple[str, str]:
+    if profile == COMPACT:
+        system = (
+            "Combine the task results into one clear, concise, conversational answer to the user's original request. "
+            "If a task failed, say so and use the information that is available."
+        )
+        return system, f"Original Request: {message}\nTask Results:\n{results_str}"
 
     system = """
     You are an intelligent assistant tasked with synthesizing results from multiple tasks into a clear, concise final answer.
@@ -284,10 +415,26 @@ def generate_final_answer(message: str, results: List[Dict]) -> str:
     
     Please provide a natural response that synthesizes these results.
     """
+    return system, user_message
+
+
+def generate_final_answer(message: str, results: List[Dict]) -> str:
+    # Format results for the LLM; many or large results are summarized in parallel first
+    results_str = "\n".join(condense(message, _format_result_entries(results)))
 
-    response = model_invoke(system, user_message, None)
+    system, user_message = render("synthesis", lambda profile: _synthesis_prompt(profile, message, results_str))
+
+    response = model_invoke(system, user_message, None, stage="synthesis")
     return response["content"] if isinstance(response, dict) else response
 
+
+def generate_partial_answer(results: List[Dict], status: str) -> str:
+    """Answer for a run that was cancelled or timed out, built without calling the model"""
+    header = "The request timed out" if status == "timeout" else "The request was cancelled"
+    if not results:
+        return f"{header} before any task was completed."
+    return f"{header}. Partial results:\n{_format_results(results)}"
+
 # Expose the current module under the name `task` so that other modules can import it as
 # `from orchestra.core.task import task` and access its functions (e.g., task.generate()).
 
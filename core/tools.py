@@ -1,24 +1,192 @@
+import asyncio
 import inspect
-from typing import Any, Dict, Optional, get_type_hints
+import threading
+from typing import Any, Dict, List, Literal, Optional, Type, get_type_hints
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError, create_model
 from typing_extensions import get_args, get_origin
 
+from orchestra.utils.logger import get_custom_logger
+
 import sys as _sys
 
+logger = get_custom_logger("TOOLS")
+
+
+class InvalidToolArgumentsError(ValueError):
+    """Raised when a tool call's arguments do not match the tool's run() signature"""
+
+    cause = "invalid_arguments"
+
+    def __init__(self, tool_name: str, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"Invalid arguments for tool '{tool_name}': " + "; ".join(errors))
+
+
+# run() function -> compiled argument model (None: arguments are passed through unchecked)
+_validators: Dict[Any, Optional[Type[BaseModel]]] = {}
+_validators_lock = threading.Lock()
+
+
+def _compile_arguments(run) -> Optional[Type[BaseModel]]:
+    """A pydantic model of run()'s keyword arguments; unknown keys are rejected unless run() takes **kwargs"""
+    signature = inspect.signature(run)
+    type_hints = get_type_hints(run)
+    fields = {}
+    extra = "forbid"
+    for name, param in signature.parameters.items():
+        if name == "self" or param.kind is inspect.Parameter.VAR_POSITIONAL:
+            continue
+        if param.kind is inspect.Parameter.VAR_KEYWORD:
+            extra = "allow"
+            continue
+        default = ... if param.default is inspect.Parameter.empty else param.default
+        # Fields are positional names aliased to the parameter, so names like "json" or "_id" work
+        fields[f"p{len(fields)}"] = (type_hints.get(name, Any), Field(default, alias=name))
+    if not fields and extra == "allow":
+        return None
+    config = ConfigDict(
+        extra=extra, arbitrary_types_allowed=True, coerce_numbers_to_str=True, protected_namespaces=()
+    )
+    try:
+        return create_model(f"{run.__qualname__}.arguments", __config__=config, **fields)
+    except Exception as e:
+        # e.g. parameter names pydantic cannot use as fields
+        logger.warning(f"Arguments of {run.__qualname__} are not validated: {e}")
+        return None
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    messages = []
+    for item in error.errors():
+        location = ".".join(str(part) for part in item["loc"]) or "arguments"
+        message = "unexpected argument" if item["type"] == "extra_forbidden" else item["msg"]
+        messages.append(f"{location}: {message}")
+    return messages
+
 
 class BaseTool(BaseModel):
     name: str = Field(..., description="Tool name")
     description: str = Field(..., description="Tool description")
 
 
+# Tools set up in this process, in setup order; torn down in reverse by `teardown_tools`
+_started: List["Tool"] = []
+# id(tool) -> event set when the setup running for that tool finishes
+_setting_up: Dict[int, threading.Event] = {}
+_lifecycle_lock = threading.RLock()
+
+
 class Tool(BaseTool):
     """Base class for all tools with automatic parameter extraction"""
 
+    execution: Literal["inline", "thread", "process", "sandbox"] = Field(
+        "inline", description="Where run() executes: inline, thread, process or sandbox (see core.executor)"
+    )
+    timeout: Optional[float] = Field(None, description="Max seconds a thread, process or sandbox tool may run")
+    idempotent: bool = Field(False, description="Safe to run again if its process worker died mid-call")
+
+    _setup_done: bool = PrivateAttr(False)
+
     def run(self, **kwargs) -> Any:
         """Method to be implemented by concrete tools"""
         raise NotImplementedError
 
+    def setup(self) -> None:
+        """Open resources used by run(); called once per process before the first call"""
+
+    def teardown(self) -> None:
+        """Release what setup() opened; called once at shutdown"""
+
+    async def asetup(self) -> None:
+        """Async variant of setup(), used by `orchestra.astartup()`; runs setup() in a thread by default"""
+        await asyncio.to_thread(self.setup)
+
+    async def ateardown(self) -> None:
+        """Async variant of teardown(), used by `orchestra.ashutdown()`"""
+        await asyncio.to_thread(self.teardown)
+
+    @property
+    def is_setup(self) -> bool:
+        return self._setup_done
+
+    def _claim_setup(self) -> Optional[threading.Event]:
+        """None if the caller must run setup now, otherwise an event to wait for"""
+        with _lifecycle_lock:
+            running = _setting_up.get(id(self))
+            if running is not None or self._setup_done:
+                return running
+            _setting_up[id(self)] = threading.Event()
+            return None
+
+    def _finish_setup(self, succeeded: bool):
+        with _lifecycle_lock:
+            if succeeded:
+                self._setup_done = True
+                _started.append(self)
+            _setting_up.pop(id(self)).set()
+
+    def ensure_setup(self):
+        """Run setup() unless it already ran (or is running) for this instance"""
+        while not self._setup_done:
+            running = self._claim_setup()
+            if running is not None:
+                # Another caller is setting the tool up; retry if its setup failed
+                running.wait()
+                continue
+            if self._setup_done:
+                return
+            succeeded = False
+            try:
+                self.setup()
+                succeeded = True
+            finally:
+                self._finish_setup(succeeded)
+
+    async def aensure_setup(self):
+        """Run asetup() unless the tool was already set up (or is being set up)"""
+        while not self._setup_done:
+            running = self._claim_setup()
+            if running is not None:
+                await asyncio.to_thread(running.wait)
+                continue
+            if self._setup_done:
+                return
+            succeeded = False
+            try:
+                await self.asetup()
+                succeeded = True
+            finally:
+                self._finish_setup(succeeded)
+
+    def validate_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check arguments for run() against its signature, compiled once per run() function:
+        values are coerced to the annotated types, defaults are filled in and unknown
+        keys are rejected.
+
+        Raises:
+            InvalidToolArgumentsError: The arguments cannot be made to fit
+        """
+        run = getattr(self.run, "__func__", self.run)
+        try:
+            model = _validators[run]
+        except KeyError:
+            with _validators_lock:
+                if run not in _validators:
+                    _validators[run] = _compile_arguments(self.run)
+                model = _validators[run]
+        if model is None:
+            return arguments
+        if not isinstance(arguments, dict):
+            raise InvalidToolArgumentsError(self.name, [f"arguments: expected an object, got {type(arguments).__name__}"])
+        try:
+            validated = model.model_validate(arguments)
+        except ValidationError as e:
+            raise InvalidToolArgumentsError(self.name, _format_errors(e)) from None
+        fields = type(validated).model_fields
+        return {**{field.alias: getattr(validated, name) for name, field in fields.items()}, **(validated.model_extra or {})}
+
     def get_schema(self) -> Dict[str, Any]:
         """Get OpenAI-style function schema for the tool"""
         parameters = self._get_parameters()
@@ -32,7 +200,8 @@ class Tool(BaseTool):
                 "required": [
                     name
                     for name, info in parameters.items()
-                    if info.get("required", True)
+                    # Parameters with a default are filled in by validate_arguments()
+                    if info.get("required", "default" not in info)
                 ],
             },
         }
@@ -103,4 +272,44 @@ class Tool(BaseTool):
                 return line.split(":", 1)[1].strip()
         return f"Parameter: {param_name}"
 
+def _pop_started() -> List[Tool]:
+    with _lifecycle_lock:
+        started = list(reversed(_started))
+        _started.clear()
+    return started
+
+
+def teardown_tool(tool: Tool):
+    """Tear down a single tool set up in this process"""
+    with _lifecycle_lock:
+        if not tool._setup_done:
+            return
+        tool._setup_done = False
+        _started[:] = [t for t in _started if t is not tool]
+    try:
+        tool.teardown()
+    except Exception as e:
+        logger.warning(f"Teardown of tool '{tool.name}' failed: {e}")
+
+
+def teardown_tools():
+    """Tear down every tool set up in this process, in reverse setup order"""
+    for tool in _pop_started():
+        tool._setup_done = False
+        try:
+            tool.teardown()
+        except Exception as e:
+            logger.warning(f"Teardown of tool '{tool.name}' failed: {e}")
+
+
+async def ateardown_tools():
+    """Async variant of `teardown_tools`"""
+    for tool in _pop_started():
+        tool._setup_done = False
+        try:
+            await tool.ateardown()
+        except Exception as e:
+            logger.warning(f"Teardown of tool '{tool.name}' failed: {e}")
+
+
 tools = _sys.modules[__name__]
\ No newline at end of file
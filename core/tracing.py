@@ -0,0 +1,376 @@
+"""
+Span tracing and latency histograms built on the event bus.
+
+The tracer pairs the start/end events emitted by the pipeline into nested spans:
+
+    queue (ADMISSION_QUEUED/ADMITTED/DROPPED), when the run waited for admission
+    orchestra (ORCHESTRA_START/END/CANCELLED)
+    ├── planning (TASK_GENERATION_START/END)
+    │   └── llm:planning (LLM_START/END)
+    └── task (TASK_START/COMPLETE/ERROR/CANCELLED)
+        └── agent (AGENT_START/END)
+            ├── llm:tool_binding (LLM_START/END)
+            └── tool (TOOL_START/END/ERROR)
+
+Durations are measured with a monotonic clock when the events are received. Finished
+spans feed per-stage, per-agent, per-tool and per-model latency histograms, which can
+be exported as Prometheus text; spans can be exported as OTLP-compatible JSON.
+
+Usage::
+
+    tracer = enable_tracing()
+    run(query, agents)
+    print(tracer.export_prometheus())
+    tracer.export_otlp_json("trace.json")
+"""
+
+import bisect
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.events import events, Event, EventType
+
+import sys as _sys
+
+# Latency buckets in seconds, from fast tool calls up to slow model generations
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# event type -> (span kind, True if it opens the span)
+_SPAN_EVENTS: Dict[EventType, Tuple[str, bool]] = {
+    EventType.ORCHESTRA_START: ("orchestra", True),
+    EventType.ORCHESTRA_END: ("orchestra", False),
+    EventType.ORCHESTRA_ERROR: ("orchestra", False),
+    EventType.ORCHESTRA_CANCELLED: ("orchestra", False),
+    EventType.ADMISSION_QUEUED: ("queue", True),
+    EventType.ADMISSION_ADMITTED: ("queue", False),
+    EventType.ADMISSION_DROPPED: ("queue", False),
+    EventType.TASK_GENERATION_START: ("planning", True),
+    EventType.TASK_GENERATION_END: ("planning", False),
+    EventType.TASK_START: ("task", True),
+    EventType.TASK_COMPLETE: ("task", False),
+    EventType.TASK_ERROR: ("task", False),
+    EventType.TASK_CANCELLED: ("task", False),
+    EventType.AGENT_START: ("agent", True),
+    EventType.AGENT_END: ("agent", False),
+    EventType.TOOL_START: ("tool", True),
+    EventType.TOOL_END: ("tool", False),
+    EventType.TOOL_ERROR: ("tool", False),
+    EventType.LLM_START: ("llm", True),
+    EventType.LLM_END: ("llm", False),
+    EventType.LLM_ERROR: ("llm", False),
+}
+
+_ERROR_EVENTS = {EventType.ADMISSION_DROPPED, EventType.ORCHESTRA_ERROR, EventType.TASK_ERROR, EventType.TOOL_ERROR, EventType.LLM_ERROR}
+_CANCEL_EVENTS = {EventType.ORCHESTRA_CANCELLED, EventType.TASK_CANCELLED}
+
+
+class Span(BaseModel):
+    """A timed unit of work in a run"""
+
+    trace_id: str = Field(..., description="Trace id (the run id, or a hash of it when it is not a 32-char hex id)")
+    span_id: str = Field(..., description="Unique span id")
+    parent_id: Optional[str] = Field(None, description="Id of the enclosing span")
+    kind: str = Field(..., description="Span kind: queue, orchestra, planning, task, agent, tool or llm")
+    name: str = Field(..., description="Human readable span name")
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    start_time: datetime = Field(..., description="Wall-clock start time (UTC)")
+    start_ns: int = Field(..., description="Monotonic start time in nanoseconds")
+    end_ns: Optional[int] = Field(None, description="Monotonic end time in nanoseconds")
+    status: str = Field("ok", description="ok, error, cancelled or unfinished")
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, or None while the span is open"""
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000_000
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile, using the upper bound of the matching bucket"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        result = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            result.append((_format_float(bound), cumulative))
+        result.append(("+Inf", self.count))
+        return result
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _trace_id(run_id: str) -> str:
+    """OTLP trace id of a run: the run id itself when it is a 32-char hex id, else its md5"""
+    if len(run_id) == 32:
+        try:
+            int(run_id, 16)
+            return run_id.lower()
+        except ValueError:
+            pass
+    return hashlib.md5(run_id.encode("utf-8")).hexdigest()
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Event timestamps are naive UTC datetimes
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class Tracer:
+    """Event bus subscriber turning start/end event pairs into spans"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, max_spans: int = 10_000):
+        self.buckets = tuple(buckets)
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        # (run id, thread id) -> stack of open spans
+        self._open: Dict[Tuple[Optional[str], int], List[Span]] = {}
+        # run id -> root span, used as parent for work started on other threads
+        self._roots: Dict[Optional[str], Span] = {}
+
+    def __call__(self, event: Event):
+        self.handle(event)
+
+    def handle(self, event: Event):
+        span_event = _SPAN_EVENTS.get(event.type)
+        if span_event is None:
+            return
+        kind, opens = span_event
+        now_ns = time.perf_counter_ns()
+
+        with self._lock:
+            stack = self._open.setdefault((event.run_id, threading.get_ident()), [])
+            if opens:
+                self._start_span(event, kind, stack, now_ns)
+            else:
+                self._end_span(event, kind, stack, now_ns)
+            if not stack:
+                del self._open[(event.run_id, threading.get_ident())]
+
+    def _span_name(self, event: Event, kind: str) -> Tuple[str, Dict[str, Any]]:
+        data = event.data
+        if kind == "task":
+            return f"task:{data.get('step')}", {"step": data.get("step"), "agent": data.get("agent")}
+        if kind == "agent":
+            return f"agent:{event.source}", {"agent": event.source}
+        if kind == "tool":
+            return f"tool:{data.get('tool')}", {"tool": data.get("tool"), "agent": event.source}
+        if kind == "llm":
+            stage = data.get("stage") or "unknown"
+            return f"llm:{stage}", {"model": data.get("model"), "stage": stage}
+        if kind == "queue":
+            return "queue", {"priority": data.get("priority"), "tenant": data.get("tenant")}
+        return kind, {}
+
+    def _start_span(self, event: Event, kind: str, stack: List[Span], now_ns: int):
+        name, attributes = self._span_name(event, kind)
+        root = self._roots.get(event.run_id)
+        parent = stack[-1] if stack else root
+
+        if event.run_id:
+            attributes["run_id"] = event.run_id
+            trace_id = _trace_id(event.run_id)
+        else:
+            trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(
+            trace_id=trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            name=name,
+            attributes=attributes,
+            start_time=_utc(event.timestamp),
+            start_ns=now_ns,
+        )
+        stack.append(span)
+        if kind == "orchestra":
+            self._roots[event.run_id] = span
+
+    def _end_span(self, event: Event, kind: str, stack: List[Span], now_ns: int):
+        name, _ = self._span_name(event, kind)
+        # Close the innermost matching span; anything opened inside it that never
+        # received its end event (e.g. an agent whose tool raised) is closed as unfinished
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].kind == kind and (kind in ("agent", "llm") or stack[index].name == name):
+                break
+        else:
+            return
+
+        for span in reversed(stack[index + 1:]):
+            self._finish(span, now_ns, "unfinished")
+        span = stack[index]
+        del stack[index:]
+        if event.type in _ERROR_EVENTS:
+            span.attributes["error"] = event.data.get("error")
+            self._finish(span, now_ns, "error")
+        elif event.type in _CANCEL_EVENTS:
+            span.attributes["cancel_status"] = event.data.get("status")
+            self._finish(span, now_ns, "cancelled")
+        else:
+            self._finish(span, now_ns, "ok")
+
+        if kind == "orchestra":
+            self._roots.pop(event.run_id, None)
+
+    def _finish(self, span: Span, now_ns: int, status: str):
+        span.end_ns = now_ns
+        span.status = status
+        self.spans.append(span)
+
+        duration = span.duration
+        self._observe(("stage", span.kind if span.kind != "llm" else span.name), duration)
+        if span.kind == "agent":
+            self._observe(("agent", span.attributes["agent"]), duration)
+        elif span.kind == "tool":
+            self._observe(("tool", str(span.attributes["tool"])), duration)
+        elif span.kind == "llm":
+            self._observe(("model", str(span.attributes["model"])), duration)
+
+    def _observe(self, key: Tuple[str, str], value: float):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(self.buckets)
+        histogram.observe(value)
+
+    def get_spans(self, run_id: Optional[str] = None) -> List[Span]:
+        """Finished spans, optionally limited to a single run"""
+        with self._lock:
+            spans = list(self.spans)
+        if run_id is None:
+            return spans
+        return [span for span in spans if span.attributes.get("run_id") == run_id]
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Count, mean and approximate p50/p90/p99 per histogram, grouped by dimension"""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            for (dimension, name), histogram in self.histograms.items():
+                result.setdefault(dimension, {})[name] = {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "p50": histogram.quantile(0.5),
+                    "p90": histogram.quantile(0.9),
+                    "p99": histogram.quantile(0.99),
+                }
+        return result
+
+    def export_prometheus(self, metric: str = "orchestra_span_duration_seconds") -> str:
+        """Render the latency histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {metric} Duration of Orchestra pipeline spans in seconds.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for (dimension, name), histogram in sorted(self.histograms.items()):
+                labels = f'dimension="{_escape_label(dimension)}",name="{_escape_label(name)}"'
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{metric}_sum{{{labels}}} {_format_float(histogram.sum)}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_otlp(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Finished spans as an OTLP/JSON `ExportTraceServiceRequest` document"""
+        otlp_spans = []
+        for span in self.get_spans(run_id):
+            start_unix_ns = int(span.start_time.timestamp() * 1_000_000_000)
+            end_unix_ns = start_unix_ns + (span.end_ns - span.start_ns)
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(start_unix_ns),
+                "endTimeUnixNano": str(end_unix_ns),
+                "attributes": [
+                    {"key": "orchestra.kind", "value": {"stringValue": span.kind}}
+                ] + [
+                    {"key": f"orchestra.{key}", "value": {"stringValue": str(value)}}
+                    for key, value in span.attributes.items()
+                    if value is not None
+                ],
+                "status": {"code": 2 if span.status == "error" else 1, "message": span.status},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [{"key": "service.name", "value": {"stringValue": "orchestra"}}]
+                    },
+                    "scopeSpans": [{"scope": {"name": "orchestra.tracing"}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+    def export_otlp_json(self, path: str, run_id: Optional[str] = None):
+        """Write the finished spans to a local OTLP-compatible JSON file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_otlp(run_id), f)
+
+    def reset(self):
+        """Drop all spans and histograms"""
+        with self._lock:
+            self.spans.clear()
+            self.histograms.clear()
+            self._open.clear()
+            self._roots.clear()
+
+
+def enable_tracing(buckets: Sequence[float] = DEFAULT_BUCKETS, max_spans: int = 10_000) -> Tracer:
+    """Create a tracer and subscribe it to the global event bus"""
+    tracer = Tracer(buckets=buckets, max_spans=max_spans)
+    events.subscribe(tracer)
+    return tracer
+
+
+def disable_tracing(tracer: Tracer):
+    """Unsubscribe a tracer from the event bus"""
+    events.unsubscribe(tracer)
+
+
+tracing = _sys.modules[__name__]
@@ -12,14 +12,16 @@ This example demonstrates:
 import sys
 import os
 import json
+import sqlite3
 from datetime import datetime
 from typing import Dict, Any, List
 
 # Add the parent directory to the path to import orchestra modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from orchestra import run
+from orchestra import run, startup, shutdown
 from core.agent import ToolAgent, AgentTask
+from core.resources import shared_pool
 from core.tools import Tool
 
 
@@ -63,6 +65,23 @@ class TodoTool(Tool):
     
     name: str = "manage_todo"
     description: str = "Add, remove, or list todo items"
+
+    def setup(self) -> None:
+        """Open the todo database once; calls borrow connections from the pool"""
+        # A shared in-memory SQLite database stands in for a real database server
+        self._db = shared_pool(
+            "todo_db",
+            lambda: sqlite3.connect("file:todos?mode=memory&cache=shared", uri=True, check_same_thread=False),
+            close=lambda conn: conn.close(),
+            max_size=4,
+        )
+        with self._db.lease() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS todos (item TEXT PRIMARY KEY, created TEXT)")
+            conn.commit()
+
+    def _list(self, conn) -> List[Dict[str, Any]]:
+        rows = conn.execute("SELECT item, created FROM todos ORDER BY created").fetchall()
+        return [{"item": item, "created": created} for item, created in rows]
     
     def run(self, action: str, item: str = None) -> Dict[str, Any]:
         """
@@ -72,30 +91,28 @@ class TodoTool(Tool):
             action: The action to perform (add, remove, list)
             item: The todo item (required for add/remove actions)
         """
-        # Simulate todo storage - in a real implementation, this would use a database
-        if not hasattr(self, '_todos'):
-            self._todos = []
-        
-        if action == "add":
-            if not item:
-                return {"status": "error", "message": "Item is required for add action"}
-            self._todos.append({"item": item, "created": datetime.now().isoformat()})
-            return {"status": "success", "message": f"Added '{item}' to todo list", "todos": self._todos}
-        
-        elif action == "remove":
-            if not item:
-                return {"status": "error", "message": "Item is required for remove action"}
-            for todo in self._todos:
-                if todo["item"] == item:
-                    self._todos.remove(todo)
-                    return {"status": "success", "message": f"Removed '{item}' from todo list", "todos": self._todos}
-            return {"status": "error", "message": f"Item '{item}' not found in todo list"}
-        
-        elif action == "list":
-            return {"status": "success", "message": "Current todo items", "todos": self._todos}
-        
-        else:
-            return {"status": "error", "message": f"Invalid action: {action}. Use 'add', 'remove', or 'list'"}
+        with self._db.lease() as conn:
+            if action == "add":
+                if not item:
+                    return {"status": "error", "message": "Item is required for add action"}
+                conn.execute("INSERT OR REPLACE INTO todos VALUES (?, ?)", (item, datetime.now().isoformat()))
+                conn.commit()
+                return {"status": "success", "message": f"Added '{item}' to todo list", "todos": self._list(conn)}
+            
+            elif action == "remove":
+                if not item:
+                    return {"status": "error", "message": "Item is required for remove action"}
+                removed = conn.execute("DELETE FROM todos WHERE item = ?", (item,)).rowcount
+                conn.commit()
+                if removed:
+                    return {"status": "success", "message": f"Removed '{item}' from todo list", "todos": self._list(conn)}
+                return {"status": "error", "message": f"Item '{item}' not found in todo list"}
+            
+            elif action == "list":
+                return {"status": "success", "message": "Current todo items", "todos": self._list(conn)}
+            
+            else:
+                return {"status": "error", "message": f"Invalid action: {action}. Use 'add', 'remove', or 'list'"}
 
 
 class CalculatorTool(Tool):
@@ -262,8 +279,14 @@ def main():
     
     # Run all examples
     agent_list = [WeatherAgent(), TodoAgent(), CalculatorAgent()]
+    # Open tool resources once, before the first query
+    startup(agent_list)
+
     query = "What's the weather in Tokyo and calculate 15% of 84590? Also add 'Buy groceries' to my todo list."
-    response = run(query, agent_list)
+    try:
+        response = run(query, agent_list)
+    finally:
+        shutdown()
 
     print(f'User query: {query}\n\n')
     print(f'Final response: {response}\n\n')
@@ -1,18 +1,259 @@
-from orchestra.llm.deepseek_llm import deepseek_invoke
-from orchestra.llm.ollama_llm import ollama_invoke
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Union
+
+from orchestra.core.cancellation import check_cancelled, current_cancellation, remaining_time
+from orchestra.core.events import events, Event, EventType
+from orchestra.llm.concurrency import limited
+from orchestra.llm.pool import get_pool
+from orchestra.llm.registry import resolve_provider
+from orchestra.llm.resilience import call_with_resilience, get_resilience_policy
+from orchestra.llm.cascade import Validator, cascade_chain, check, record
+from orchestra.llm.stages import current_stages, resolve_stage
+from orchestra.llm.structured import constrained_format
+from orchestra.llm.usage import BudgetExceededError, current_usage
+
+
+def _invoke_backend(
+    system_message: str,
+    user_message: str,
+    payload: dict,
+    model: str,
+    host: Optional[str] = None,
+    timeout: Optional[float] = None,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+):
+    provider, model_name = resolve_provider(model)
+    kwargs = {}
+    if host is not None:
+        kwargs["host"] = host
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    if options:
+        kwargs["options"] = options
+    if format is not None:
+        kwargs["format"] = format
+    return provider.load()(system_message, user_message, payload, model_name=model_name, **kwargs)
 
 
 def model_invoke(
     system_message: str,
     user_message: str,
     payload: dict = None,
-    model: str = "ollama",
-) -> dict:
-    if model == "ollama":
-        return ollama_invoke(system_message, user_message, payload)
-    elif model == "deepseek":
-        return deepseek_invoke(system_message, user_message, payload)
-    else:
-        raise ValueError(
-            f"Invalid model: {model}. Models avaiable: ollama, deepseek, openai"
+    model: Optional[str] = None,
+    stage: Optional[str] = None,
+    return_usage: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    validator: Optional[Validator] = None,
+    cascade_key: Optional[str] = None,
+):
+    """
+    Call the given model backend.
+
+    Args:
+        system_message: System prompt
+        user_message: User prompt
+        payload: Optional function schema for tool calling
+        model: Provider name or model name, resolved through `llm.registry`; defaults to the stage's model
+        stage: Pipeline stage issuing the call (e.g. "planning", "tool_binding", "synthesis")
+        return_usage: If True, return a `(response, Usage)` tuple instead of the response only
+        options: Generation options (temperature, num_ctx, num_predict, ...) merged over the stage's
+        format: "json" or a JSON schema the output must follow
+        validator: Checks a structured response; enables the stage's model cascade (`llm.cascade`)
+        cascade_key: Name the cascade outcome is counted under (e.g. the agent name)
+
+    The model, options and format are resolved per stage as described in `llm.stages`.
+
+    Timeouts, retries and hedging follow the policy in `llm.resilience`; models served by
+    an `llm.pool` endpoint pool are load balanced over its hosts on every attempt, and each
+    backend is guarded by the adaptive limiter of `llm.concurrency` when it is enabled.
+
+    Raises:
+        BudgetExceededError: If the current run has exhausted its token or time budget
+        CallTimeoutError: If the call did not answer within the stage timeout
+        RunCancelledError: If the current run was cancelled or passed its deadline
+    """
+    check_cancelled()
+
+    config = resolve_stage(stage, model=model, options=options, format=format)
+    chain = cascade_chain(stage) if validator is not None else []
+    run_stage = (current_stages.get() or {}).get(stage)
+    if chain and not (run_stage is not None and _run_model(run_stage)):
+        return _cascade(system_message, user_message, payload, config, stage, chain, validator, cascade_key, return_usage)
+    return _invoke(system_message, user_message, payload, config, stage, return_usage)
+
+
+def _run_model(run_stage) -> Optional[str]:
+    return run_stage.get("model") if isinstance(run_stage, dict) else run_stage.model
+
+
+def _cascade(system_message, user_message, payload, config, stage, chain, validator, cascade_key, return_usage):
+    """Try the cascade's models in order until the validator accepts an answer"""
+    escalations = []
+    for level, model in enumerate(chain):
+        response, usage = _invoke(
+            system_message, user_message, payload, config.model_copy(update={"model": model}), stage, True
         )
+        reason = check(response, validator)
+        if reason is None or level == len(chain) - 1:
+            record(cascade_key or stage, model, escalations, accepted=reason is None)
+            break
+        escalations.append(reason)
+        events.emit(Event(
+            type=EventType.LLM_ESCALATED,
+            source="llm",
+            data={"model": model, "next_model": chain[level + 1], "stage": stage, "reason": reason, "key": cascade_key}
+        ))
+    if return_usage:
+        return response, usage
+    return response
+
+
+def _invoke(system_message, user_message, payload, config, stage, return_usage):
+    model = config.model
+    # Only passed when set, so backends without generation options keep working
+    generation = {"options": config.options} if config.options else {}
+    if config.format is not None:
+        generation["format"] = config.format
+
+    run_usage = current_usage.get()
+    if run_usage is not None:
+        reason = run_usage.exceeded()
+        if reason:
+            events.emit(Event(
+                type=EventType.BUDGET_EXCEEDED,
+                source="llm",
+                data={"model": model, "stage": stage, "reason": reason, "usage": run_usage.summary()}
+            ))
+            raise BudgetExceededError(reason)
+
+    events.emit(Event(
+        type=EventType.LLM_START,
+        source="llm",
+        data={"model": model, "stage": stage}
+    ))
+
+    policy = get_resilience_policy()
+    stage_timeout = policy.timeout_for(stage)
+
+    def call(target_model: str, host: Optional[str]):
+        # The client-side timeout never outlives the run's deadline, and a call that a run
+        # could abandon on cancellation is never left without one
+        timeout = stage_timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        if timeout is None and current_cancellation.get() is not None:
+            timeout = policy.cancellable_timeout
+        kwargs = dict(generation)
+        if "format" not in kwargs:
+            # Decode against the response schema where the backend supports it
+            schema = constrained_format(payload, target_model)
+            if schema is not None:
+                kwargs["format"] = schema
+        pool = get_pool(target_model) if host is None else None
+        if pool is not None:
+            with pool.lease() as endpoint, limited(endpoint.host):
+                return _invoke_backend(
+                    system_message, user_message, payload, target_model, host=endpoint.host, timeout=timeout, **kwargs
+                )
+        with limited(host or resolve_provider(target_model)[0].name):
+            return _invoke_backend(system_message, user_message, payload, target_model, host=host, timeout=timeout, **kwargs)
+
+    def record_abandoned(result):
+        # Losing hedges and timed-out attempts that still answer were paid for too
+        _, abandoned_usage = result
+        abandoned_usage.stage = stage
+        run_usage.add(abandoned_usage)
+
+    try:
+        (response, usage), attempts = call_with_resilience(
+            call, model, stage=stage, on_abandoned=record_abandoned if run_usage is not None else None
+        )
+    except Exception as e:
+        events.emit(Event(
+            type=EventType.LLM_ERROR,
+            source="llm",
+            data={"model": model, "stage": stage, "error": str(e)}
+        ))
+        raise
+
+    usage.stage = stage
+    if run_usage is not None:
+        run_usage.add(usage)
+
+    events.emit(Event(
+        type=EventType.LLM_END,
+        source="llm",
+        data={"model": model, "stage": stage, "attempts": attempts, "usage": usage.summary()}
+    ))
+
+    if return_usage:
+        return response, usage
+    return response
+
+
+async def amodel_invoke(
+    system_message: str,
+    user_message: str,
+    payload: dict = None,
+    model: Optional[str] = None,
+    stage: Optional[str] = None,
+    return_usage: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    validator: Optional[Validator] = None,
+    cascade_key: Optional[str] = None,
+):
+    """Async variant of `model_invoke`; the call runs in a worker thread"""
+    return await asyncio.to_thread(
+        model_invoke,
+        system_message,
+        user_message,
+        payload,
+        model=model,
+        stage=stage,
+        return_usage=return_usage,
+        options=options,
+        format=format,
+        validator=validator,
+        cascade_key=cascade_key,
+    )
+
+
+def warmup_models(models: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Load models into memory ahead of the first request, on every host of their endpoint pool.
+
+    Providers without a preload function are skipped. Preloads run in parallel.
+
+    Returns:
+        Model -> None when every host loaded it, else the first error message
+    """
+    jobs = []
+    for model in dict.fromkeys(models):
+        provider, model_name = resolve_provider(model)
+        preload = provider.load_preload()
+        if preload is None:
+            continue
+        pool = get_pool(model)
+        hosts = [endpoint.host for endpoint in pool.endpoints] if pool is not None else [None]
+        jobs.extend((model, preload, model_name, host) for host in hosts)
+
+    def load(job):
+        model, preload, model_name, host = job
+        try:
+            preload(model_name=model_name, **({"host": host} if host is not None else {}))
+            return model, None
+        except Exception as e:
+            return model, f"{host or 'default host'}: {e}"
+
+    results: Dict[str, Optional[str]] = {}
+    if not jobs:
+        return results
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs)), thread_name_prefix="orchestra-warmup") as pool:
+        for model, error in pool.map(load, jobs):
+            results[model] = results.get(model) or error
+    return results
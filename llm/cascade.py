@@ -0,0 +1,114 @@
+"""
+Model cascades for structured calls.
+
+Most planning and tool-binding calls are easy enough for a small model. With a cascade
+configured for a stage, `model_invoke(..., validator=...)` tries the stage's models
+from small to large and returns the first answer the validator accepts:
+
+- the validator returns None for a usable answer, or a short reason code such as
+  ``"unknown_agent"`` or ``"missing_args"`` (planning and tool binding check schema
+  validity, agent and tool names and required arguments)
+- an answer reporting a numeric ``confidence`` below ``min_confidence`` is escalated too
+- every escalation emits an LLM_ESCALATED event; the last model's answer is returned
+  even if it fails validation, so callers handle it as before
+
+Calls without a validator, and runs that pick the stage's model themselves, are not
+cascaded. Outcomes are counted per caller (the agent name for tool binding, "planner"
+for planning) in `cascade_stats()` for tuning the cascade.
+
+Usage::
+
+    set_cascade_policy(CascadePolicy(stages={
+        "planning": ["ollama/qwen2.5:3b", "ollama/llama3.1:70b"],
+        "tool_binding": ["ollama/qwen2.5:3b", "ollama/llama3.1:8b"],
+    }))
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+import sys as _sys
+
+# Returns None when a response is usable, else a short reason code
+Validator = Callable[[Any], Optional[str]]
+
+
+class CascadePolicy(BaseModel):
+    """Per-stage model cascades"""
+
+    stages: Dict[str, List[str]] = Field(default_factory=dict, description="Stage -> models to try, smallest first")
+    min_confidence: Optional[float] = Field(
+        None, description="Escalate answers reporting a 'confidence' below this (0-1)"
+    )
+
+
+_policy = CascadePolicy()
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+
+
+def get_cascade_policy() -> CascadePolicy:
+    return _policy
+
+
+def set_cascade_policy(policy: CascadePolicy):
+    global _policy
+    _policy = policy
+
+
+def cascade_chain(stage: Optional[str]) -> List[str]:
+    """Models to try for `stage`; a single model means no cascade"""
+    chain = _policy.stages.get(stage, []) if stage else []
+    return chain if len(chain) > 1 else []
+
+
+def check(response: Any, validator: Validator) -> Optional[str]:
+    """Reason to escalate `response`, or None to accept it"""
+    try:
+        reason = validator(response)
+    except Exception:
+        reason = "invalid"
+    if reason is None and _policy.min_confidence is not None and isinstance(response, dict):
+        confidence = response.get("confidence")
+        if isinstance(confidence, (int, float)) and confidence < _policy.min_confidence:
+            reason = "low_confidence"
+    return reason
+
+
+def record(key: str, model: str, escalations: List[str], accepted: bool):
+    """Count the outcome of one cascaded call"""
+    with _stats_lock:
+        entry = _stats.setdefault(
+            key, {"calls": 0, "escalated": 0, "escalations": 0, "unresolved": 0, "answered_by": {}, "reasons": {}}
+        )
+        entry["calls"] += 1
+        entry["escalated"] += bool(escalations)
+        entry["escalations"] += len(escalations)
+        entry["unresolved"] += not accepted
+        entry["answered_by"][model] = entry["answered_by"].get(model, 0) + 1
+        for reason in escalations:
+            entry["reasons"][reason] = entry["reasons"].get(reason, 0) + 1
+
+
+def cascade_stats() -> Dict[str, Dict[str, Any]]:
+    """Per caller: calls, how many escalated, escalation reasons and which model answered"""
+    with _stats_lock:
+        return {
+            key: {
+                **entry,
+                "answered_by": dict(entry["answered_by"]),
+                "reasons": dict(entry["reasons"]),
+                "escalation_rate": round(entry["escalated"] / entry["calls"], 3) if entry["calls"] else 0.0,
+            }
+            for key, entry in _stats.items()
+        }
+
+
+def reset_cascade_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+cascade = _sys.modules[__name__]
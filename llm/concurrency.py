@@ -0,0 +1,213 @@
+"""
+Adaptive (AIMD) concurrency limiting for model backends.
+
+Each backend (a pool host, or the provider name when no pool is used) gets its own
+limiter in front of `model_invoke`:
+
+- while calls finish within the latency target the limit grows additively
+  (``+increase`` per full window of successful calls)
+- on a timeout, a transport error or a latency spike it is cut multiplicatively
+  (``* decrease_factor``), at most once per window of requests in flight
+- requests beyond the limit wait in a bounded queue; they are rejected with
+  `LimiterOverloadedError` when the queue is full or the wait exceeds ``max_wait``
+
+The latency target is either fixed (``target_latency``) or derived from the fastest
+recent calls (``baseline * latency_tolerance``).
+
+Limiting is opt-in::
+
+    set_limiter_policy(LimiterPolicy(enabled=True, max_limit=16))
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import remaining_time
+from orchestra.core.events import events, Event, EventType
+from orchestra.llm.resilience import is_transport_error
+
+import sys as _sys
+
+
+class LimiterOverloadedError(RuntimeError):
+    """Raised when a request cannot get a concurrency slot in time"""
+
+
+class LimiterPolicy(BaseModel):
+    """Settings used for every backend limiter"""
+
+    enabled: bool = Field(False, description="Put an adaptive limiter in front of each backend")
+    initial_limit: float = Field(4, description="Starting concurrency limit")
+    min_limit: float = Field(1, description="Lowest concurrency limit")
+    max_limit: float = Field(64, description="Highest concurrency limit")
+    increase: float = Field(1.0, description="Additive increase per window of successful calls")
+    decrease_factor: float = Field(0.5, description="Multiplicative decrease on overload")
+    target_latency: Optional[float] = Field(None, description="Fixed latency target in seconds")
+    latency_tolerance: float = Field(2.0, description="Spike threshold as a multiple of the baseline latency")
+    baseline_window: int = Field(100, description="Recent calls used to estimate the baseline latency")
+    max_wait: float = Field(30.0, description="Longest time a request may queue for a slot, in seconds")
+    max_queue: Optional[int] = Field(None, description="Requests allowed to queue; None is unbounded")
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with a bounded wait queue"""
+
+    def __init__(self, name: str, policy: Optional[LimiterPolicy] = None):
+        self.name = name
+        self.policy = policy or LimiterPolicy(enabled=True)
+        self.limit = float(self.policy.initial_limit)
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._latencies: Deque[float] = deque(maxlen=self.policy.baseline_window)
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def target(self) -> Optional[float]:
+        """Latency above which a call counts as a spike"""
+        if self.policy.target_latency is not None:
+            return self.policy.target_latency
+        if not self._latencies:
+            return None
+        return min(self._latencies) * self.policy.latency_tolerance
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a slot.
+
+        Returns:
+            The monotonic time the slot was granted, to pass back to `release`
+        """
+        timeout = self.policy.max_wait if timeout is None else timeout
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                if self.policy.max_queue is not None and self.queue_depth >= self.policy.max_queue:
+                    self.rejected += 1
+                    raise LimiterOverloadedError(f"Queue of backend '{self.name}' is full ({self.queue_depth} waiting)")
+
+                self.queue_depth += 1
+                try:
+                    granted = self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout)
+                finally:
+                    self.queue_depth -= 1
+                if not granted:
+                    self.rejected += 1
+                    raise LimiterOverloadedError(f"No slot on backend '{self.name}' within {timeout:.2f}s")
+
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, latency: float, error: Optional[BaseException] = None):
+        """Free a slot and adapt the limit to the outcome of the call"""
+        with self._condition:
+            self.in_flight -= 1
+            overloaded = error is not None and is_transport_error(error)
+            if error is None:
+                target = self.target()
+                overloaded = target is not None and latency > target
+                self._latencies.append(latency)
+
+            if overloaded:
+                # Only react once to the requests that were in flight when we last cut
+                if started >= self._last_decrease:
+                    self.limit = max(self.policy.min_limit, self.limit * self.policy.decrease_factor)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+            elif error is None:
+                self.limit = min(self.policy.max_limit, self.limit + self.policy.increase / max(self.limit, 1.0))
+
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict:
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "rejected": self.rejected,
+                "decreases": self.decreases,
+                "target_latency": self.target(),
+            }
+
+
+_policy = LimiterPolicy()
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter_policy() -> LimiterPolicy:
+    return _policy
+
+
+def set_limiter_policy(policy: LimiterPolicy):
+    """Replace the limiter policy; existing limiters are recreated on next use"""
+    global _policy
+    with _limiters_lock:
+        _policy = policy
+        _limiters.clear()
+
+
+def get_limiter(backend: str) -> Optional[AdaptiveLimiter]:
+    """The limiter for a backend, or None when limiting is disabled"""
+    if not _policy.enabled:
+        return None
+    limiter = _limiters.get(backend)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(backend)
+            if limiter is None:
+                limiter = _limiters[backend] = AdaptiveLimiter(backend, _policy)
+    return limiter
+
+
+@contextmanager
+def limited(backend: str) -> Iterator[None]:
+    """Hold a concurrency slot of `backend` (no-op when limiting is disabled)"""
+    limiter = get_limiter(backend)
+    if limiter is None:
+        yield
+        return
+    # Never queue past the deadline of the current run
+    remaining = remaining_time()
+    try:
+        started = limiter.acquire(None if remaining is None else min(limiter.policy.max_wait, remaining))
+    except LimiterOverloadedError as e:
+        events.emit(Event(
+            type=EventType.LLM_REJECTED,
+            source="llm_limiter",
+            data={"backend": backend, "reason": str(e), **limiter.metrics()}
+        ))
+        raise
+    begin = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        limiter.release(started, time.perf_counter() - begin, e)
+        raise
+    limiter.release(started, time.perf_counter() - begin)
+
+
+def limiter_metrics() -> Dict[str, Dict]:
+    """Current limit, in-flight requests and queue depth per backend"""
+    return {backend: limiter.metrics() for backend, limiter in list(_limiters.items())}
+
+
+def export_prometheus(prefix: str = "orchestra_llm_limiter") -> str:
+    """Render the limiter metrics as Prometheus gauges"""
+    metrics = limiter_metrics()
+    lines = []
+    for field in ("limit", "in_flight", "queue_depth", "rejected"):
+        lines.append(f"# TYPE {prefix}_{field} gauge")
+        for backend, values in sorted(metrics.items()):
+            escaped = backend.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_{field}{{backend="{escaped}"}} {float(values[field])!r}')
+    return "\n".join(lines) + "\n"
+
+
+concurrency = _sys.modules[__name__]
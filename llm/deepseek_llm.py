@@ -1,9 +1,9 @@
 import os
 import sys
 
-import ollama
-
 from orchestra.config import DEEPSEEK_MODEL
+from orchestra.llm.ollama_llm import get_arguments, get_client
+from orchestra.llm.usage import Usage
 
 
 def _get_tool_call(response: dict) -> dict:
@@ -26,9 +26,21 @@ def _get_tool_call(response: dict) -> dict:
     }
 
 
-def deepseek_invoke(system_message: str, user_message: str, payload: dict) -> dict:
+def deepseek_invoke_with_usage(
+    system_message: str,
+    user_message: str,
+    payload: dict,
+    model_name: str = None,
+    host: str = None,
+    timeout: float = None,
+    options: dict = None,
+    format=None,
+) -> tuple:
+    """Like `deepseek_invoke` but also returns the `Usage` reported by Ollama"""
+    model_name = model_name or DEEPSEEK_MODEL
     tools = None
-    if payload:
+    constrained = bool(payload) and isinstance(format, dict)
+    if payload and not constrained:
         tools = [{"type": "function", "function": payload}]
 
     messages = [
@@ -36,9 +48,21 @@ def deepseek_invoke(system_message: str, user_message: str, payload: dict) -> di
         {"role": "user", "content": user_message},
     ]
 
-    response = ollama.chat(model=DEEPSEEK_MODEL, messages=messages, tools=tools)
+    response = get_client(host, timeout).chat(
+        model=model_name, messages=messages, tools=tools, options=options, format=format
+    )
+
+    usage = Usage.from_ollama(response, model=model_name)
 
+    if constrained:
+        # Decoded against the response schema: the content is the answer
+        return get_arguments(response), usage
     if payload:
-        return _get_tool_call(response)
+        return _get_tool_call(response), usage
 
-    return response["message"]["content"]
+    return response["message"]["content"], usage
+
+
+def deepseek_invoke(system_message: str, user_message: str, payload: dict) -> dict:
+    result, _ = deepseek_invoke_with_usage(system_message, user_message, payload)
+    return result
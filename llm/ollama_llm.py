@@ -1,9 +1,75 @@
+import math
 import os
 import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
 
 import ollama
 
-from orchestra.config import OLLAMA_MODEL
+from orchestra.config import OLLAMA_KEEP_ALIVE, OLLAMA_MODEL
+from orchestra.llm.usage import Usage
+from orchestra.utils import json_repair
+
+# Client timeouts are rounded up to one of these buckets so that calls bounded by a run's
+# deadline, whose timeouts all differ, still share a handful of clients per host
+_TIMEOUT_BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300)
+_MAX_CLIENTS = 32
+
+_clients: "OrderedDict[tuple, ollama.Client]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+# Model name -> how long Ollama keeps it loaded after a request (None: server default)
+_keep_alive: Dict[Optional[str], Union[str, float]] = {}
+
+
+def set_keep_alive(model_name: Optional[str], keep_alive: Union[str, float, None]):
+    """
+    Keep `model_name` (None: the default model) loaded this long after each request,
+    as a duration ("30m"), seconds, -1 (forever) or 0 (unload right away).
+    None restores ``OLLAMA_KEEP_ALIVE`` / the server default.
+    """
+    if keep_alive is None:
+        _keep_alive.pop(model_name, None)
+    else:
+        _keep_alive[model_name] = keep_alive
+
+
+def get_keep_alive(model_name: Optional[str]) -> Union[str, float, None]:
+    if model_name in _keep_alive:
+        return _keep_alive[model_name]
+    if model_name in (None, OLLAMA_MODEL) and None in _keep_alive:
+        return _keep_alive[None]
+    return OLLAMA_KEEP_ALIVE
+
+
+def timeout_bucket(timeout: Optional[float]) -> Optional[float]:
+    """Round a client timeout up to a bucket (multiples of the last bucket beyond it)"""
+    if timeout is None:
+        return None
+    for bucket in _TIMEOUT_BUCKETS:
+        if timeout <= bucket:
+            return bucket
+    last = _TIMEOUT_BUCKETS[-1]
+    return math.ceil(timeout / last) * last
+
+
+def get_client(host: str = None, timeout: float = None) -> ollama.Client:
+    """Return a shared client for the given host (None uses OLLAMA_HOST or the default)
+
+    Clients are cached per host and timeout bucket; the caller enforces the exact timeout.
+    """
+    key = (host, timeout_bucket(timeout))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            return client
+        client = _clients[key] = ollama.Client(host=host, timeout=key[1])
+        if len(_clients) > _MAX_CLIENTS:
+            # Not closed: a call may still be using it; its connections go with the client
+            _clients.popitem(last=False)
+    return client
 
 
 def get_arguments(response: dict) -> dict:
@@ -15,15 +81,13 @@ def get_arguments(response: dict) -> dict:
             if tool_calls and len(tool_calls) > 0:
                 return tool_calls[0]["function"]["arguments"]
         
-        # If tool_calls structure is missing, try to parse the content as JSON
+        # If tool_calls structure is missing, try to parse the content as (possibly malformed) JSON
         if "message" in response and "content" in response["message"]:
-            import json
             content = response["message"]["content"]
             if content:
                 try:
-                    # Try to parse the content as JSON
-                    return json.loads(content)
-                except json.JSONDecodeError:
+                    return json_repair.loads(content)
+                except ValueError:
                     # If parsing fails, wrap the content as a generic response
                     return {"response": content}
         
@@ -34,9 +98,25 @@ def get_arguments(response: dict) -> dict:
         return {"error": f"Failed to parse response: {str(e)}", "raw_response": response}
 
 
-def ollama_invoke(system_message: str, user_message: str, payload: dict) -> dict:
+def ollama_invoke_with_usage(
+    system_message: str,
+    user_message: str,
+    payload: dict,
+    model_name: str = None,
+    host: str = None,
+    timeout: float = None,
+    options: dict = None,
+    format=None,
+) -> tuple:
+    """Like `ollama_invoke` but also returns the `Usage` reported by Ollama
+
+    `options` are Ollama generation options (temperature, num_ctx, num_predict, ...) and
+    `format` is "json" or a JSON schema constraining the output.
+    """
+    model_name = model_name or OLLAMA_MODEL
     tools = None
-    if payload:
+    # With a schema to decode against, the answer is the content itself; no tool call needed
+    if payload and not isinstance(format, dict):
         tools = [{"type": "function", "function": payload}]
 
     messages = [
@@ -44,10 +124,29 @@ def ollama_invoke(system_message: str, user_message: str, payload: dict) -> dict
         {"role": "user", "content": user_message},
     ]
 
-    response = ollama.chat(model=OLLAMA_MODEL, messages=messages, tools=tools)
+    response = get_client(host, timeout).chat(
+        model=model_name,
+        messages=messages,
+        tools=tools,
+        options=options,
+        format=format,
+        keep_alive=get_keep_alive(model_name),
+    )
+
+    usage = Usage.from_ollama(response, model=model_name)
 
     if payload:
-        response = get_arguments(response)
-        return response
+        return get_arguments(response), usage
 
-    return response["message"]["content"]
+    return response["message"]["content"], usage
+
+
+def ollama_preload(model_name: str = None, host: str = None):
+    """Load a model into memory without generating anything, so the first request skips the cold load"""
+    model_name = model_name or OLLAMA_MODEL
+    get_client(host).generate(model=model_name, keep_alive=get_keep_alive(model_name))
+
+
+def ollama_invoke(system_message: str, user_message: str, payload: dict) -> dict:
+    result, _ = ollama_invoke_with_usage(system_message, user_message, payload)
+    return result
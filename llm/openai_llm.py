@@ -0,0 +1,114 @@
+
+from orchestra.config import OPENAI_MODEL
+from orchestra.llm.usage import Usage
+from orchestra.utils import json_repair
+
+try:
+    import openai
+except ImportError as e:  # pragma: no cover - optional dependency
+    raise ImportError(
+        "The 'openai' package is required for OpenAI models. Install it with `pip install openai`."
+    ) from e
+
+_clients = {}
+
+
+def _get_client(host: str = None):
+    # The client reads OPENAI_API_KEY / OPENAI_BASE_URL from the environment.
+    # One client per host; timeouts are passed per request so deadlines do not add clients.
+    client = _clients.get(host)
+    if client is None:
+        kwargs = {}
+        if host:
+            kwargs["base_url"] = host
+        client = _clients.setdefault(host, openai.OpenAI(**kwargs))
+    return client
+
+
+def _get_arguments(message) -> dict:
+    """Extract the tool arguments the same way `ollama_llm.get_arguments()` does"""
+    if message.tool_calls:
+        arguments = message.tool_calls[0].function.arguments
+        try:
+            return json_repair.loads(arguments)
+        except ValueError:
+            return {"response": arguments}
+
+    if message.content:
+        try:
+            return json_repair.loads(message.content)
+        except ValueError:
+            return {"response": message.content}
+
+    return {}
+
+
+# Ollama-style generation options understood by the chat completions API
+_OPTION_NAMES = {
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "seed": "seed",
+    "num_predict": "max_tokens",
+    "max_tokens": "max_tokens",
+    "stop": "stop",
+    "presence_penalty": "presence_penalty",
+    "frequency_penalty": "frequency_penalty",
+}
+
+
+def _response_format(format) -> dict:
+    if format == "json":
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": "response", "schema": format}}
+
+
+def openai_invoke_with_usage(
+    system_message: str,
+    user_message: str,
+    payload: dict,
+    model_name: str = None,
+    host: str = None,
+    timeout: float = None,
+    options: dict = None,
+    format=None,
+) -> tuple:
+    """Like `openai_invoke` but also returns the `Usage` reported by the API
+
+    Ollama-style `options` are mapped to their API parameters (``num_predict`` becomes
+    ``max_tokens``); options without an equivalent, such as ``num_ctx``, are ignored.
+    """
+    model_name = model_name or OPENAI_MODEL
+
+    kwargs = {}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    for name, value in (options or {}).items():
+        if name in _OPTION_NAMES:
+            kwargs[_OPTION_NAMES[name]] = value
+    if format is not None:
+        kwargs["response_format"] = _response_format(format)
+    if payload:
+        kwargs["tools"] = [{"type": "function", "function": payload}]
+
+    messages = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": user_message},
+    ]
+
+    response = _get_client(host).chat.completions.create(model=model_name, messages=messages, **kwargs)
+
+    usage = Usage(model=model_name)
+    if response.usage is not None:
+        usage.prompt_tokens = response.usage.prompt_tokens or 0
+        usage.completion_tokens = response.usage.completion_tokens or 0
+
+    message = response.choices[0].message
+    if payload:
+        return _get_arguments(message), usage
+
+    return message.content, usage
+
+
+def openai_invoke(system_message: str, user_message: str, payload: dict) -> dict:
+    result, _ = openai_invoke_with_usage(system_message, user_message, payload)
+    return result
@@ -0,0 +1,308 @@
+"""
+Load balancing of model calls over a pool of backend hosts.
+
+A pool is registered per model (or per provider name) with the hosts serving it.
+`model_invoke` leases an endpoint from the pool for every attempt:
+
+- ``least_outstanding`` routing picks the host with the fewest in-flight requests
+- ``latency_weighted`` routing scores hosts by ``(outstanding + 1) * EWMA latency``
+
+Each endpoint has a circuit breaker. After ``failure_threshold`` consecutive transport
+failures (connection errors, timeouts, 5xx/429 responses; slow calls also count when
+``slow_call_threshold`` is set) the endpoint is
+ejected for ``open_seconds``. Then a single probe request (or a successful health
+check) re-admits it.
+
+Pools can also be configured with the ``OLLAMA_HOSTS`` environment variable
+(comma separated), which creates a pool for the ``ollama`` provider.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.events import events, Event, EventType
+from orchestra.llm.resilience import is_transport_error
+
+import sys as _sys
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class NoHealthyEndpointError(ConnectionError):
+    """Raised when every endpoint of a pool is ejected"""
+
+
+class CircuitBreakerPolicy(BaseModel):
+    failure_threshold: int = Field(3, description="Consecutive failures before an endpoint is ejected")
+    slow_call_threshold: Optional[float] = Field(None, description="Calls slower than this (seconds) count as failures")
+    open_seconds: float = Field(30.0, description="How long an ejected endpoint stays out before a probe")
+
+
+class Endpoint:
+    """A backend host with its load, latency and circuit breaker state"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency: Optional[float] = None
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "host": self.host,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ewma_latency": self.ewma_latency,
+        }
+
+
+class EndpointPool:
+    """Thread-safe pool of endpoints for one model"""
+
+    def __init__(
+        self,
+        hosts: List[str],
+        strategy: str = "least_outstanding",
+        breaker: Optional[CircuitBreakerPolicy] = None,
+        health_check: Optional[Callable[[str], bool]] = None,
+        ewma_alpha: float = 0.3,
+        name: str = "pool",
+    ):
+        if not hosts:
+            raise ValueError("An endpoint pool needs at least one host")
+        if strategy not in ("least_outstanding", "latency_weighted"):
+            raise ValueError(f"Unknown routing strategy: {strategy}")
+        self.name = name
+        self.endpoints = [Endpoint(host) for host in hosts]
+        self.strategy = strategy
+        self.breaker = breaker or CircuitBreakerPolicy()
+        self.health_check = health_check
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+        self._stop_health = threading.Event()
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == CLOSED:
+            return True
+        if endpoint.state == OPEN and now - endpoint.opened_at >= self.breaker.open_seconds:
+            endpoint.state = HALF_OPEN
+        # A half-open endpoint takes exactly one probe request at a time
+        return endpoint.state == HALF_OPEN and not endpoint.probing
+
+    def _score(self, endpoint: Endpoint) -> float:
+        if self.strategy == "least_outstanding":
+            return endpoint.outstanding
+        # Unknown latency scores like the fastest host so new hosts get traffic
+        known = [e.ewma_latency for e in self.endpoints if e.ewma_latency is not None]
+        latency = endpoint.ewma_latency if endpoint.ewma_latency is not None else (min(known) if known else 1.0)
+        return (endpoint.outstanding + 1) * latency
+
+    def acquire(self) -> Endpoint:
+        """Pick an endpoint and count the request as outstanding on it"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if self._available(e, now)]
+            if not candidates:
+                raise NoHealthyEndpointError(f"All endpoints of '{self.name}' are ejected")
+
+            best_score = min(self._score(e) for e in candidates)
+            endpoint = random.choice([e for e in candidates if self._score(e) == best_score])
+            if endpoint.state == HALF_OPEN:
+                endpoint.probing = True
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float, error: Optional[BaseException] = None):
+        """Record the outcome of a request and update the circuit breaker
+
+        Only transport errors count against the host: a cancelled run or a request the
+        host rejected as invalid says nothing about the host's health.
+        """
+        slow = self.breaker.slow_call_threshold is not None and latency > self.breaker.slow_call_threshold
+        failed = (error is not None and is_transport_error(error)) or slow
+        event = None
+
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.probing = False
+            if error is None:
+                if endpoint.ewma_latency is None:
+                    endpoint.ewma_latency = latency
+                else:
+                    endpoint.ewma_latency += self.ewma_alpha * (latency - endpoint.ewma_latency)
+
+            if failed:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.state == HALF_OPEN or (
+                    endpoint.state == CLOSED and endpoint.consecutive_failures >= self.breaker.failure_threshold
+                ):
+                    endpoint.state = OPEN
+                    endpoint.opened_at = time.monotonic()
+                    event = EventType.ENDPOINT_EJECTED
+            else:
+                endpoint.consecutive_failures = 0
+                if endpoint.state != CLOSED:
+                    endpoint.state = CLOSED
+                    event = EventType.ENDPOINT_READMITTED
+
+        if event is not None:
+            events.emit(Event(
+                type=event,
+                source="llm_pool",
+                data={
+                    "pool": self.name,
+                    "host": endpoint.host,
+                    "reason": str(error) if error is not None else ("slow" if slow else None),
+                }
+            ))
+
+    @contextmanager
+    def lease(self) -> Iterator[Endpoint]:
+        """Acquire an endpoint for the duration of one request"""
+        endpoint = self.acquire()
+        started = time.perf_counter()
+        try:
+            yield endpoint
+        except BaseException as e:
+            self.release(endpoint, time.perf_counter() - started, e)
+            raise
+        self.release(endpoint, time.perf_counter() - started)
+
+    def check_health(self):
+        """Run the health check on ejected endpoints and re-admit the healthy ones"""
+        if self.health_check is None:
+            return
+        for endpoint in self.endpoints:
+            if endpoint.state == CLOSED:
+                continue
+            try:
+                healthy = self.health_check(endpoint.host)
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    endpoint.state = CLOSED
+                    endpoint.consecutive_failures = 0
+                events.emit(Event(
+                    type=EventType.ENDPOINT_READMITTED,
+                    source="llm_pool",
+                    data={"pool": self.name, "host": endpoint.host, "reason": "health check"}
+                ))
+
+    def start_health_checks(self, interval: float = 10.0):
+        """Run `check_health` periodically in a daemon thread"""
+        if self._health_thread is not None:
+            return
+        self._stop_health.clear()
+
+        def loop():
+            while not self._stop_health.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name=f"orchestra-health-{self.name}", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop_health.set()
+        self._health_thread = None
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
+
+
+def ollama_health_check(host: str) -> bool:
+    """Health check for Ollama hosts: the server answers a model listing"""
+    from orchestra.llm.ollama_llm import get_client
+
+    get_client(host, timeout=2.0).list()
+    return True
+
+
+_pools: Dict[str, EndpointPool] = {}
+_configured = False
+_pools_lock = threading.Lock()
+
+
+def _load_configured_pools():
+    global _configured
+    with _pools_lock:
+        if _configured:
+            return
+        _configured = True
+        from orchestra.config import OLLAMA_HOSTS
+
+        hosts = [host.strip() for host in (OLLAMA_HOSTS or "").split(",") if host.strip()]
+        if hosts and "ollama" not in _pools:
+            _pools["ollama"] = EndpointPool(hosts, health_check=ollama_health_check, name="ollama")
+
+
+def register_pool(
+    model: str,
+    hosts: List[str],
+    strategy: str = "least_outstanding",
+    breaker: Optional[CircuitBreakerPolicy] = None,
+    health_check: Optional[Callable[[str], bool]] = None,
+) -> EndpointPool:
+    """
+    Serve `model` from several hosts.
+
+    Args:
+        model: Model or provider name (a pool for "ollama" also serves "ollama/<model>")
+        hosts: Backend hosts, e.g. ["http://gpu-1:11434", "http://gpu-2:11434"]
+        strategy: "least_outstanding" or "latency_weighted"
+        breaker: Circuit breaker settings
+        health_check: Callable probing a host, used by `check_health()`
+    """
+    pool = EndpointPool(hosts, strategy=strategy, breaker=breaker, health_check=health_check, name=model)
+    with _pools_lock:
+        _pools[model] = pool
+    return pool
+
+
+def unregister_pool(model: str):
+    with _pools_lock:
+        pool = _pools.pop(model, None)
+    if pool is not None:
+        pool.stop_health_checks()
+
+
+def get_pool(model: str) -> Optional[EndpointPool]:
+    """The pool serving `model`, looked up by model name and then by provider name"""
+    if not _configured:
+        _load_configured_pools()
+    pool = _pools.get(model)
+    if pool is None and _pools:
+        from orchestra.llm.registry import resolve_provider
+
+        try:
+            provider, _ = resolve_provider(model)
+        except ValueError:
+            return None
+        pool = _pools.get(provider.name)
+    return pool
+
+
+def pool_stats() -> Dict[str, List[Dict]]:
+    """Per-host stats of every pool"""
+    return {model: pool.stats() for model, pool in list(_pools.items())}
+
+
+pool = _sys.modules[__name__]
@@ -0,0 +1,192 @@
+"""
+Registry of LLM providers.
+
+A provider is registered under a name plus optional model-name prefixes and points to
+an invoke function, given either as a callable or as a ``"module:function"`` import
+path. Import paths are only imported the first time the provider is used, so backends
+and their third-party clients are never loaded unless a model actually needs them.
+
+Invoke functions have the signature::
+
+    fn(system_message, user_message, payload, model_name=None) -> (response, Usage)
+
+and may additionally accept ``host=`` and ``timeout=`` keyword arguments, which are only
+passed when a specific host or timeout is requested. A provider may also name a
+``preload`` function, ``fn(model_name=None, host=None)``, that loads a model into memory
+ahead of the first request (see `llm.base.warmup_models`).
+
+``model_name`` is the concrete model to run, resolved from the requested model:
+
+- ``"ollama"``          -> provider ``ollama``, backend default model (``None``)
+- ``"ollama/llama3"``   -> provider ``ollama``, model ``"llama3"`` (prefixes ending in
+  ``/`` or ``:`` are namespaces and are stripped)
+- ``"gpt-3.5-turbo"``   -> provider ``openai``, model ``"gpt-3.5-turbo"``
+"""
+
+import importlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+import sys as _sys
+
+
+class ProviderCapabilities(BaseModel):
+    """Features supported by a provider"""
+
+    tool_calling: bool = Field(True, description="Native function/tool calling")
+    streaming: bool = Field(False, description="Incremental token streaming")
+    json_mode: bool = Field(False, description="Constrained JSON output")
+    batching: bool = Field(False, description="Several prompts in one request")
+    constrained_decoding: bool = Field(False, description="Output decoding constrained to a JSON schema")
+
+
+class Provider(BaseModel):
+    """A registered LLM backend"""
+
+    name: str = Field(..., description="Provider name, also usable as a model name")
+    target: Union[str, Callable] = Field(..., description="Invoke function or its 'module:function' path")
+    prefixes: List[str] = Field(default_factory=list, description="Model-name prefixes served by this provider")
+    capabilities: ProviderCapabilities = Field(default_factory=ProviderCapabilities)
+    preload: Optional[Union[str, Callable]] = Field(
+        None, description="Function loading a model ahead of use, or its 'module:function' path"
+    )
+
+    _invoke: Optional[Callable] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def loaded(self) -> bool:
+        return self._invoke is not None or callable(self.target)
+
+    def load(self) -> Callable:
+        """Return the invoke function, importing the backend module on first use"""
+        if callable(self.target):
+            return self.target
+        if self._invoke is None:
+            with self._lock:
+                if self._invoke is None:
+                    self._invoke = _import(self.target)
+        return self._invoke
+
+    def load_preload(self) -> Optional[Callable]:
+        """Return the preload function, if the provider has one"""
+        if self.preload is None or callable(self.preload):
+            return self.preload
+        return _import(self.preload)
+
+
+def _import(path: str) -> Callable:
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+_providers: Dict[str, Provider] = {}
+_registry_lock = threading.Lock()
+
+
+def register_provider(
+    name: str,
+    target: Union[str, Callable],
+    prefixes: Optional[List[str]] = None,
+    capabilities: Optional[ProviderCapabilities] = None,
+    replace: bool = False,
+    preload: Optional[Union[str, Callable]] = None,
+) -> Provider:
+    """
+    Register an LLM provider.
+
+    Args:
+        name: Provider name; `model_invoke(model=name)` uses the backend's default model
+        target: Invoke function, or a "module:function" path imported lazily on first use
+        prefixes: Model-name prefixes routed to this provider (e.g. "ollama/", "gpt-")
+        capabilities: Features the provider supports
+        replace: Allow overriding an existing provider with the same name
+        preload: Function loading a model ahead of the first request, or a "module:function" path
+    """
+    provider = Provider(
+        name=name,
+        target=target,
+        prefixes=prefixes or [],
+        capabilities=capabilities or ProviderCapabilities(),
+        preload=preload,
+    )
+    with _registry_lock:
+        if name in _providers and not replace:
+            raise ValueError(f"Provider '{name}' is already registered")
+        _providers[name] = provider
+    return provider
+
+
+def unregister_provider(name: str):
+    """Remove a provider from the registry"""
+    with _registry_lock:
+        _providers.pop(name, None)
+
+
+def list_providers() -> List[Provider]:
+    return list(_providers.values())
+
+
+def resolve_provider(model: str) -> Tuple[Provider, Optional[str]]:
+    """
+    Find the provider serving `model`.
+
+    Returns:
+        The provider and the concrete model name to pass to it (None for the backend default)
+    """
+    provider = _providers.get(model)
+    if provider is not None:
+        return provider, None
+
+    # Longest matching prefix wins
+    best: Optional[Tuple[Provider, str]] = None
+    for candidate in list(_providers.values()):
+        for prefix in candidate.prefixes:
+            if model.startswith(prefix) and (best is None or len(prefix) > len(best[1])):
+                best = (candidate, prefix)
+
+    if best is None:
+        raise ValueError(
+            f"Invalid model: {model}. Providers available: "
+            + ", ".join(
+                f"{p.name} ({', '.join(p.prefixes)})" if p.prefixes else p.name
+                for p in _providers.values()
+            )
+        )
+
+    provider, prefix = best
+    if prefix.endswith(("/", ":")):
+        return provider, model[len(prefix):] or None
+    return provider, model
+
+
+def get_capabilities(model: str) -> ProviderCapabilities:
+    """Capabilities of the provider serving `model`"""
+    provider, _ = resolve_provider(model)
+    return provider.capabilities
+
+
+# Built-in providers; their modules (and the ollama/openai clients) are imported on first use
+register_provider(
+    "ollama",
+    "orchestra.llm.ollama_llm:ollama_invoke_with_usage",
+    prefixes=["ollama/"],
+    capabilities=ProviderCapabilities(tool_calling=True, streaming=True, json_mode=True, constrained_decoding=True),
+    preload="orchestra.llm.ollama_llm:ollama_preload",
+)
+register_provider(
+    "deepseek",
+    "orchestra.llm.deepseek_llm:deepseek_invoke_with_usage",
+    prefixes=["deepseek/", "deepseek-"],
+    capabilities=ProviderCapabilities(tool_calling=True, streaming=True, json_mode=True, constrained_decoding=True),
+)
+register_provider(
+    "openai",
+    "orchestra.llm.openai_llm:openai_invoke_with_usage",
+    prefixes=["openai/", "gpt-"],
+    capabilities=ProviderCapabilities(tool_calling=True, streaming=True, json_mode=True),
+)
+
+registry = _sys.modules[__name__]
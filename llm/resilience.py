@@ -0,0 +1,304 @@
+"""
+Timeouts, retries and hedged requests for model calls.
+
+`model_invoke` runs every backend call through `call_with_resilience`:
+
+- each call gets a timeout, configurable per pipeline stage
+- transport errors (connection failures, timeouts, 5xx/429 responses) are retried
+  with full-jitter exponential backoff
+- optionally, when the primary request has not answered after a delay (fixed, or the
+  observed p90 latency of the model), a duplicate request is sent to a second host
+  or model and whichever answers first wins
+
+Calls only move to a worker thread when a timeout or hedge is configured, or when they
+run inside a run (so the run can be cancelled while the call waits). A losing
+hedge or a timed-out request cannot be interrupted mid-flight in a synchronous HTTP
+client: it is cancelled if it has not started yet, otherwise its result is discarded
+and its client-side timeout ends it. Hedging therefore always runs with a finite
+timeout (``hedge.timeout`` when none is configured), and the usage of abandoned
+requests that still complete is reported through ``on_abandoned``.
+
+Inside a run, waits also stop as soon as the run's `CancellationToken` is cancelled or
+its deadline passes, and the call timeout never extends past the deadline. Calls inside a
+run without any timeout get ``cancellable_timeout`` as their client timeout, so the HTTP
+request of a cancelled run ends on its own.
+"""
+
+import contextvars
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from orchestra.core.cancellation import CancellationToken, RunCancelledError, current_cancellation
+from orchestra.core.events import events, Event, EventType
+
+import sys as _sys
+
+
+class CallTimeoutError(TimeoutError):
+    """Raised when a model call does not answer within its timeout"""
+
+
+class RetryPolicy(BaseModel):
+    """Retries with full-jitter exponential backoff"""
+
+    max_attempts: int = Field(3, description="Total attempts, including the first one")
+    base_delay: float = Field(0.5, description="Backoff base in seconds")
+    max_delay: float = Field(8.0, description="Upper bound of a single backoff in seconds")
+
+    def backoff(self, attempt: int) -> float:
+        """Sleep before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class HedgePolicy(BaseModel):
+    """Duplicate slow requests to a second host or model"""
+
+    enabled: bool = Field(False, description="Send hedged requests")
+    delay: Optional[float] = Field(None, description="Fixed hedge delay in seconds; None uses the observed quantile")
+    quantile: float = Field(0.9, description="Latency quantile used as the adaptive hedge delay")
+    min_samples: int = Field(20, description="Samples needed before the adaptive delay is trusted")
+    fallback_delay: float = Field(2.0, description="Hedge delay used until enough samples are observed")
+    model: Optional[str] = Field(None, description="Model for the hedged request (defaults to the primary model)")
+    host: Optional[str] = Field(None, description="Host for the hedged request (defaults to the primary host)")
+    timeout: float = Field(60.0, description="Call timeout while hedging when no other timeout is set, so losers always end")
+
+
+class ResiliencePolicy(BaseModel):
+    """Timeout, retry and hedging settings for model calls"""
+
+    timeout: Optional[float] = Field(None, description="Default per-call timeout in seconds")
+    stage_timeouts: Dict[str, float] = Field(default_factory=dict, description="Per-stage timeouts in seconds")
+    cancellable_timeout: Optional[float] = Field(
+        300.0,
+        description="Client timeout of calls inside a run that have no other timeout, so a cancelled call cannot hold its connection forever",
+    )
+    retry: RetryPolicy = Field(default_factory=RetryPolicy)
+    hedge: HedgePolicy = Field(default_factory=HedgePolicy)
+
+    def timeout_for(self, stage: Optional[str]) -> Optional[float]:
+        timeout = self.stage_timeouts.get(stage, self.timeout) if stage else self.timeout
+        if timeout is None and self.hedge.enabled:
+            timeout = self.hedge.timeout
+        return timeout
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+_policy = ResiliencePolicy()
+latencies = LatencyTracker()
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="orchestra-llm")
+
+# How often a waiting call re-checks the run's cancellation token
+_CANCEL_POLL_INTERVAL = 0.05
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    return _policy
+
+
+def set_resilience_policy(policy: ResiliencePolicy):
+    """Replace the policy used by every model call"""
+    global _policy
+    _policy = policy
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    """Whether an exception is a transient transport failure worth retrying"""
+    if isinstance(exc, RunCancelledError):
+        return False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+def _submit(fn: Callable, *args) -> Future:
+    # Keep the caller's context (run id, usage, ...) inside the worker thread
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, fn, *args)
+
+
+def _hedge_delay(policy: HedgePolicy, model: str) -> float:
+    if policy.delay is not None:
+        return policy.delay
+    observed = latencies.quantile(model, policy.quantile, policy.min_samples)
+    return observed if observed is not None else policy.fallback_delay
+
+
+def _abandon(future: Future, on_abandoned: Optional[Callable[[Any], None]]):
+    """Cancel a request nobody waits for; if it already runs, hand its result to `on_abandoned`"""
+    if future.cancel() or on_abandoned is None:
+        return
+
+    def report(done: Future):
+        if done.cancelled() or done.exception() is not None:
+            return
+        try:
+            on_abandoned(done.result())
+        except Exception:
+            pass
+
+    future.add_done_callback(report)
+
+
+def _wait(pending: set, timeout: Optional[float], token: Optional[CancellationToken]):
+    """`concurrent.futures.wait` for the first completion that also wakes up on cancellation"""
+    if token is None:
+        return wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+    end = None if timeout is None else time.perf_counter() + timeout
+    while True:
+        remaining = None if end is None else max(0.0, end - time.perf_counter())
+        step = _CANCEL_POLL_INTERVAL if remaining is None else min(_CANCEL_POLL_INTERVAL, remaining)
+        done, not_done = wait(pending, timeout=step, return_when=FIRST_COMPLETED)
+        if done or token.done or (end is not None and time.perf_counter() >= end):
+            return done, not_done
+
+
+def _attempt(
+    call: Callable[[str, Optional[str]], Any],
+    model: str,
+    host: Optional[str],
+    stage: Optional[str],
+    timeout: Optional[float],
+    hedge: HedgePolicy,
+    token: Optional[CancellationToken] = None,
+    on_abandoned: Optional[Callable[[Any], None]] = None,
+) -> Any:
+    if timeout is None and not hedge.enabled and token is None:
+        started = time.perf_counter()
+        result = call(model, host)
+        latencies.observe(model, time.perf_counter() - started)
+        return result
+
+    started = time.perf_counter()
+    deadline = started + timeout if timeout is not None else None
+    primary = _submit(call, model, host)
+    pending = {primary}
+    hedged = None
+
+    if hedge.enabled:
+        delay = _hedge_delay(hedge, model)
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - time.perf_counter()))
+        done, _ = _wait(pending, delay, token)
+        if not done and (token is None or not token.done) and (deadline is None or time.perf_counter() < deadline):
+            hedge_model = hedge.model or model
+            hedge_host = hedge.host or host
+            events.emit(Event(
+                type=EventType.LLM_HEDGE,
+                source="llm",
+                data={"model": model, "stage": stage, "hedge_model": hedge_model, "hedge_host": hedge_host, "delay": delay}
+            ))
+            hedged = _submit(call, hedge_model, hedge_host)
+            pending.add(hedged)
+
+    error: Optional[BaseException] = None
+    while pending:
+        if token is not None and token.done:
+            break
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        done, pending = _wait(pending, remaining, token)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                for loser in pending | (done - {future}):
+                    _abandon(loser, on_abandoned)
+                if future is primary:
+                    latencies.observe(model, time.perf_counter() - started)
+                elif hedged is not None:
+                    events.emit(Event(
+                        type=EventType.LLM_HEDGE,
+                        source="llm",
+                        data={"model": model, "stage": stage, "winner": "hedge"}
+                    ))
+                return future.result()
+            error = future.exception()
+
+    for future in pending:
+        _abandon(future, on_abandoned)
+    if error is not None and not pending:
+        raise error
+    if token is not None:
+        token.check()
+    raise CallTimeoutError(f"Model '{model}' did not answer within {timeout:.2f}s")
+
+
+def call_with_resilience(
+    call: Callable[[str, Optional[str]], Any],
+    model: str,
+    stage: Optional[str] = None,
+    host: Optional[str] = None,
+    policy: Optional[ResiliencePolicy] = None,
+    on_abandoned: Optional[Callable[[Any], None]] = None,
+) -> Tuple[Any, int]:
+    """
+    Run `call(model, host)` with the timeout, retry and hedging policy.
+
+    `on_abandoned` receives the result of every request that completes after it was given
+    up on (a losing hedge, a timed-out attempt), e.g. to account for its token usage.
+
+    Returns:
+        The call result and the number of attempts it took
+    """
+    policy = policy or _policy
+    token = current_cancellation.get()
+    attempts = max(1, policy.retry.max_attempts)
+
+    for attempt in range(1, attempts + 1):
+        timeout = policy.timeout_for(stage)
+        if token is not None:
+            token.check()
+            remaining = token.remaining()
+            if remaining is not None:
+                timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            return _attempt(call, model, host, stage, timeout, policy.hedge, token, on_abandoned), attempt
+        except Exception as e:
+            if attempt >= attempts or not is_transport_error(e):
+                raise
+            delay = policy.retry.backoff(attempt)
+            events.emit(Event(
+                type=EventType.LLM_RETRY,
+                source="llm",
+                data={"model": model, "stage": stage, "attempt": attempt, "delay": delay, "error": str(e)}
+            ))
+            if token is not None:
+                token.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+resilience = _sys.modules[__name__]
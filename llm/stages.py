@@ -0,0 +1,133 @@
+"""
+Per-stage model selection and generation options.
+
+Each pipeline stage ("planning", "tool_binding", "synthesis", "synthesis_map",
+"history_summary") can run on its own model with its own generation options, e.g. a
+small fast model with a capped ``num_predict`` for planning and tool binding and the
+large model only for synthesis.
+
+A `StageConfig` is resolved per call, field by field, from (first match wins):
+
+1. the run: ``run(..., stages={...})``
+2. the caller: the model, options and format passed to `model_invoke`; for tool binding
+   these come from the agent's ``stages`` (see `agent_stage`)
+3. the global policy's ``stages[stage]``
+4. the global policy's ``default`` (model ``"ollama"``, ``temperature`` from ``TEMPERATURE``)
+
+Options of all levels are merged, the more specific level winning per key.
+
+Usage::
+
+    set_stage_policy(StagePolicy(stages={
+        "planning": StageConfig(model="ollama/qwen2.5:3b", options={"num_predict": 512}),
+        "tool_binding": StageConfig(model="ollama/qwen2.5:3b", options={"num_predict": 256}),
+        "synthesis": StageConfig(model="ollama/llama3.1:70b", options={"num_ctx": 16384}),
+    }))
+"""
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from orchestra.config import TEMPERATURE
+
+import sys as _sys
+
+DEFAULT_MODEL = "ollama"
+
+
+class StageConfig(BaseModel):
+    """Model and generation options for a stage; unset fields fall back to the next level"""
+
+    model: Optional[str] = Field(None, description="Provider or model name, resolved through `llm.registry`")
+    options: Dict[str, Any] = Field(
+        default_factory=dict, description="Generation options, e.g. temperature, num_ctx, num_predict, top_p, seed"
+    )
+    format: Optional[Union[str, Dict[str, Any]]] = Field(None, description='"json" or a JSON schema the output must follow')
+
+
+def _default_options() -> Dict[str, Any]:
+    return {"temperature": float(TEMPERATURE)} if TEMPERATURE else {}
+
+
+class StagePolicy(BaseModel):
+    """Global stage configuration"""
+
+    default: StageConfig = Field(
+        default_factory=lambda: StageConfig(model=DEFAULT_MODEL, options=_default_options()),
+        description="Used by every stage",
+    )
+    stages: Dict[str, StageConfig] = Field(default_factory=dict, description="Per-stage overrides of `default`")
+
+
+_policy = StagePolicy()
+
+# Stage overrides of the current run
+current_stages: ContextVar[Optional[Dict[str, StageConfig]]] = ContextVar("current_stages", default=None)
+
+
+def get_stage_policy() -> StagePolicy:
+    return _policy
+
+
+def set_stage_policy(policy: StagePolicy):
+    global _policy
+    _policy = policy
+
+
+def _as_config(value: Union[StageConfig, Dict[str, Any], None]) -> Optional[StageConfig]:
+    if value is None or isinstance(value, StageConfig):
+        return value
+    return StageConfig.model_validate(value)
+
+
+def resolve_stage(
+    stage: Optional[str],
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+) -> StageConfig:
+    """The effective config of `stage` for a call with the given caller settings"""
+    run_stages = current_stages.get() or {}
+    levels = [
+        _policy.default,
+        _policy.stages.get(stage) if stage else None,
+        StageConfig(model=model, options=options or {}, format=format),
+        _as_config(run_stages.get(stage)) if stage else None,
+    ]
+    resolved = StageConfig()
+    merged: Dict[str, Any] = {}
+    for level in levels:
+        if level is None:
+            continue
+        if level.model is not None:
+            resolved.model = level.model
+        if level.format is not None:
+            resolved.format = level.format
+        merged.update(level.options)
+    resolved.options = merged
+    resolved.model = resolved.model or DEFAULT_MODEL
+    return resolved
+
+
+def agent_stage(agent: Any, stage: str) -> StageConfig:
+    """
+    Caller-level config of an agent for `stage`: the agent's own ``stages[stage]``, with
+    the agent's ``model`` used only when neither it nor the global policy picks one.
+    """
+    own = _as_config((getattr(agent, "stages", None) or {}).get(stage)) or StageConfig()
+    global_stage = _policy.stages.get(stage)
+    model = own.model or (global_stage.model if global_stage else None) or getattr(agent, "model", None)
+    return StageConfig(model=model, options=own.options, format=own.format)
+
+
+def stage_model(stage: str, agent: Any = None) -> str:
+    """The model `stage` runs on, for warmup and prompt decisions"""
+    if agent is not None:
+        config = agent_stage(agent, stage)
+        return resolve_stage(stage, model=config.model).model
+    return resolve_stage(stage).model
+
+
+stages = _sys.modules[__name__]
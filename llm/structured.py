@@ -0,0 +1,57 @@
+"""
+Structured output for tool-calling requests.
+
+Planning and tool binding send a response schema (`payload`). Backends whose provider
+supports constrained decoding (``ProviderCapabilities.constrained_decoding``, e.g.
+Ollama's ``format`` option) are asked to decode against that JSON schema, so the answer
+always parses. Other backends' answers go through the tolerant parser in
+`utils.json_repair`. When a tool binding is still unusable, `ToolAgent` re-asks the
+model up to ``reasks`` times, appending what was wrong to the same prompt.
+"""
+
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from orchestra.llm.registry import get_capabilities
+
+import sys as _sys
+
+
+class StructuredPolicy(BaseModel):
+    """How structured responses are obtained"""
+
+    constrained: bool = Field(True, description="Use constrained decoding where the provider supports it")
+    reasks: int = Field(1, description="Re-asks after an unusable tool binding")
+
+
+_policy = StructuredPolicy()
+
+
+def get_structured_policy() -> StructuredPolicy:
+    return _policy
+
+
+def set_structured_policy(policy: StructuredPolicy):
+    global _policy
+    _policy = policy
+
+
+def response_schema(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON schema of a response: a function definition's parameters or the schema itself"""
+    return payload.get("parameters", payload)
+
+
+def constrained_format(payload: Optional[Dict[str, Any]], model: str) -> Optional[Dict[str, Any]]:
+    """Schema to constrain the response of `model` to, or None"""
+    if not payload or not _policy.constrained:
+        return None
+    try:
+        if not get_capabilities(model).constrained_decoding:
+            return None
+    except ValueError:
+        return None
+    return response_schema(payload)
+
+
+structured = _sys.modules[__name__]
@@ -0,0 +1,130 @@
+import contextvars
+import threading
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+import sys as _sys
+
+_NS = 1_000_000_000
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a run has used up its token or model-time budget"""
+
+
+class Usage(BaseModel):
+    """Token and timing usage of one or more model calls"""
+
+    model: Optional[str] = Field(None, description="Model backend that served the call")
+    stage: Optional[str] = Field(None, description="Pipeline stage that issued the call")
+    calls: int = Field(1, description="Number of model calls aggregated in this record")
+    prompt_tokens: int = Field(0, description="Tokens in the prompt (prompt_eval_count)")
+    completion_tokens: int = Field(0, description="Generated tokens (eval_count)")
+    load_duration: float = Field(0.0, description="Seconds spent loading the model")
+    prompt_eval_duration: float = Field(0.0, description="Seconds spent evaluating the prompt")
+    eval_duration: float = Field(0.0, description="Seconds spent generating tokens")
+    total_duration: float = Field(0.0, description="Total seconds reported by the backend")
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation throughput, or None if the backend reported no eval time"""
+        if not self.eval_duration:
+            return None
+        return self.completion_tokens / self.eval_duration
+
+    @classmethod
+    def from_ollama(cls, response: Any, model: Optional[str] = None) -> "Usage":
+        """Build a usage record from the counters of an Ollama chat response"""
+
+        def counter(key: str) -> int:
+            try:
+                return response.get(key) or 0
+            except AttributeError:
+                return 0
+
+        return cls(
+            model=model,
+            prompt_tokens=counter("prompt_eval_count"),
+            completion_tokens=counter("eval_count"),
+            load_duration=counter("load_duration") / _NS,
+            prompt_eval_duration=counter("prompt_eval_duration") / _NS,
+            eval_duration=counter("eval_duration") / _NS,
+            total_duration=counter("total_duration") / _NS,
+        )
+
+    def add(self, other: "Usage"):
+        """Accumulate another record into this one"""
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.load_duration += other.load_duration
+        self.prompt_eval_duration += other.prompt_eval_duration
+        self.eval_duration += other.eval_duration
+        self.total_duration += other.total_duration
+
+    def summary(self) -> Dict[str, Any]:
+        data = self.model_dump(exclude_none=True)
+        data["total_tokens"] = self.total_tokens
+        data["tokens_per_second"] = self.tokens_per_second
+        return data
+
+
+class Budget(BaseModel):
+    """Optional per-run limits on model usage"""
+
+    max_tokens: Optional[int] = Field(None, description="Maximum prompt + completion tokens for the run")
+    max_seconds: Optional[float] = Field(None, description="Maximum model time (total_duration) for the run")
+
+
+class RunUsage:
+    """Usage accumulated over a run, in total and per stage"""
+
+    def __init__(self, budget: Optional[Budget] = None):
+        self.budget = budget
+        self.total = Usage(calls=0)
+        self.by_stage: Dict[str, Usage] = {}
+        self._lock = threading.Lock()
+
+    def add(self, usage: Usage):
+        with self._lock:
+            self.total.add(usage)
+            stage = usage.stage or "unknown"
+            if stage not in self.by_stage:
+                self.by_stage[stage] = Usage(stage=stage, calls=0)
+            self.by_stage[stage].add(usage)
+
+    def exceeded(self) -> Optional[str]:
+        """Describe the exhausted budget limit, or None if within budget"""
+        if self.budget is None:
+            return None
+        if self.budget.max_tokens is not None and self.total.total_tokens >= self.budget.max_tokens:
+            return f"token budget exhausted ({self.total.total_tokens}/{self.budget.max_tokens} tokens)"
+        if self.budget.max_seconds is not None and self.total.total_duration >= self.budget.max_seconds:
+            return f"time budget exhausted ({self.total.total_duration:.2f}/{self.budget.max_seconds:.2f} s)"
+        return None
+
+    def check(self):
+        """Raise `BudgetExceededError` if the run may not issue more model calls"""
+        reason = self.exceeded()
+        if reason:
+            raise BudgetExceededError(reason)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total": self.total.summary(),
+                "by_stage": {stage: usage.summary() for stage, usage in self.by_stage.items()},
+            }
+
+
+# Usage of the run currently executing in this context; set by `orchestra.run()`
+current_usage: contextvars.ContextVar[Optional[RunUsage]] = contextvars.ContextVar(
+    "orchestra_run_usage", default=None
+)
+
+usage = _sys.modules[__name__]
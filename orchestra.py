@@ -1,13 +1,35 @@
-from typing import List, Optional
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Union
 
 from .core.task import task
 from .core.agent import BaseAgent
 from .core.task import TaskList
-from .core.events import events, Event, EventType
-from .core.context import ChatMessage
+from .core.executor import executor
+from .core.sandbox import sandbox
+from .core.resources import close_shared_pools
+from .core.artifacts import close_artifact_store
+from .core.tools import Tool, ateardown_tools, teardown_tools
+from .core.cancellation import CancellationToken, RunCancelledError, current_cancellation, resolve_token
+from .core.events import events, Event, EventType, current_run_id
+from .core.context import ChatMessage, OrchestraContext
+from .llm.base import warmup_models
+from .llm.stages import StageConfig, current_stages, stage_model
+from .llm.usage import Budget, RunUsage, current_usage
 
 
-def run(query: str, agent_list: List[BaseAgent], task_list: TaskList = None, chat_history: Optional[List[ChatMessage]] = None) -> str:
+def run(
+    query: str,
+    agent_list: List[BaseAgent],
+    task_list: TaskList = None,
+    chat_history: Optional[Union[List[ChatMessage], OrchestraContext]] = None,
+    budget: Optional[Budget] = None,
+    run_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    stages: Optional[Dict[str, StageConfig]] = None,
+) -> str:
     """
     Main entry point for Orchestra framework.
 
@@ -15,8 +37,166 @@ def run(query: str, agent_list: List[BaseAgent], task_list: TaskList = None, cha
         query: The user's query to process
         agent_list: List of available agents
         task_list: Optional pre-defined task list (if None, will be generated automatically)
-        chat_history: Optional list of previous chat messages for context
+        chat_history: Optional previous chat messages, or the session's `OrchestraContext` to
+            also keep a rolling summary of older turns
+        budget: Optional token/model-time budget; model calls stop once it is exhausted
+        run_id: Optional id for the run (generated if omitted)
+        timeout: Optional time limit for the whole run, in seconds
+        deadline: Optional absolute deadline for the run, as a `time.time()` timestamp
+        cancel_token: Optional caller-held `CancellationToken` to cancel the run with
+        stages: Optional per-stage model and options for this run, e.g.
+            ``{"synthesis": StageConfig(model="ollama/llama3.1:70b")}`` (see `llm.stages`)
+
+    A run that is cancelled or passes its deadline stops its in-flight model call, skips
+    the steps that have not started and returns the partial results it has.
+    """
+    # Every event emitted while this run executes is tagged with its id
+    run_token = current_run_id.set(run_id or uuid.uuid4().hex)
+    # Model calls made during the run add their usage here and check the budget
+    usage_token = current_usage.set(RunUsage(budget))
+    # Every stage checks this token before starting work
+    cancellation_token = current_cancellation.set(resolve_token(timeout, deadline, cancel_token))
+    stages_token = current_stages.set(stages)
+    try:
+        return _run(query, agent_list, task_list, chat_history)
+    except Exception as e:
+        events.emit(Event(
+            type=EventType.ORCHESTRA_ERROR,
+            source="orchestra",
+            data={"error": str(e)}
+        ))
+        raise
+    finally:
+        current_stages.reset(stages_token)
+        current_cancellation.reset(cancellation_token)
+        current_usage.reset(usage_token)
+        current_run_id.reset(run_token)
+
+
+async def arun(
+    query: str,
+    agent_list: List[BaseAgent],
+    task_list: TaskList = None,
+    chat_history: Optional[Union[List[ChatMessage], OrchestraContext]] = None,
+    budget: Optional[Budget] = None,
+    run_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    stages: Optional[Dict[str, StageConfig]] = None,
+) -> str:
+    """Async variant of `run`; the run executes in a worker thread and stops when the awaiting task is cancelled"""
+    token = resolve_token(timeout, deadline, cancel_token)
+    try:
+        return await asyncio.to_thread(
+            run,
+            query,
+            agent_list,
+            task_list=task_list,
+            chat_history=chat_history,
+            budget=budget,
+            run_id=run_id,
+            cancel_token=token,
+            stages=stages,
+        )
+    except asyncio.CancelledError:
+        # The worker thread cannot be killed; tell it to stop at its next check
+        token.cancel("awaiting task cancelled")
+        raise
+
+
+def _tools_of(agent_list: List[BaseAgent]) -> List[Tool]:
+    # Process and sandbox tools are set up inside their workers, not in this process
+    return [
+        tool
+        for agent in agent_list
+        for tool in getattr(agent, "tools", [])
+        if tool.execution in (executor.INLINE, executor.THREAD)
+    ]
+
+
+def _models_of(agent_list: List[BaseAgent]) -> List[str]:
+    # The pipeline stages' models, then each tool agent's tool-binding model
+    models = [stage_model(stage) for stage in ("planning", "synthesis")]
+    models += [stage_model("tool_binding", agent) for agent in agent_list if getattr(agent, "model", None)]
+    return models
+
+
+def warmup(agent_list: List[BaseAgent]) -> Dict[str, Optional[str]]:
+    """
+    Preload every model the given agents and the planner use, so the first run does not
+    pay for loading them.
+
+    Returns:
+        Model -> None if it was loaded, else the error
+    """
+    return warmup_models(_models_of(agent_list))
+
+
+def startup(agent_list: List[BaseAgent], warm_workers: bool = False, warm_models: bool = False):
     """
+    Set up the tools of the given agents ahead of the first run, in agent and tool order.
+
+    Args:
+        agent_list: Agents whose tools should be set up
+        warm_workers: Also start the tool process pool and the sandbox workers
+        warm_models: Also preload the models used by the agents (see `warmup`)
+    """
+    for tool in _tools_of(agent_list):
+        tool.ensure_setup()
+    if warm_workers:
+        executor.warmup()
+        sandbox.get_sandbox()
+    if warm_models:
+        warmup(agent_list)
+
+
+async def astartup(agent_list: List[BaseAgent], warm_workers: bool = False, warm_models: bool = False):
+    """Async variant of `startup`, using the tools' `asetup()`"""
+    for tool in _tools_of(agent_list):
+        await tool.aensure_setup()
+    if warm_workers:
+        await asyncio.to_thread(executor.warmup)
+        await asyncio.to_thread(sandbox.get_sandbox)
+    if warm_models:
+        await asyncio.to_thread(warmup, agent_list)
+
+
+def shutdown():
+    """Tear down tools in reverse setup order, then stop the tool workers, close shared resource pools and drop artifacts"""
+    teardown_tools()
+    sandbox.shutdown()
+    executor.shutdown()
+    close_shared_pools()
+    close_artifact_store()
+
+
+async def ashutdown():
+    """Async variant of `shutdown`, using the tools' `ateardown()`"""
+    await ateardown_tools()
+    await asyncio.to_thread(sandbox.shutdown)
+    await asyncio.to_thread(executor.shutdown)
+    await asyncio.to_thread(close_shared_pools)
+    await asyncio.to_thread(close_artifact_store)
+
+
+def _finish_cancelled(results: List[dict], status: str) -> str:
+    partial_answer = task.generate_partial_answer(results, status)
+    events.emit(Event(
+        type=EventType.ORCHESTRA_CANCELLED,
+        source="orchestra",
+        data={
+            "status": status,
+            "reason": current_cancellation.get().reason,
+            "completed_steps": [r["step"] for r in results if r.get("status") == "success"],
+            "final_answer": partial_answer,
+            "usage": current_usage.get().summary(),
+        }
+    ))
+    return partial_answer
+
+
+def _run(query: str, agent_list: List[BaseAgent], task_list: Optional[TaskList], chat_history: Optional[Union[List[ChatMessage], OrchestraContext]]) -> str:
     events.emit(Event(
         type=EventType.ORCHESTRA_START,
         source="orchestra",
@@ -25,7 +205,10 @@ def run(query: str, agent_list: List[BaseAgent], task_list: TaskList = None, cha
 
     # Generate the task list from the query
     if task_list is None:
-        task_list = task.generate(query, agent_list, history=chat_history)
+        try:
+            task_list = task.generate(query, agent_list, history=chat_history)
+        except RunCancelledError as e:
+            return _finish_cancelled([], e.status)
 
     if agent_list is None:
         raise ValueError("Agent list is required")
@@ -61,7 +244,10 @@ def run(query: str, agent_list: List[BaseAgent], task_list: TaskList = None, cha
 
         # Status emoji and color coding
         status_emoji = (
-            "✅" if status == "success" else "❌" if status == "error" else "❓"
+            "✅" if status == "success"
+            else "❌" if status == "error"
+            else "⏹️" if status in ("cancelled", "timeout")
+            else "❓"
         )
         status_text = f"{status_emoji} {status.upper()}"
 
@@ -103,12 +289,19 @@ def run(query: str, agent_list: List[BaseAgent], task_list: TaskList = None, cha
     # {"status": "success", "agent": "todo_agent", "message": "Task added successfully"}
     # {"status": "success", "agent": "weather_agent", "message": "Weather in New York City is 20 degrees"}
 
-    final_answer = task.generate_final_answer(query, results)
+    # Out of time or cancelled: answer with what was completed instead of calling the model
+    token = current_cancellation.get()
+    if token.done:
+        return _finish_cancelled(results, token.status)
+    try:
+        final_answer = task.generate_final_answer(query, results)
+    except RunCancelledError as e:
+        return _finish_cancelled(results, e.status)
     
     events.emit(Event(
         type=EventType.ORCHESTRA_END,
         source="orchestra",
-        data={"final_answer": final_answer}
+        data={"final_answer": final_answer, "usage": current_usage.get().summary()}
     ))
     
     return final_answer
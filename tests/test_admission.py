@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+from orchestra.core.agent import AgentTask, BaseAgent
+from orchestra.core.admission import (
+    AdmissionController,
+    AdmissionDeadlineError,
+    AdmissionRejectedError,
+    PriorityClass,
+)
+from orchestra.core.task import Task, TaskList
+
+
+def start_waiter(controller, order, label, priority, tenant):
+    def target():
+        try:
+            with controller.admit(priority=priority, tenant=tenant):
+                order.append(label)
+        except AdmissionRejectedError:
+            order.append(f"{label}:dropped")
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def wait_queued(controller, count):
+    for _ in range(200):
+        if controller.queue_length >= count:
+            return
+        time.sleep(0.005)
+    raise AssertionError("requests were not queued")
+
+
+def test_priority_and_fair_queueing():
+    controller = AdmissionController(max_concurrent=1, max_queue=10)
+    order = []
+    threads = []
+
+    with controller.admit():
+        # A batch tenant floods the queue before an interactive request arrives
+        for i in range(3):
+            threads.append(start_waiter(controller, order, f"flood{i}", "batch", "flooder"))
+            wait_queued(controller, i + 1)
+        threads.append(start_waiter(controller, order, "other", "batch", "other"))
+        wait_queued(controller, 4)
+        threads.append(start_waiter(controller, order, "user", "interactive", "user"))
+        wait_queued(controller, 5)
+
+    for thread in threads:
+        thread.join(2)
+
+    assert order[0] == "user"
+    # The second batch tenant is served right after the flooder's first request
+    assert order.index("other") < order.index("flood1")
+
+
+def test_full_queue_is_rejected():
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+    with controller.admit():
+        with pytest.raises(AdmissionRejectedError):
+            with controller.admit():
+                pass
+    assert controller.stats()["rejected"] == 1
+
+
+def test_queued_work_past_deadline_is_dropped():
+    classes = {"interactive": PriorityClass(priority=0, deadline=0.01)}
+    controller = AdmissionController(max_concurrent=1, max_queue=10, classes=classes)
+    with controller.admit():
+        with pytest.raises(AdmissionDeadlineError):
+            with controller.admit():
+                pass
+    assert controller.stats() == {"in_flight": 0, "queued": {"interactive": 0}, "rejected": 0, "dropped": 1}
+
+    # The slot is free again afterwards
+    with controller.admit():
+        assert controller.in_flight == 1
+
+
+def test_cancelled_arun_leaves_the_queue():
+    import asyncio
+
+    controller = AdmissionController(max_concurrent=1, max_queue=10)
+
+    async def main():
+        with controller.admit():
+            task = asyncio.ensure_future(controller.arun("query", [], priority="batch"))
+            while controller.queue_length == 0:
+                await asyncio.sleep(0.005)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The worker thread notices the cancellation and gives up its ticket
+            for _ in range(100):
+                if controller.queue_length == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert controller.queue_length == 0
+
+    asyncio.run(main())
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_full_queue_evicts_lower_priority_work():
+    controller = AdmissionController(max_concurrent=1, max_queue=2)
+    order = []
+
+    with controller.admit():
+        threads = [start_waiter(controller, order, f"batch{i}", "batch", f"job{i}") for i in range(2)]
+        wait_queued(controller, 2)
+        # Interactive work takes the slot of the batch request that would be served last
+        threads.append(start_waiter(controller, order, "user", "interactive", "user"))
+        for _ in range(200):
+            if "batch1:dropped" in order:
+                break
+            time.sleep(0.005)
+        assert order == ["batch1:dropped"]
+
+        # Nothing ranks below another batch request, so it is rejected
+        with pytest.raises(AdmissionRejectedError):
+            with controller.admit(priority="batch"):
+                pass
+
+    for thread in threads:
+        thread.join(2)
+    assert order == ["batch1:dropped", "user", "batch0"]
+    assert controller.stats()["rejected"] == 2
+    # Tenants with nothing queued leave no fair-queueing state behind
+    assert controller._tenant_finish == {} and controller._tenant_queued == {}
+
+
+class StepAgent(BaseAgent):
+    """Records the task it ran"""
+
+    ran: object
+
+    def execute(self, task: AgentTask):
+        self.ran.append(task.task)
+        return {"result": f"{self.name} did {task.task}"}
+
+
+def test_run_behind_admission(monkeypatch):
+    import asyncio
+
+    ran = []
+    agents = [StepAgent(name="first", description="", backstory="", ran=ran), StepAgent(name="second", description="", backstory="", ran=ran)]
+    task_list = TaskList(steps=[
+        Task(step_number=1, task="fetch", agent="first", expected_output="data", is_async=False),
+        Task(step_number=2, task="summarize", agent="second", expected_output="summary", is_async=False),
+    ])
+    synthesized = []
+    monkeypatch.setattr("orchestra.core.task.model_invoke", lambda system, user, *args, **kwargs: synthesized.append(user) or "done")
+    controller = AdmissionController(max_concurrent=2)
+
+    assert controller.run("query", agents, task_list=task_list, tenant="user-1") == "done"
+    assert asyncio.run(controller.arun("query", agents, task_list=task_list, priority="batch")) == "done"
+    assert ran == ["fetch", "summarize"] * 2
+    assert "first did fetch" in synthesized[0] and "second did summarize" in synthesized[0]
+    assert controller.in_flight == 0
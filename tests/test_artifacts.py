@@ -0,0 +1,82 @@
+import pytest
+
+from orchestra.core import agent as agent_module
+from orchestra.core.agent import AgentTask, ToolAgent
+from orchestra.core.artifacts import (
+    ArtifactHandle,
+    ArtifactNotFoundError,
+    ArtifactPolicy,
+    ArtifactStore,
+    close_artifact_store,
+    resolve,
+)
+from orchestra.core.task import _format_results
+from orchestra.core.tools import Tool
+
+
+def test_small_values_stay_inline_and_large_ones_become_handles():
+    store = ArtifactStore(ArtifactPolicy(threshold_bytes=1024, preview_chars=10))
+    assert store.offload("short") == "short"
+    assert store.offload({"rows": [1, 2]}) == {"rows": [1, 2]}
+
+    handle = store.offload("x" * 5000)
+    assert isinstance(handle, ArtifactHandle)
+    assert handle.size == 5000 and handle.preview == "x" * 10
+    assert "5000 bytes text" in str(handle) and len(str(handle)) < 100
+    assert store.load(handle.id) == "x" * 5000
+
+    rows = store.offload({"rows": list(range(1000))})
+    assert rows.content_type == "json"
+    assert store.load(rows.id) == {"rows": list(range(1000))}
+    store.clear()
+
+
+def test_spilled_artifacts_are_memory_mapped_and_bounded(tmp_path):
+    store = ArtifactStore(ArtifactPolicy(
+        threshold_bytes=1, memory_limit_bytes=3000, disk_limit_bytes=4000, spill_dir=str(tmp_path)
+    ))
+    handles = [store.put(bytes([i]) * 2000) for i in range(4)]
+
+    stats = store.stats()
+    assert stats["memory_bytes"] <= 3000 and stats["spilled"] >= 1
+    # The newest spilled artifact is read through a zero-copy view of its mapping
+    view = store.view(handles[2].id)
+    assert isinstance(view, memoryview) and view[:3].tobytes() == bytes([2]) * 3
+    view.release()
+    assert store.load(handles[3].id) == bytes([3]) * 2000
+
+    # Beyond the disk limit the oldest spilled artifacts are deleted
+    with pytest.raises(ArtifactNotFoundError):
+        store.load(handles[0].id)
+    store.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+class ReportTool(Tool):
+    name: str = "report"
+    description: str = "Produce a large report"
+
+    def run(self) -> str:
+        return "row\n" * 100_000
+
+
+def test_agent_results_carry_handles_into_prompts(monkeypatch):
+    monkeypatch.setattr(
+        agent_module,
+        "model_invoke",
+        lambda *a, **kw: {"tool_execution": {"tool_name": "report", "tool_args": {}}, "reasoning": ""},
+    )
+    agent = ToolAgent(
+        name="agent", description="", backstory="", system_prompt="",
+        input_schema={}, output_schema={}, tools=[ReportTool()], model="ollama",
+    )
+    try:
+        output = agent.execute(AgentTask(task="report", expected_output="report"))
+        handle = output["result"]
+        assert isinstance(handle, ArtifactHandle)
+        assert resolve(handle) == "row\n" * 100_000
+
+        prompt = _format_results([{"step": 1, "status": "success", "result": output}])
+        assert len(prompt) < 2000 and handle.id in prompt
+    finally:
+        close_artifact_store()
@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+from orchestra.core import task as task_module
+from orchestra.core.agent import AgentTask, BaseAgent
+from orchestra.core.cancellation import (
+    CancellationToken,
+    DeadlineExceededError,
+    RunCancelledError,
+    check_cancelled,
+    current_cancellation,
+)
+from orchestra.core.events import events, EventType
+from orchestra.core.task import Task, TaskList
+from orchestra.llm import base
+from orchestra.llm.usage import Usage
+from orchestra.orchestra import run
+
+
+class StepAgent(BaseAgent):
+    """Runs a callable for each task"""
+
+    action: object
+
+    def execute(self, task: AgentTask):
+        return {"result": self.action()}
+
+
+def make_task_list(*agents):
+    return TaskList(steps=[
+        Task(step_number=i, task=f"step {i}", agent=agent, expected_output="done", is_async=False)
+        for i, agent in enumerate(agents, 1)
+    ])
+
+
+@pytest.fixture
+def recorded():
+    received = []
+    events.subscribe(received.append)
+    yield received
+    events.unsubscribe(received.append)
+
+
+def test_token_cancel_and_deadline():
+    token = CancellationToken()
+    assert token.status is None and token.remaining() is None
+    token.check()
+    token.cancel("stop")
+    assert token.status == "cancelled"
+    with pytest.raises(RunCancelledError, match="stop"):
+        token.check()
+
+    expiring = CancellationToken(timeout=0.01)
+    assert expiring.wait(1.0)
+    assert expiring.status == "timeout"
+    with pytest.raises(DeadlineExceededError):
+        expiring.check()
+
+    # shorten() only ever moves the deadline earlier
+    narrowed = CancellationToken(deadline=time.time() + 60)
+    narrowed.shorten(timeout=120)
+    assert 59 < narrowed.remaining() <= 60
+    narrowed.shorten(timeout=1)
+    assert narrowed.remaining() <= 1
+
+
+def test_model_invoke_stops_waiting_at_deadline(monkeypatch):
+    calls = []
+
+    def slow_backend(system_message, user_message, payload, model, **kwargs):
+        calls.append(kwargs.get("timeout"))
+        time.sleep(0.5)
+        return "late", Usage(model=model)
+
+    monkeypatch.setattr(base, "_invoke_backend", slow_backend)
+
+    token = current_cancellation.set(CancellationToken(timeout=0.1))
+    try:
+        started = time.perf_counter()
+        with pytest.raises(DeadlineExceededError):
+            base.model_invoke("sys", "user", stage="planning")
+        assert time.perf_counter() - started < 0.4
+    finally:
+        current_cancellation.reset(token)
+
+    # Not retried, and the client timeout was capped by the time left
+    assert len(calls) == 1
+    assert calls[0] is not None and calls[0] <= 0.1
+
+
+def test_deadline_bound_calls_share_clients(monkeypatch):
+    from orchestra.llm import ollama_llm
+
+    created = []
+    monkeypatch.setattr(ollama_llm.ollama, "Client", lambda host=None, timeout=None: created.append(timeout) or object())
+    monkeypatch.setattr(ollama_llm, "_clients", type(ollama_llm._clients)())
+
+    # Timeouts shrinking with a deadline map onto a few buckets
+    clients = {ollama_llm.get_client("h", 30 - i * 0.013) for i in range(1000)}
+    assert len(clients) == len(created) <= 3
+    assert ollama_llm.timeout_bucket(0.2) == 1 and ollama_llm.timeout_bucket(301) == 600
+
+    # A call a run could abandon always gets a client timeout
+    seen = []
+    monkeypatch.setattr(base, "_invoke_backend", lambda *args, **kwargs: seen.append(kwargs.get("timeout")) or ("ok", Usage()))
+    token = current_cancellation.set(CancellationToken())
+    try:
+        base.model_invoke("sys", "user")
+    finally:
+        current_cancellation.reset(token)
+    assert seen == [base.get_resilience_policy().cancellable_timeout]
+
+
+def test_cancelled_run_skips_remaining_steps(monkeypatch, recorded):
+    handle = CancellationToken()
+
+    def first():
+        handle.cancel("user navigated away")
+        return "first done"
+
+    agents = [
+        StepAgent(name="first", description="", backstory="", action=first),
+        StepAgent(name="second", description="", backstory="", action=lambda: "second done"),
+    ]
+
+    def no_synthesis(message, results):
+        raise AssertionError("synthesis must not run after cancellation")
+
+    monkeypatch.setattr(task_module, "generate_final_answer", no_synthesis)
+
+    answer = run("query", agents, task_list=make_task_list("first", "second"), cancel_token=handle)
+
+    assert answer.startswith("The request was cancelled")
+    assert "first done" in answer
+
+    cancelled = [e for e in recorded if e.type == EventType.TASK_CANCELLED]
+    assert [(e.data["step"], e.data["started"]) for e in cancelled] == [(2, False)]
+    assert not any(e.type == EventType.TASK_START and e.data["step"] == 2 for e in recorded)
+
+    end = next(e for e in recorded if e.type == EventType.ORCHESTRA_CANCELLED)
+    assert end.data["status"] == "cancelled"
+    assert end.data["reason"] == "user navigated away"
+    assert end.data["completed_steps"] == [1]
+
+
+def test_run_timeout_marks_interrupted_step(recorded):
+    def stuck():
+        # A long-running tool cooperating with cancellation
+        while True:
+            check_cancelled()
+            time.sleep(0.01)
+
+    agents = [
+        StepAgent(name="stuck", description="", backstory="", action=stuck),
+        StepAgent(name="never", description="", backstory="", action=lambda: "unreachable"),
+    ]
+
+    answer = run("query", agents, task_list=make_task_list("stuck", "never"), timeout=0.1)
+
+    assert answer.startswith("The request timed out")
+    cancelled = [e for e in recorded if e.type == EventType.TASK_CANCELLED]
+    assert [(e.data["step"], e.data["status"], e.data["started"]) for e in cancelled] == [
+        (1, "timeout", True),
+        (2, "timeout", False),
+    ]
@@ -0,0 +1,98 @@
+from typing import Any, Dict
+
+from orchestra.core import task as task_module
+from orchestra.core.agent import AgentTask, BaseAgent, ToolAgent
+from orchestra.core.events import events, EventType
+from orchestra.core.tools import Tool
+from orchestra.llm import base
+from orchestra.llm.cascade import CascadePolicy, cascade_stats, reset_cascade_stats, set_cascade_policy
+from orchestra.llm.stages import current_stages
+from orchestra.llm.usage import Usage
+
+import pytest
+
+
+class NamedAgent(BaseAgent):
+    def execute(self, task: AgentTask) -> Dict[str, Any]:
+        return {}
+
+
+class EchoTool(Tool):
+    name: str = "echo"
+    description: str = "Echo"
+
+    def run(self, text: str) -> str:
+        return text
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    answers = {}
+    calls = []
+
+    def fake_backend(system_message, user_message, payload, model, host=None, timeout=None, **generation):
+        calls.append(model)
+        return answers[model], Usage(model=model)
+
+    monkeypatch.setattr(base, "_invoke_backend", fake_backend)
+    reset_cascade_stats()
+    set_cascade_policy(CascadePolicy(
+        stages={"planning": ["ollama/small", "ollama/large"], "tool_binding": ["ollama/small", "ollama/large"]},
+        min_confidence=0.5,
+    ))
+    yield answers, calls
+    set_cascade_policy(CascadePolicy())
+    reset_cascade_stats()
+
+
+def plan(agent):
+    return {"steps": [{"step_number": 1, "task": "t", "agent": agent, "expected_output": "o", "is_async": False}]}
+
+
+def test_planning_escalates_on_unknown_agents(cascade):
+    answers, calls = cascade
+    escalated = []
+    listener = lambda event: escalated.append(event.data["reason"]) if event.type == EventType.LLM_ESCALATED else None
+    events.subscribe(listener)
+    try:
+        answers.update({"ollama/small": plan("made_up_agent"), "ollama/large": plan("weather_agent")})
+        agents = [NamedAgent(name="weather_agent", description="", backstory="")]
+        assert task_module.generate("weather?", agents).steps[0].agent == "weather_agent"
+
+        # Easy calls stay on the small model
+        answers["ollama/small"] = plan("weather_agent")
+        task_module.generate("weather?", agents)
+    finally:
+        events.unsubscribe(listener)
+
+    assert calls == ["ollama/small", "ollama/large", "ollama/small"]
+    assert escalated == ["unknown_agent"]
+    stats = cascade_stats()["planner"]
+    assert stats["calls"] == 2 and stats["escalation_rate"] == 0.5
+    assert stats["answered_by"] == {"ollama/large": 1, "ollama/small": 1}
+
+
+def test_tool_binding_escalations_are_counted_per_agent(cascade):
+    answers, calls = cascade
+    answers["ollama/small"] = {"tool_execution": {"tool_name": "echo", "tool_args": {}}, "reasoning": ""}
+    answers["ollama/large"] = {"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"}}, "reasoning": ""}
+    agent = ToolAgent(
+        name="echo_agent", description="", backstory="", system_prompt="", input_schema={}, output_schema={},
+        tools=[EchoTool()], model="ollama",
+    )
+    assert agent.execute(AgentTask(task="echo hi", expected_output="hi"))["result"] == "hi"
+    assert cascade_stats()["echo_agent"]["reasons"] == {"missing_args": 1}
+
+    # Low self-reported confidence escalates too
+    answers["ollama/small"] = {**answers["ollama/large"], "confidence": 0.2}
+    agent.execute(AgentTask(task="echo hi", expected_output="hi"))
+    assert cascade_stats()["echo_agent"]["reasons"] == {"missing_args": 1, "low_confidence": 1}
+
+    # A run that picks the stage's model itself is not cascaded
+    token = current_stages.set({"tool_binding": {"model": "ollama/large"}})
+    try:
+        calls.clear()
+        agent.execute(AgentTask(task="echo hi", expected_output="hi"))
+    finally:
+        current_stages.reset(token)
+    assert calls == ["ollama/large"]
@@ -0,0 +1,114 @@
+from typing import Any, Dict
+
+from orchestra.core import task as task_module
+from orchestra.core.agent import AgentTask, BaseAgent
+from orchestra.core.catalog import CatalogPolicy, shortlist_agents
+from orchestra.utils.bm25 import BM25Index, tokenize
+
+
+class NamedAgent(BaseAgent):
+    def execute(self, task: AgentTask) -> Dict[str, Any]:
+        return {"status": "success", "result": self.name}
+
+
+def catalog(size):
+    agents = [
+        NamedAgent(name=f"service_{i}_agent", description=f"Handles requests for internal service number {i}", backstory="")
+        for i in range(size)
+    ]
+    agents.append(NamedAgent(
+        name="weather_agent",
+        description="Current conditions and forecasts",
+        backstory="",
+        keywords=["rain", "temperature"],
+        examples=["Will it rain in Lisbon tomorrow?"],
+    ))
+    return agents
+
+
+def test_bm25_ranks_matching_documents_first():
+    index = BM25Index(["send an email to a contact", "check the weather forecast", "weather station hardware"])
+    assert [i for i, _ in index.top("what is the weather forecast", 2)] == [1, 2]
+    assert index.top("unrelated words", 3) == []
+    assert tokenize("todo_agent Adds-Items") == ["todo", "agent", "adds", "items"]
+
+
+def test_shortlist_and_fallback():
+    agents = catalog(150)
+    policy = CatalogPolicy(top_k=5)
+
+    shortlist = shortlist_agents("is rain expected tomorrow", agents, policy)
+    assert shortlist == [agents[-1]]
+    assert len(shortlist_agents("internal service number 7", agents, policy)) == 5
+
+    # Nothing matches: the planner sees everything rather than guessing
+    assert len(shortlist_agents("do that again", agents, policy)) == 151
+    # Small catalogs are never cut
+    assert len(shortlist_agents("rain", agents[:10], policy)) == 10
+
+
+def test_planner_prompt_does_not_grow_with_the_catalog(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(task_module, "model_invoke", lambda system, *a, **kw: prompts.append(system) or {"steps": []})
+
+    task_module.generate("Will it rain tomorrow? Check service 3", catalog(20))
+    task_module.generate("Will it rain tomorrow? Check service 3", catalog(200))
+    assert len(prompts[0]) == len(prompts[1])
+    assert "weather_agent" in prompts[1]
+
+
+def make_toolset(count):
+    from orchestra.core.tools import Tool
+
+    class NumberedTool(Tool):
+        def run(self, value: str) -> str:
+            return f"{self.name}:{value}"
+
+    tools = [NumberedTool(name=f"tool_{i}", description=f"Operates ledger number {i}") for i in range(count)]
+    tools.append(NumberedTool(name="convert_currency", description="Convert an amount between currencies"))
+    return tools
+
+
+def make_tool_agent(tools):
+    from orchestra.core.agent import ToolAgent
+
+    return ToolAgent(
+        name="agent", description="", backstory="", system_prompt="",
+        input_schema={}, output_schema={}, tools=tools, model="ollama",
+    )
+
+
+def test_tool_prompt_only_carries_shortlisted_schemas(monkeypatch):
+    from orchestra.core import agent as agent_module
+
+    offered = []
+
+    def invoke(system_message, user_message, payload, **kwargs):
+        offered.append(payload["properties"]["tool_execution"]["properties"]["tool_name"]["enum"])
+        return {"tool_execution": {"tool_name": "convert_currency", "tool_args": {"value": "10 EUR"}}, "reasoning": ""}
+
+    monkeypatch.setattr(agent_module, "model_invoke", invoke)
+    output = make_tool_agent(make_toolset(40)).execute(AgentTask(task="Convert 10 EUR to currency USD", expected_output="amount"))
+
+    assert output["result"] == "convert_currency:10 EUR"
+    assert len(offered) == 1 and len(offered[0]) <= 6
+    assert "convert_currency" in offered[0]
+
+
+def test_tool_set_widens_when_nothing_valid_is_picked(monkeypatch):
+    from orchestra.core import agent as agent_module
+
+    offered = []
+
+    def invoke(system_message, user_message, payload, **kwargs):
+        names = payload["properties"]["tool_execution"]["properties"]["tool_name"]["enum"]
+        offered.append(len(names))
+        # Only picks the tool it needs once it is offered
+        picked = "tool_33" if "tool_33" in names else "made_up"
+        return {"tool_execution": {"tool_name": picked, "tool_args": {"value": "x"}}, "reasoning": ""}
+
+    monkeypatch.setattr(agent_module, "model_invoke", invoke)
+    output = make_tool_agent(make_toolset(40)).execute(AgentTask(task="Convert currency", expected_output="amount"))
+
+    assert output["tool_used"] == "tool_33"
+    assert offered[0] <= 6 and offered[-1] == 41
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from orchestra.llm.concurrency import (
+    AdaptiveLimiter,
+    LimiterOverloadedError,
+    LimiterPolicy,
+    export_prometheus,
+    get_limiter,
+    limited,
+    set_limiter_policy,
+)
+
+
+def test_additive_increase_and_multiplicative_decrease():
+    limiter = AdaptiveLimiter("ollama", LimiterPolicy(enabled=True, initial_limit=4, target_latency=1.0))
+
+    for _ in range(8):
+        started = limiter.acquire()
+        limiter.release(started, 0.1)
+    assert limiter.limit > 5
+
+    before = limiter.limit
+    first = limiter.acquire()
+    second = limiter.acquire()
+    limiter.release(first, 0.1, TimeoutError("timed out"))
+    assert limiter.limit == pytest.approx(before * 0.5)
+
+    # A spike from a request that started before the cut does not cut again
+    limiter.release(second, 5.0)
+    assert limiter.decreases == 1
+    assert limiter.in_flight == 0
+
+
+def test_bounded_queue_rejects():
+    limiter = AdaptiveLimiter("ollama", LimiterPolicy(enabled=True, initial_limit=1, max_wait=0.01, max_queue=1))
+    limiter.acquire()
+
+    with pytest.raises(LimiterOverloadedError):
+        limiter.acquire()  # waits max_wait then gives up
+    assert limiter.rejected == 1
+
+    limiter.queue_depth = 1  # pretend another request is queued
+    with pytest.raises(LimiterOverloadedError, match="full"):
+        limiter.acquire()
+
+
+def test_queued_request_gets_slot_when_released():
+    limiter = AdaptiveLimiter("ollama", LimiterPolicy(enabled=True, initial_limit=1, max_wait=2))
+    started = limiter.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    limiter.release(started, 0.1)
+    thread.join(1)
+    assert acquired.is_set()
+
+
+def test_limiters_are_opt_in():
+    set_limiter_policy(LimiterPolicy())
+    assert get_limiter("ollama") is None
+
+    set_limiter_policy(LimiterPolicy(enabled=True))
+    try:
+        with limited("ollama"):
+            assert get_limiter("ollama").in_flight == 1
+        assert 'orchestra_llm_limiter_limit{backend="ollama"}' in export_prometheus()
+    finally:
+        set_limiter_policy(LimiterPolicy())
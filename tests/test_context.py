@@ -0,0 +1,64 @@
+from orchestra.core import task as task_module
+from orchestra.core.context import (
+    ChatMessage,
+    ContextPolicy,
+    MessageRole,
+    OrchestraContext,
+    render_history,
+)
+
+
+def test_plain_history_is_packed_by_tokens():
+    history = [ChatMessage(role=MessageRole.USER, content="a" * 400) for _ in range(20)]
+    packed = render_history(history, ContextPolicy(history_tokens=350))
+
+    # ~100 tokens per message: only the latest three fit
+    assert packed.count("User:") == 3
+    assert "No previous" in render_history([])
+
+
+def test_older_turns_fold_into_a_cached_summary():
+    calls = []
+
+    def summarizer(summary, turns, max_tokens):
+        calls.append(turns.count("\n") + 1)
+        return f"{summary}+{turns.count(chr(10)) + 1}"
+
+    policy = ContextPolicy(history_tokens=500, fold_to=0.5)
+    context = OrchestraContext(session_id="s")
+    rendered = []
+    for i in range(30):
+        context.add_message(MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT, f"{i} " + "b" * 200)
+        rendered.append(context.render_history(policy, summarizer))
+
+    # Folding happens in batches, not on every turn, and never drops a message uncounted
+    assert 0 < len(calls) < 10
+    assert sum(calls) + rendered[-1].count("\n") == 30
+    assert rendered[-1].startswith("Summary of earlier conversation:")
+    assert rendered[-1].endswith("29 " + "b" * 200)
+    # Prompt size stays flat as the conversation grows
+    assert len(rendered[-1]) <= len(rendered[10]) * 1.5
+
+    # Rendering again without new messages reuses everything
+    folds = len(calls)
+    assert context.render_history(policy, summarizer) == rendered[-1]
+    assert len(calls) == folds
+
+    context.clear()
+    assert context.summary == ""
+    assert context.get_formatted_history() == "No previous conversation history."
+
+
+def test_planner_receives_budgeted_history(monkeypatch):
+    prompts = []
+
+    def invoke(system, user_message, schema, **kwargs):
+        prompts.append(system + user_message)
+        return {"steps": []}
+
+    monkeypatch.setattr(task_module, "model_invoke", invoke)
+    context = OrchestraContext()
+    context.add_message(MessageRole.USER, "hello there")
+    task_module.generate("next", [], history=context)
+
+    assert "User: hello there" in prompts[0]
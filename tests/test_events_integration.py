@@ -51,17 +51,35 @@ def print_event(event):
     emojis = {
         EventType.ORCHESTRA_START: "🎬",
         EventType.ORCHESTRA_END: "🏁",
+        EventType.ORCHESTRA_ERROR: "🔥",
+        EventType.ORCHESTRA_CANCELLED: "🛑",
+        EventType.ADMISSION_QUEUED: "⏳",
+        EventType.ADMISSION_ADMITTED: "🎟️",
+        EventType.ADMISSION_REJECTED: "🚫",
+        EventType.ADMISSION_DROPPED: "⌛",
         EventType.TASK_GENERATION_START: "🧠",
         EventType.TASK_GENERATION_END: "📋",
         EventType.TASK_START: "▶️",
         EventType.TASK_COMPLETE: "✅",
         EventType.TASK_ERROR: "❌",
+        EventType.TASK_CANCELLED: "⏹️",
         EventType.AGENT_START: "👤",
         EventType.AGENT_END: "🏁",
         EventType.TOOL_SELECTION: "🔨",
         EventType.TOOL_START: "⚙️",
+        EventType.TOOL_CHUNK: "🧩",
         EventType.TOOL_END: "🆗",
         EventType.TOOL_ERROR: "💥",
+        EventType.LLM_START: "🤖",
+        EventType.LLM_END: "💬",
+        EventType.LLM_ERROR: "🚨",
+        EventType.LLM_RETRY: "🔁",
+        EventType.LLM_HEDGE: "🔀",
+        EventType.LLM_ESCALATED: "🪜",
+        EventType.LLM_REJECTED: "🚦",
+        EventType.BUDGET_EXCEEDED: "💸",
+        EventType.ENDPOINT_EJECTED: "⛔",
+        EventType.ENDPOINT_READMITTED: "🟢",
         EventType.LOG: "📝"
     }
     
@@ -0,0 +1,142 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from orchestra.core import executor
+from orchestra.core.executor import (
+    ExecutorPolicy,
+    ToolArgumentError,
+    ToolTimeoutError,
+    execute_tool,
+    set_executor_policy,
+)
+from orchestra.core.tools import Tool
+
+
+class PidTool(Tool):
+    name: str = "pid"
+    description: str = "Report the worker process"
+    execution: str = "process"
+
+    def run(self, n: int) -> dict:
+        return {"pid": os.getpid(), "total": sum(i * i for i in range(n))}
+
+
+class BlobTool(Tool):
+    name: str = "blob"
+    description: str = "Produce a large binary result"
+    execution: str = "process"
+
+    def run(self, size: int) -> bytes:
+        return bytes(range(256)) * (size // 256)
+
+
+class SleepTool(Tool):
+    name: str = "sleep"
+    description: str = "Sleep"
+    execution: str = "process"
+    timeout: float = 0.3
+
+    def run(self, seconds: float) -> str:
+        time.sleep(seconds)
+        return "woke up"
+
+
+class ThreadTool(Tool):
+    name: str = "thread"
+    description: str = "Report the executing thread"
+    execution: str = "thread"
+
+    def run(self) -> str:
+        return threading.current_thread().name
+
+
+@pytest.fixture(scope="module", autouse=True)
+def small_pool():
+    set_executor_policy(ExecutorPolicy(max_workers=2, shm_threshold=1024))
+    yield
+    executor.shutdown()
+    set_executor_policy(ExecutorPolicy())
+
+
+def test_inline_and_thread_execution():
+    class Inline(Tool):
+        name: str = "inline"
+        description: str = "Report the executing thread"
+
+        def run(self) -> str:
+            return threading.current_thread().name
+
+    assert execute_tool(Inline(), {}) == threading.current_thread().name
+    assert execute_tool(ThreadTool(), {}).startswith("orchestra-tool")
+
+
+def test_process_tool_runs_in_worker():
+    result = execute_tool(PidTool(), {"n": 1000})
+    assert result["pid"] != os.getpid()
+    assert result["total"] == sum(i * i for i in range(1000))
+
+
+def test_large_bytes_result_uses_shared_memory():
+    blob = execute_tool(BlobTool(), {"size": 256 * 1024})
+    assert isinstance(blob, bytes)
+    assert blob == bytes(range(256)) * 1024
+
+
+def test_unpicklable_arguments_are_rejected():
+    with pytest.raises(ToolArgumentError):
+        execute_tool(PidTool(), {"n": threading.Lock()})
+
+
+def test_timeout_interrupts_only_the_stuck_call():
+    stats = executor.executor_stats()
+    started = time.perf_counter()
+    with pytest.raises(ToolTimeoutError):
+        execute_tool(SleepTool(), {"seconds": 5})
+    assert time.perf_counter() - started < 2
+
+    # The worker stopped the call itself; the pool was not replaced
+    after = executor.executor_stats()
+    assert after["recycled"] == stats["recycled"]
+    assert after["interrupted"] == stats["interrupted"] + 1
+    assert execute_tool(SleepTool(), {"seconds": 0}) == "woke up"
+
+
+class DeafTool(SleepTool):
+    name: str = "deaf"
+
+    def run(self, seconds: float) -> str:
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+        time.sleep(seconds)
+        return "woke up"
+
+
+def test_tool_ignoring_interrupt_recycles_pool_without_rerunning_others():
+    recycled = executor.executor_stats()["recycled"]
+    executor.warmup()
+
+    # A neighbour running on the other worker loses it when the pool is replaced
+    neighbour = []
+    thread = threading.Thread(target=lambda: neighbour.append(_outcome(PidTool(), {"n": 10 ** 8})))
+    thread.start()
+    time.sleep(0.1)
+    with pytest.raises(ToolTimeoutError):
+        execute_tool(DeafTool(), {"seconds": 30})
+    thread.join(10)
+
+    assert executor.executor_stats()["recycled"] == recycled + 1
+    # Not marked idempotent, so it was not silently run again
+    assert neighbour == ["BrokenProcessPool"]
+    executor.warmup()
+    assert execute_tool(SleepTool(), {"seconds": 0}) == "woke up"
+
+
+def _outcome(tool, arguments):
+    try:
+        execute_tool(tool, arguments)
+        return "ok"
+    except Exception as e:
+        return type(e).__name__
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from orchestra.core.events import Event, EventType
+from orchestra.core.journal import EventJournal, read_journal
+
+
+def make_event(i: int, run_id: str = "run-a", event_type: EventType = EventType.TOOL_END) -> Event:
+    return Event(type=event_type, source="echo_agent", data={"i": i}, run_id=run_id)
+
+
+def test_journal_ring_keeps_latest_records(tmp_path):
+    path = str(tmp_path / "events.journal")
+    journal = EventJournal(path, capacity=4, slot_size=512)
+    for i in range(10):
+        journal.write(make_event(i))
+    journal.close()
+
+    records = list(read_journal(path))
+    assert [r.data["i"] for r in records] == [6, 7, 8, 9]
+    assert [r.seq for r in records] == [6, 7, 8, 9]
+
+
+def test_journal_filters_and_truncation(tmp_path):
+    path = str(tmp_path / "events.journal")
+    journal = EventJournal(path, capacity=16, slot_size=512)
+    journal.write(make_event(1, run_id="run-a"))
+    journal.write(make_event(2, run_id="run-b", event_type=EventType.TOOL_START))
+    journal.write(Event(type=EventType.LOG, source="x", data={"blob": "x" * 2000}, run_id="run-b"))
+    journal.close()
+
+    assert [r.data["i"] for r in read_journal(path, run_id="run-a")] == [1]
+    assert [r.data["i"] for r in read_journal(path, types=["tool_start"])] == [2]
+
+    truncated = list(read_journal(path, types=["log"]))[0]
+    assert truncated.truncated
+    assert isinstance(truncated.data, str)
+
+    future = datetime.utcnow() + timedelta(hours=1)
+    assert list(read_journal(path, since=future)) == []
+
+
+def test_journal_resumes_existing_file(tmp_path):
+    path = str(tmp_path / "events.journal")
+    journal = EventJournal(path, capacity=8, slot_size=512)
+    journal.write(make_event(1))
+    journal.close()
+
+    journal = EventJournal(path, capacity=8, slot_size=512)
+    journal.write(make_event(2))
+    journal.close()
+
+    assert [r.data["i"] for r in read_journal(path)] == [1, 2]
+
+
+
+def test_reader_discards_slots_rewritten_while_copied(tmp_path):
+    import struct
+
+    from orchestra.core.journal import FILE_HEADER_SIZE, _decode_slot
+
+    path = str(tmp_path / "events.journal")
+    journal = EventJournal(path, capacity=4, slot_size=512)
+    journal.write(make_event(1))
+    journal.close()
+    with open(path, "rb") as f:
+        content = f.read()
+
+    class RacingBuffer(bytearray):
+        """A writer claims the slot right after the reader copied it"""
+
+        def __getitem__(self, key):
+            data = bytearray.__getitem__(self, key)
+            if isinstance(key, slice):
+                struct.pack_into("<Q", self, FILE_HEADER_SIZE, 0)
+            return data
+
+    assert _decode_slot(bytearray(content), FILE_HEADER_SIZE, 512, 0).data == {"i": 1}
+    assert _decode_slot(RacingBuffer(content), FILE_HEADER_SIZE, 512, 0) is None
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from orchestra.llm import base
+from orchestra.llm.pool import CircuitBreakerPolicy, EndpointPool, NoHealthyEndpointError, register_pool, unregister_pool
+from orchestra.llm.usage import Usage
+
+
+def test_least_outstanding_routing():
+    pool = EndpointPool(["a", "b"])
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.host, second.host} == {"a", "b"}
+
+    pool.release(first, 0.1)
+    assert pool.acquire() is first
+
+
+def test_circuit_breaker_ejects_and_readmits():
+    pool = EndpointPool(["a", "b"], breaker=CircuitBreakerPolicy(failure_threshold=2, open_seconds=0))
+    bad = pool.endpoints[0]
+    for _ in range(2):
+        bad.outstanding += 1
+        pool.release(bad, 0.1, ConnectionError("down"))
+    assert bad.state == "open"
+
+    # open_seconds elapsed: the next request is a half-open probe
+    endpoint = pool.acquire()
+    assert endpoint.state in ("half_open", "closed")
+    if endpoint is bad:
+        pool.release(bad, 0.1)
+        assert bad.state == "closed"
+
+
+def test_only_transport_errors_count_against_a_host():
+    from orchestra.core.cancellation import RunCancelledError
+
+    pool = EndpointPool(["a"], breaker=CircuitBreakerPolicy(failure_threshold=1, open_seconds=60))
+    for error in (ValueError("bad request"), RunCancelledError("cancelled")):
+        with pytest.raises(type(error)):
+            with pool.lease():
+                raise error
+    assert pool.endpoints[0].state == "closed" and pool.endpoints[0].failures == 0
+
+    with pytest.raises(TimeoutError):
+        with pool.lease():
+            raise TimeoutError("read timeout")
+    assert pool.endpoints[0].state == "open"
+
+
+def test_all_ejected_raises():
+    pool = EndpointPool(["a"], breaker=CircuitBreakerPolicy(failure_threshold=1, open_seconds=60))
+    endpoint = pool.acquire()
+    pool.release(endpoint, 0.1, ConnectionError("down"))
+    with pytest.raises(NoHealthyEndpointError):
+        pool.acquire()
+
+
+def test_model_invoke_uses_pool(monkeypatch):
+    hosts = []
+
+    def fake_backend(system_message, user_message, payload, model, host=None, timeout=None):
+        hosts.append(host)
+        return "ok", Usage(model=model)
+
+    monkeypatch.setattr(base, "_invoke_backend", fake_backend)
+    pool = register_pool("ollama", ["http://gpu-1:11434", "http://gpu-2:11434"])
+    try:
+        assert base.model_invoke("sys", "hi", model="ollama/llama3") == "ok"
+        assert asyncio.run(base.amodel_invoke("sys", "hi")) == "ok"
+    finally:
+        unregister_pool("ollama")
+
+    assert all(host in ("http://gpu-1:11434", "http://gpu-2:11434") for host in hosts)
+    assert sum(stat["requests"] for stat in pool.stats()) == 2
@@ -0,0 +1,79 @@
+from typing import Any, Dict
+
+import pytest
+
+from orchestra.core import agent as agent_module, task as task_module
+from orchestra.core.agent import AgentTask, BaseAgent, ToolAgent
+from orchestra.core.prompts import PromptPolicy, prompt_report, reset_prompt_report, set_prompt_policy
+from orchestra.core.tools import Tool
+
+
+class NamedAgent(BaseAgent):
+    def execute(self, task: AgentTask) -> Dict[str, Any]:
+        return {"status": "success", "result": self.name}
+
+
+class LookupTool(Tool):
+    name: str = "lookup"
+    description: str = "Look a customer up by email"
+
+    def run(self, email: str) -> str:
+        return email
+
+
+@pytest.fixture
+def compact():
+    reset_prompt_report()
+    set_prompt_policy(PromptPolicy(profile="compact", report=True))
+    yield
+    set_prompt_policy(PromptPolicy())
+    reset_prompt_report()
+
+
+def capture(monkeypatch, module, response):
+    prompts = []
+
+    def invoke(system_message, user_message, payload=None, **kwargs):
+        prompts.append((system_message, user_message))
+        return response
+
+    monkeypatch.setattr(module, "model_invoke", invoke)
+    return prompts
+
+
+def test_compact_prompts_report_their_savings(monkeypatch, compact):
+    agents = [NamedAgent(name=f"agent_{i}", description=f"Handles topic {i}", backstory="") for i in range(5)]
+    planning = capture(monkeypatch, task_module, {"steps": []})
+    task_module.generate("hello", agents)
+
+    binding = capture(
+        monkeypatch, agent_module, {"tool_execution": {"tool_name": "lookup", "tool_args": {"email": "a@b.c"}}, "reasoning": ""}
+    )
+    agent = ToolAgent(
+        name="agent", description="", backstory="", system_prompt="", input_schema={}, output_schema={},
+        tools=[LookupTool()], model="ollama",
+    )
+    agent.execute(AgentTask(task="find a@b.c", expected_output="customer"))
+
+    # Ollama calls tools natively, so no response template is spelled out
+    assert "Answer as JSON" not in planning[0][0] and "Example" not in planning[0][0]
+    assert '"properties":{' in binding[0][1] and "Answer as JSON" not in binding[0][1]
+
+    report = prompt_report()
+    assert report["planning"]["prompts"] == 1
+    assert report["planning"]["saved_ratio"] > 0.5
+    assert report["tool_binding"]["compact_tokens"] < report["tool_binding"]["verbose_tokens"]
+
+
+def test_verbose_profile_is_unchanged_and_few_shot_is_optional(monkeypatch):
+    planning = capture(monkeypatch, task_module, {"steps": []})
+    task_module.generate("hello", [])
+    assert "Ensure that the output structure follows this format" in planning[0][0]
+
+    set_prompt_policy(PromptPolicy(profile="compact", few_shot=True))
+    try:
+        task_module.generate("hello", [], history=None)
+    finally:
+        set_prompt_policy(PromptPolicy())
+    assert 'Example steps: [{"step_number":1' in planning[1][0]
+    assert prompt_report() == {}
@@ -0,0 +1,55 @@
+import pytest
+
+from orchestra.llm import base
+from orchestra.llm.registry import (
+    ProviderCapabilities,
+    get_capabilities,
+    register_provider,
+    resolve_provider,
+    unregister_provider,
+)
+from orchestra.llm.usage import Usage
+
+
+def echo_backend(system_message, user_message, payload, model_name=None):
+    return f"{model_name}: {user_message}", Usage(model=model_name)
+
+
+def test_builtin_resolution():
+    provider, model_name = resolve_provider("ollama")
+    assert provider.name == "ollama" and model_name is None
+
+    provider, model_name = resolve_provider("ollama/llama3")
+    assert provider.name == "ollama" and model_name == "llama3"
+
+    provider, model_name = resolve_provider("gpt-3.5-turbo")
+    assert provider.name == "openai" and model_name == "gpt-3.5-turbo"
+
+    with pytest.raises(ValueError, match="Providers available"):
+        resolve_provider("unknown-model")
+
+
+def test_custom_provider_is_used_by_model_invoke():
+    register_provider(
+        "local",
+        echo_backend,
+        prefixes=["local/"],
+        capabilities=ProviderCapabilities(tool_calling=False, batching=True),
+    )
+    try:
+        assert base.model_invoke("sys", "hi", model="local/tiny") == "tiny: hi"
+        assert get_capabilities("local/tiny").batching
+        with pytest.raises(ValueError, match="already registered"):
+            register_provider("local", echo_backend)
+    finally:
+        unregister_provider("local")
+
+
+def test_import_paths_are_loaded_lazily():
+    provider = register_provider("lazy", "orchestra_missing_backend_module:invoke")
+    try:
+        assert not provider.loaded
+        with pytest.raises(ImportError):
+            base.model_invoke("sys", "hi", model="lazy")
+    finally:
+        unregister_provider("lazy")
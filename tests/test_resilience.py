@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from orchestra.core.events import events, EventType
+from orchestra.llm.resilience import (
+    CallTimeoutError,
+    HedgePolicy,
+    ResiliencePolicy,
+    RetryPolicy,
+    call_with_resilience,
+)
+
+FAST_RETRY = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+
+
+def collect(event_type):
+    seen = []
+
+    def listener(event):
+        if event.type == event_type:
+            seen.append(event)
+
+    events.subscribe(listener)
+    return seen, listener
+
+
+def test_transport_errors_are_retried():
+    calls = []
+
+    def flaky(model, host):
+        calls.append(model)
+        if len(calls) < 3:
+            raise ConnectionError("connection refused")
+        return "ok"
+
+    retries, listener = collect(EventType.LLM_RETRY)
+    try:
+        result, attempts = call_with_resilience(flaky, "ollama", policy=ResiliencePolicy(retry=FAST_RETRY))
+    finally:
+        events.unsubscribe(listener)
+
+    assert result == "ok"
+    assert attempts == 3
+    assert [e.data["attempt"] for e in retries] == [1, 2]
+
+
+def test_other_errors_are_not_retried():
+    calls = []
+
+    def broken(model, host):
+        calls.append(model)
+        raise ValueError("bad schema")
+
+    with pytest.raises(ValueError):
+        call_with_resilience(broken, "ollama", policy=ResiliencePolicy(retry=FAST_RETRY))
+    assert len(calls) == 1
+
+
+def test_stage_timeout():
+    release = threading.Event()
+
+    def stuck(model, host):
+        release.wait(1)
+        return "late"
+
+    policy = ResiliencePolicy(stage_timeouts={"planning": 0.05}, retry=RetryPolicy(max_attempts=1))
+    try:
+        with pytest.raises(CallTimeoutError):
+            call_with_resilience(stuck, "ollama", stage="planning", policy=policy)
+    finally:
+        release.set()
+
+
+def test_hedged_request_wins_over_slow_primary():
+    release = threading.Event()
+
+    def call(model, host):
+        if host == "slow-host":
+            release.wait(1)
+            return "primary"
+        return "hedge"
+
+    policy = ResiliencePolicy(hedge=HedgePolicy(enabled=True, delay=0.01, host="fast-host"))
+    hedges, listener = collect(EventType.LLM_HEDGE)
+    try:
+        started = time.perf_counter()
+        result, _ = call_with_resilience(call, "ollama", host="slow-host", policy=policy)
+        assert time.perf_counter() - started < 0.5
+    finally:
+        release.set()
+        events.unsubscribe(listener)
+
+    assert result == "hedge"
+    assert hedges[0].data["hedge_host"] == "fast-host"
+    assert hedges[-1].data["winner"] == "hedge"
+
+
+def test_abandoned_requests_report_their_results():
+    release = threading.Event()
+    abandoned = []
+
+    def call(model, host):
+        if host == "slow-host":
+            release.wait(1)
+            return "primary"
+        return "hedge"
+
+    policy = ResiliencePolicy(hedge=HedgePolicy(enabled=True, delay=0.01, host="fast-host"))
+    # Hedging never runs without a timeout, so losers cannot hold a worker thread forever
+    assert policy.timeout_for("planning") == policy.hedge.timeout
+
+    result, _ = call_with_resilience(call, "ollama", host="slow-host", policy=policy, on_abandoned=abandoned.append)
+    assert result == "hedge" and abandoned == []
+    release.set()
+    for _ in range(100):
+        if abandoned:
+            break
+        time.sleep(0.01)
+    assert abandoned == ["primary"]
+
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from orchestra.core import executor
+from orchestra.core.agent import ToolAgent
+from orchestra.core.executor import ExecutorPolicy, execute_tool, set_executor_policy
+from orchestra.core.resources import ResourcePool, ResourcePoolClosedError, close_shared_pools, shared_pool
+from orchestra.core.tools import Tool
+from orchestra.orchestra import ashutdown, astartup, shutdown, startup
+
+
+class Connection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+
+def test_pool_reuses_and_bounds_resources():
+    created = []
+
+    def factory():
+        created.append(Connection(len(created)))
+        return created[-1]
+
+    pool = ResourcePool(factory, close=lambda c: setattr(c, "closed", True), max_size=2)
+
+    with pool.lease() as first:
+        pass
+    with pool.lease() as again:
+        assert again is first
+    assert len(created) == 1
+
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    # A waiter gets the resource released by another thread
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=2)))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(a)
+    waiter.join()
+    assert got == [a]
+
+    # Broken resources are discarded, freeing their slot
+    pool.release(b)
+    with pytest.raises(ConnectionError):
+        with pool.lease(timeout=1) as broken:
+            raise ConnectionError("reset")
+    assert broken is b and b.closed
+    assert pool.stats()["size"] == 1
+    with pool.lease(timeout=1) as replacement:
+        assert replacement is not b
+    assert pool.stats()["size"] == 2
+
+    pool.close()
+    assert all(c.closed for c in created if c is not got[0])
+    pool.release(got[0])
+    assert got[0].closed
+    with pytest.raises(ResourcePoolClosedError):
+        pool.acquire()
+
+
+def test_shared_pools_are_closed_at_shutdown():
+    pool = shared_pool("db", lambda: Connection(0), close=lambda c: setattr(c, "closed", True))
+    assert shared_pool("db", lambda: Connection(1)) is pool
+    with pool.lease() as conn:
+        pass
+    close_shared_pools()
+    assert conn.closed
+    assert shared_pool("db", lambda: Connection(2)) is not pool
+    close_shared_pools()
+
+
+log = []
+
+
+class LoggingTool(Tool):
+    name: str = "logging"
+    description: str = "Records its lifecycle"
+
+    def setup(self):
+        log.append(f"setup:{self.name}")
+        self._conn = Connection(0)
+
+    def teardown(self):
+        log.append(f"teardown:{self.name}")
+
+    def run(self) -> int:
+        return id(self._conn)
+
+
+def make_agent(*tools):
+    return ToolAgent(
+        name="agent",
+        description="",
+        backstory="",
+        system_prompt="",
+        input_schema={},
+        output_schema={},
+        tools=list(tools),
+        model="ollama",
+    )
+
+
+def test_startup_and_shutdown_ordering():
+    log.clear()
+    first, second = LoggingTool(name="first"), LoggingTool(name="second")
+    agent = make_agent(first, second)
+
+    startup([agent])
+    assert log == ["setup:first", "setup:second"]
+
+    # Setup is not repeated per call
+    assert execute_tool(first, {}) == execute_tool(first, {})
+    assert log == ["setup:first", "setup:second"]
+
+    shutdown()
+    assert log == ["setup:first", "setup:second", "teardown:second", "teardown:first"]
+    assert not first.is_setup
+
+
+def test_lazy_setup_and_async_lifecycle():
+    log.clear()
+    tool = LoggingTool(name="lazy")
+    execute_tool(tool, {})
+    assert log == ["setup:lazy"]
+    shutdown()
+
+    log.clear()
+    asyncio.run(astartup([make_agent(LoggingTool(name="async"))]))
+    asyncio.run(ashutdown())
+    assert log == ["setup:async", "teardown:async"]
+
+
+class WorkerSetupTool(Tool):
+    name: str = "worker_setup"
+    description: str = "Counts setups in its worker"
+    execution: str = "process"
+
+    def setup(self):
+        self._setups = getattr(self, "_setups", 0) + 1
+
+    def run(self) -> tuple:
+        return os.getpid(), self._setups
+
+
+def test_process_tool_is_set_up_once_per_worker():
+    set_executor_policy(ExecutorPolicy(max_workers=1))
+    try:
+        results = {execute_tool(WorkerSetupTool(), {}) for _ in range(3)}
+        assert len(results) == 1
+        pid, setups = results.pop()
+        assert pid != os.getpid() and setups == 1
+    finally:
+        executor.shutdown()
+        set_executor_policy(ExecutorPolicy())
+
+
+class EndpointTool(Tool):
+    name: str = "endpoint"
+    description: str = "Reports its configuration"
+    execution: str = "process"
+    endpoint: str = "a"
+
+    def run(self) -> str:
+        return self.endpoint
+
+
+def test_worker_keeps_configurations_apart():
+    set_executor_policy(ExecutorPolicy(max_workers=1))
+    try:
+        assert execute_tool(EndpointTool(), {}) == "a"
+        assert execute_tool(EndpointTool(endpoint="b"), {}) == "b"
+        assert execute_tool(EndpointTool(), {}) == "a"
+    finally:
+        executor.shutdown()
+        set_executor_policy(ExecutorPolicy())
+
+
+def test_concurrent_async_setup_runs_once():
+    log.clear()
+
+    class SlowSetupTool(LoggingTool):
+        async def asetup(self):
+            await asyncio.sleep(0.05)
+            self.setup()
+
+    tool = SlowSetupTool(name="slow")
+
+    async def main():
+        await asyncio.gather(tool.aensure_setup(), tool.aensure_setup(), asyncio.to_thread(tool.ensure_setup))
+
+    asyncio.run(main())
+    assert log == ["setup:slow"]
+    shutdown()
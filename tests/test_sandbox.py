@@ -0,0 +1,145 @@
+import os
+import time
+
+import pytest
+
+from orchestra.core.executor import execute_tool
+from orchestra.core.sandbox import (
+    SandboxError,
+    SandboxMemoryError,
+    SandboxPolicy,
+    SandboxPool,
+    SandboxTimeoutError,
+)
+from orchestra.core.tools import Tool
+
+
+class PidTool(Tool):
+    name: str = "pid"
+    description: str = "Report the worker process"
+    execution: str = "sandbox"
+
+    def run(self) -> int:
+        return os.getpid()
+
+
+class HangTool(Tool):
+    name: str = "hang"
+    description: str = "Never returns"
+
+    def run(self) -> str:
+        time.sleep(60)
+        return "unreachable"
+
+
+class GreedyTool(Tool):
+    name: str = "greedy"
+    description: str = "Allocate far more memory than allowed"
+
+    def run(self, megabytes: int) -> int:
+        return len(bytearray(megabytes * 1024 * 1024))
+
+
+class CrashTool(Tool):
+    name: str = "crash"
+    description: str = "Kill its own process"
+
+    def run(self) -> None:
+        os._exit(3)
+
+
+class FailingTool(Tool):
+    name: str = "failing"
+    description: str = "Raise an ordinary error"
+
+    def run(self) -> None:
+        raise KeyError("missing")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(SandboxPolicy(workers=1, memory_limit_mb=512))
+    yield pool
+    pool.close()
+
+
+def test_tool_runs_in_isolated_worker(pool):
+    assert pool.run(PidTool(), {}) != os.getpid()
+
+
+def test_timeout_kills_and_replaces_worker(pool):
+    before = pool.run(PidTool(), {})
+    started = time.perf_counter()
+    with pytest.raises(SandboxTimeoutError) as info:
+        pool.run(HangTool(), {}, timeout=0.2)
+    assert info.value.cause == "timeout"
+    assert time.perf_counter() - started < 2
+
+    assert pool.run(PidTool(), {}) != before
+    assert pool.stats()["failures"]["timeout"] == 1
+
+
+def test_memory_limit(pool):
+    with pytest.raises(SandboxMemoryError) as info:
+        pool.run(GreedyTool(), {"megabytes": 2048})
+    assert info.value.cause == "memory_limit"
+    assert pool.run(GreedyTool(), {"megabytes": 16}) == 16 * 1024 * 1024
+
+
+def test_crash_and_tool_errors(pool):
+    with pytest.raises(SandboxError) as info:
+        pool.run(CrashTool(), {})
+    assert info.value.cause == "crashed"
+
+    # Errors raised by the tool itself come back unchanged and keep the worker
+    with pytest.raises(KeyError):
+        pool.run(FailingTool(), {})
+    assert pool.stats()["idle"] == 1
+
+
+class PickyError(Exception):
+    def __init__(self, code, detail):
+        super().__init__(f"{code}: {detail}")
+
+
+def _refuse_to_load():
+    raise RuntimeError("cannot be rebuilt here")
+
+
+class Unloadable:
+    def __reduce__(self):
+        return _refuse_to_load, ()
+
+
+class BadReplyTool(Tool):
+    name: str = "bad_reply"
+    description: str = "Reply with values the caller cannot unpickle"
+
+    def run(self, kind: str) -> object:
+        if kind == "error":
+            raise PickyError(7, "bad")
+        return Unloadable()
+
+
+def test_undecodable_replies_do_not_leak_workers(pool):
+    # Errors that pickle but cannot be unpickled are reported by their string form
+    with pytest.raises(SandboxError, match="PickyError") as info:
+        pool.run(BadReplyTool(), {"kind": "error"})
+    assert info.value.cause == "unpicklable"
+
+    # A reply that fails to decode in the caller replaces the worker
+    replaced = pool.stats()["replaced"]
+    with pytest.raises(SandboxError) as info:
+        pool.run(BadReplyTool(), {"kind": "result"}, timeout=5)
+    assert info.value.cause == "unpicklable"
+    assert pool.stats()["replaced"] == replaced + 1
+    assert pool.run(PidTool(), {}, timeout=5) != os.getpid()
+
+
+def test_execute_tool_uses_shared_sandbox():
+    from orchestra.core import sandbox
+
+    try:
+        assert execute_tool(PidTool(), {}) != os.getpid()
+    finally:
+        sandbox.shutdown()
@@ -0,0 +1,59 @@
+import time
+
+from orchestra.core.context import ContextPolicy, MessageRole
+from orchestra.core.sessions import SessionStore, SQLiteSessionBackend
+
+
+def test_sessions_are_written_behind_and_reloaded_lazily(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(SQLiteSessionBackend(path), flush_interval=0.05)
+    for i in range(5):
+        store.append("alice", MessageRole.USER, f"message {i}")
+    assert store.stats()["pending"] == 5
+
+    deadline = time.monotonic() + 2
+    while store.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.stats()["pending"] == 0
+
+    # Another worker opening the same database only fetches the recent window
+    other = SessionStore(SQLiteSessionBackend(path), window=3)
+    context = other.get("alice")
+    assert [m.content for m in context.history] == ["message 2", "message 3", "message 4"]
+    store.close()
+    other.close()
+
+
+def test_memory_is_bounded_by_eviction_and_summaries(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(SQLiteSessionBackend(path), max_sessions=2)
+    for name in ("a", "b", "c"):
+        store.append(name, MessageRole.USER, f"hello from {name}")
+    assert store.stats()["sessions"] == 2
+
+    # The evicted session was flushed and comes back from the database
+    assert store.get("a").history[0].content == "hello from a"
+
+    # Turns folded into the summary are dropped from memory once persisted, and the
+    # summary travels with the session
+    policy = ContextPolicy(history_tokens=200, fold_to=0.5)
+    for i in range(20):
+        context = store.append("a", MessageRole.USER, f"{i} " + "x" * 100)
+        context.render_history(policy, lambda summary, turns, tokens: "talked about x")
+        store.flush()
+    assert len(store.get("a").history) < 10
+
+    store.release("a")
+    restored = SessionStore(SQLiteSessionBackend(path)).get("a")
+    assert restored.summary == "talked about x"
+    assert restored.history[-1].content.startswith("19 ")
+    assert len(restored.history) < 10
+    store.close()
+
+
+def test_without_backend_idle_sessions_are_dropped():
+    store = SessionStore(idle_seconds=0.05)
+    store.append("a", MessageRole.USER, "hi")
+    time.sleep(0.1)
+    store.get("b")
+    assert store.get("a").history == []
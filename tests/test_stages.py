@@ -0,0 +1,66 @@
+from orchestra.core import agent as agent_module
+from orchestra.core.agent import AgentTask, ToolAgent
+from orchestra.core.tools import Tool
+from orchestra.llm import base
+from orchestra.llm.stages import StageConfig, StagePolicy, current_stages, resolve_stage, set_stage_policy
+from orchestra.llm.usage import Usage
+
+
+class EchoTool(Tool):
+    name: str = "echo"
+    description: str = "Echo"
+
+    def run(self, text: str) -> str:
+        return text
+
+
+def test_levels_resolve_field_by_field():
+    set_stage_policy(StagePolicy(
+        default=StageConfig(model="ollama", options={"temperature": 0.7, "num_ctx": 4096}),
+        stages={"planning": StageConfig(model="ollama/small", options={"num_predict": 256})},
+    ))
+    try:
+        planning = resolve_stage("planning")
+        assert planning.model == "ollama/small"
+        assert planning.options == {"temperature": 0.7, "num_ctx": 4096, "num_predict": 256}
+        assert resolve_stage("synthesis").model == "ollama"
+
+        # The run beats the caller, which beats the global stage
+        token = current_stages.set({"planning": {"options": {"temperature": 0.0}}})
+        try:
+            config = resolve_stage("planning", model="ollama/medium", options={"temperature": 0.3}, format="json")
+        finally:
+            current_stages.reset(token)
+        assert config.model == "ollama/medium"
+        assert config.options["temperature"] == 0.0 and config.format == "json"
+    finally:
+        set_stage_policy(StagePolicy())
+
+
+def test_options_reach_the_backend_and_agents_override(monkeypatch):
+    calls = []
+
+    def fake_backend(system_message, user_message, payload, model, host=None, timeout=None, **generation):
+        calls.append((model, generation))
+        return {"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"}}, "reasoning": ""}, Usage(model=model)
+
+    monkeypatch.setattr(base, "_invoke_backend", fake_backend)
+    monkeypatch.setattr(agent_module, "model_invoke", base.model_invoke)
+    set_stage_policy(StagePolicy(stages={"tool_binding": StageConfig(model="ollama/small", options={"num_predict": 128})}))
+    try:
+        make = lambda **kw: ToolAgent(
+            name="agent", description="", backstory="", system_prompt="", input_schema={}, output_schema={},
+            tools=[EchoTool()], model="ollama", **kw,
+        )
+        make().execute(AgentTask(task="echo hi", expected_output="hi"))
+        make(stages={"tool_binding": StageConfig(model="ollama/large", format="json")}).execute(
+            AgentTask(task="echo hi", expected_output="hi")
+        )
+    finally:
+        set_stage_policy(StagePolicy())
+
+    # The global stage model replaces the agent's default model; the agent's own stage config wins
+    assert calls[0][0] == "ollama/small" and calls[0][1]["options"] == {"num_predict": 128}
+    # Without an explicit format, Ollama decodes against the response schema
+    assert "tool_execution" in calls[0][1]["format"]["properties"]
+    assert calls[1] == ("ollama/large", {"options": {"num_predict": 128}, "format": "json"})
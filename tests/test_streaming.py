@@ -0,0 +1,113 @@
+import pytest
+
+from orchestra.core import agent as agent_module
+from orchestra.core.agent import AgentTask, ToolAgent
+from orchestra.core.events import events, EventType
+from orchestra.core.executor import execute_tool
+from orchestra.core.streaming import StreamPolicy, collect_stream, set_stream_policy
+from orchestra.core.tools import Tool
+
+
+class ScanTool(Tool):
+    name: str = "scan"
+    description: str = "Yield matching lines"
+
+    def run(self, count: int):
+        for i in range(count):
+            yield f"line {i}\n"
+
+
+class PagesTool(Tool):
+    name: str = "pages"
+    description: str = "Read pages asynchronously"
+
+    async def _pages(self, count):
+        for i in range(count):
+            yield {"page": i}
+
+    def run(self, count: int):
+        return self._pages(count)
+
+
+class ProcessScanTool(ScanTool):
+    name: str = "process_scan"
+    execution: str = "process"
+
+
+def make_agent(tool):
+    return ToolAgent(
+        name="agent",
+        description="",
+        backstory="",
+        system_prompt="",
+        input_schema={},
+        output_schema={},
+        tools=[tool],
+        model="ollama",
+    )
+
+
+@pytest.fixture
+def chunks():
+    received = []
+
+    def listener(event):
+        if event.type == EventType.TOOL_CHUNK:
+            received.append(event.data["chunk"])
+
+    events.subscribe(listener)
+    yield received
+    events.unsubscribe(listener)
+
+
+def bind(monkeypatch, tool_name, args):
+    monkeypatch.setattr(
+        agent_module,
+        "model_invoke",
+        lambda *a, **kw: {"tool_execution": {"tool_name": tool_name, "tool_args": args}, "reasoning": ""},
+    )
+
+
+def test_generator_chunks_are_forwarded_and_collected(monkeypatch, chunks):
+    bind(monkeypatch, "scan", {"count": 3})
+    output = make_agent(ScanTool()).execute(AgentTask(task="scan", expected_output="lines"))
+
+    assert chunks == ["line 0\n", "line 1\n", "line 2\n"]
+    assert output["result"] == "line 0\nline 1\nline 2\n"
+    assert output["stream"] == {"chunks": 3, "truncated": False}
+
+
+def test_async_iterator_and_bounded_buffer(monkeypatch, chunks):
+    set_stream_policy(StreamPolicy(max_chunks=2))
+    try:
+        bind(monkeypatch, "pages", {"count": 5})
+        output = make_agent(PagesTool()).execute(AgentTask(task="read", expected_output="pages"))
+    finally:
+        set_stream_policy(StreamPolicy())
+
+    # Every chunk is forwarded, but only the first ones are kept
+    assert len(chunks) == 5
+    assert output["result"] == [{"page": 0}, {"page": 1}]
+    assert output["stream"] == {"chunks": 5, "truncated": True}
+
+
+def test_stream_timeout_and_process_tools():
+    from orchestra.core.executor import ToolTimeoutError
+
+    def slow():
+        import time
+
+        while True:
+            time.sleep(0.01)
+            yield "tick"
+
+    with pytest.raises(ToolTimeoutError):
+        collect_stream(slow(), "slow", "agent", timeout=0.05)
+
+    # A process worker cannot send a generator back; it arrives as a list
+    try:
+        assert execute_tool(ProcessScanTool(), {"count": 2}) == ["line 0\n", "line 1\n"]
+    finally:
+        from orchestra.core import executor
+
+        executor.shutdown()
@@ -0,0 +1,85 @@
+from orchestra.core import agent as agent_module
+from orchestra.core.agent import AgentTask, ToolAgent
+from orchestra.core.tools import Tool
+from orchestra.llm import base, ollama_llm
+from orchestra.llm.structured import StructuredPolicy, set_structured_policy
+from orchestra.llm.usage import Usage
+from orchestra.utils.json_repair import loads
+
+import pytest
+
+
+class EchoTool(Tool):
+    name: str = "echo"
+    description: str = "Echo"
+
+    def run(self, text: str) -> str:
+        return text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": 1}', {"a": 1}),
+        ('Sure! ```json\n{"a": [1, 2,],}\n``` Hope this helps', {"a": [1, 2]}),
+        ("{'a': 'it\\'s', b: True, 'c': None}", {"a": "it's", "b": True, "c": None}),
+        ('{"a": 1, // comment\n "b": "x"}', {"a": 1, "b": "x"}),
+        ('{"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"', {"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"}}}),
+        ('{"a": 1} trailing prose {"b": 2}', {"a": 1}),
+    ],
+)
+def test_loads_repairs_almost_json(text, expected):
+    assert loads(text) == expected
+
+
+def test_loads_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        loads("no json here")
+
+
+def test_ollama_decodes_against_the_response_schema(monkeypatch):
+    requests = []
+
+    class FakeClient:
+        def chat(self, **kwargs):
+            requests.append(kwargs)
+            return {"message": {"content": '{"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"}}, "reasoning": ""}'}}
+
+    monkeypatch.setattr(ollama_llm, "get_client", lambda host=None, timeout=None: FakeClient())
+    schema = {"type": "object", "properties": {"tool_execution": {"type": "object"}}}
+
+    response = base.model_invoke("system", "user", payload=schema, model="ollama")
+    assert requests[0]["format"] == schema and requests[0]["tools"] is None
+    assert response["tool_execution"]["tool_name"] == "echo"
+
+    # Switched off, the schema goes out as a tool again
+    set_structured_policy(StructuredPolicy(constrained=False))
+    try:
+        base.model_invoke("system", "user", payload=schema, model="ollama")
+    finally:
+        set_structured_policy(StructuredPolicy())
+    assert requests[1]["format"] is None and requests[1]["tools"]
+
+
+def test_unusable_binding_is_reasked_once(monkeypatch):
+    prompts = []
+    answers = [
+        {"response": "I would echo it"},
+        {"tool_execution": {"tool_name": "echo", "tool_args": {"text": "hi"}}, "reasoning": "echo"},
+    ]
+
+    def fake_invoke(system_message, user_message, payload, **kwargs):
+        prompts.append(user_message)
+        return answers[len(prompts) - 1]
+
+    monkeypatch.setattr(agent_module, "model_invoke", fake_invoke)
+    agent = ToolAgent(
+        name="agent", description="", backstory="", system_prompt="", input_schema={}, output_schema={},
+        tools=[EchoTool(), Tool(name="other", description="Other")], model="ollama",
+    )
+    output = agent.execute(AgentTask(task="echo hi", expected_output="hi"))
+
+    assert output["tool_used"] == "echo" and output["result"] == "hi"
+    assert len(prompts) == 2
+    # The re-ask extends the original prompt with what was wrong
+    assert prompts[1].startswith(prompts[0]) and "no tool_execution object" in prompts[1]
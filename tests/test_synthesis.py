@@ -0,0 +1,61 @@
+import threading
+import time
+
+from orchestra.core import synthesis, task as task_module
+from orchestra.core.synthesis import SynthesisPolicy, condense, plan_chunks, set_synthesis_policy
+from orchestra.utils.tokens import estimate_tokens
+
+
+def results(count, size):
+    return [{"status": "success", "step": i, "result": "x" * size} for i in range(1, count + 1)]
+
+
+def test_small_results_use_a_single_call(monkeypatch):
+    stages = []
+
+    def invoke(system, user_message, schema, stage=None, **kwargs):
+        stages.append(stage)
+        return {"content": "answer"}
+
+    monkeypatch.setattr(synthesis, "model_invoke", invoke)
+    monkeypatch.setattr(task_module, "model_invoke", invoke)
+    assert task_module.generate_final_answer("q", results(3, 10)) == "answer"
+    assert stages == ["synthesis"]
+
+
+def test_large_results_are_summarized_in_parallel_before_synthesis(monkeypatch):
+    set_synthesis_policy(SynthesisPolicy(max_prompt_tokens=1000, chunk_tokens=500, max_parallel=4))
+    map_threads = set()
+    final_prompts = []
+
+    def summarize(system, user_message, schema, stage=None, **kwargs):
+        map_threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return {"content": "short"}
+
+    def synthesize(system, user_message, schema, stage=None, **kwargs):
+        final_prompts.append(user_message)
+        return {"content": "answer"}
+
+    monkeypatch.setattr(synthesis, "model_invoke", summarize)
+    monkeypatch.setattr(task_module, "model_invoke", synthesize)
+    try:
+        assert task_module.generate_final_answer("q", results(8, 1200)) == "answer"
+    finally:
+        set_synthesis_policy(SynthesisPolicy())
+
+    # 8 results of ~300 tokens -> 8 chunks of 500 tokens, summarized on several threads
+    assert len(map_threads) > 1
+    assert final_prompts[0].count("Summary of results part") == 8
+    assert estimate_tokens(final_prompts[0]) < 1000
+
+
+def test_oversized_results_are_split_and_bounded(monkeypatch):
+    monkeypatch.setattr(synthesis, "model_invoke", lambda *a, **kw: {"content": "y" * 4000})
+    policy = SynthesisPolicy(max_prompt_tokens=200, chunk_tokens=100, summary_tokens=50, max_rounds=2)
+
+    assert len(plan_chunks(["z" * 1000], 100)) == 3
+    condensed = condense("q", ["z" * 5000], policy)
+    assert sum(estimate_tokens(entry) for entry in condensed) <= 200 + len(condensed)
+
+    assert condense("q", ["z" * 5000], SynthesisPolicy(mode="single")) == ["z" * 5000]
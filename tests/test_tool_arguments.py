@@ -0,0 +1,86 @@
+from typing import Optional
+
+from orchestra.core import agent as agent_module
+from orchestra.core.agent import AgentTask, ToolAgent
+from orchestra.core.events import events, EventType
+from orchestra.core.tools import InvalidToolArgumentsError, Tool
+
+import pytest
+
+
+class RepeatTool(Tool):
+    name: str = "repeat"
+    description: str = "Repeat a text"
+
+    def run(self, text: str, times: int = 1, separator: Optional[str] = None, json: bool = False) -> str:
+        return (separator or "").join([text] * times)
+
+
+class EchoTool(Tool):
+    name: str = "echo"
+    description: str = "Echo"
+
+    def run(self, text: str, **extra) -> str:
+        return text
+
+
+def make_agent(tool):
+    return ToolAgent(
+        name="agent", description="", backstory="", system_prompt="", input_schema={}, output_schema={},
+        tools=[tool], model="ollama",
+    )
+
+
+def test_arguments_are_coerced_and_defaulted():
+    assert RepeatTool().validate_arguments({"text": 5, "times": "2"}) == {
+        "text": "5", "times": 2, "separator": None, "json": False,
+    }
+    # **kwargs accepts extra keys
+    assert EchoTool().validate_arguments({"text": "hi", "loud": True}) == {"text": "hi", "loud": True}
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(InvalidToolArgumentsError) as error:
+        RepeatTool().validate_arguments({"times": "many", "volume": 3})
+    assert sorted(error.value.errors) == [
+        "text: Field required",
+        "times: Input should be a valid integer, unable to parse string as an integer",
+        "volume: unexpected argument",
+    ]
+
+
+def test_invalid_arguments_get_one_repair_call(monkeypatch):
+    prompts = []
+    answers = [
+        {"tool_execution": {"tool_name": "repeat", "tool_args": {"text": "hi", "times": "twice"}}, "reasoning": ""},
+        {"text": "hi", "times": 2, "separator": " "},
+    ]
+
+    def fake_invoke(system_message, user_message, payload, **kwargs):
+        prompts.append(user_message)
+        return answers[len(prompts) - 1]
+
+    monkeypatch.setattr(agent_module, "model_invoke", fake_invoke)
+    output = make_agent(RepeatTool()).execute(AgentTask(task="say hi twice", expected_output="hi hi"))
+
+    assert output["result"] == "hi hi"
+    assert output["arguments"] == {"text": "hi", "times": 2, "separator": " ", "json": False}
+    assert "times: Input should be a valid integer" in prompts[1]
+
+
+def test_arguments_still_invalid_after_repair_fail_the_step(monkeypatch):
+    answer = {"tool_execution": {"tool_name": "repeat", "tool_args": {"text": "hi", "times": "many"}}, "reasoning": ""}
+    calls = []
+    monkeypatch.setattr(agent_module, "model_invoke", lambda *a, **kw: calls.append(1) or answer)
+    errors = []
+    collect = lambda event: errors.append(event) if event.type == EventType.TOOL_ERROR else None
+    events.subscribe(collect)
+    try:
+        with pytest.raises(ValueError, match="times: Input should be a valid integer"):
+            make_agent(RepeatTool()).execute(AgentTask(task="repeat", expected_output=""))
+    finally:
+        events.unsubscribe(collect)
+
+    # Binding, then a single repair
+    assert len(calls) == 2
+    assert errors[0].data["cause"] == "invalid_arguments"
@@ -0,0 +1,97 @@
+import json
+
+from orchestra.core.events import Event, EventType
+from orchestra.core.tracing import LatencyHistogram, Tracer
+
+RUN_ID = "0123456789abcdef0123456789abcdef"
+
+
+def emit_run(tracer: Tracer, tool_fails: bool = False, run_id: str = RUN_ID):
+    def emit(event_type, source="orchestra", **data):
+        tracer(Event(type=event_type, source=source, data=data, run_id=run_id))
+
+    emit(EventType.ORCHESTRA_START, query="q")
+    emit(EventType.TASK_GENERATION_START, source="task_manager")
+    emit(EventType.LLM_START, source="llm", model="ollama", stage="planning")
+    emit(EventType.LLM_END, source="llm", model="ollama", stage="planning")
+    emit(EventType.TASK_GENERATION_END, source="task_manager")
+    emit(EventType.TASK_START, source="orchestra_router", step=1, agent="echo_agent")
+    emit(EventType.AGENT_START, source="echo_agent")
+    emit(EventType.TOOL_START, source="echo_agent", tool="echo")
+    if tool_fails:
+        emit(EventType.TOOL_ERROR, source="echo_agent", tool="echo", error="boom")
+        emit(EventType.TASK_ERROR, source="orchestra_router", step=1, error="boom")
+    else:
+        emit(EventType.TOOL_END, source="echo_agent", tool="echo")
+        emit(EventType.AGENT_END, source="echo_agent")
+        emit(EventType.TASK_COMPLETE, source="orchestra_router", step=1)
+    emit(EventType.ORCHESTRA_END)
+
+
+def test_spans_are_nested():
+    tracer = Tracer()
+    emit_run(tracer)
+
+    spans = {span.name: span for span in tracer.get_spans(RUN_ID)}
+    assert set(spans) == {"orchestra", "planning", "llm:planning", "task:1", "agent:echo_agent", "tool:echo"}
+    assert spans["planning"].parent_id == spans["orchestra"].span_id
+    assert spans["llm:planning"].parent_id == spans["planning"].span_id
+    assert spans["tool:echo"].parent_id == spans["agent:echo_agent"].span_id
+    assert spans["agent:echo_agent"].parent_id == spans["task:1"].span_id
+    assert all(span.duration >= 0 for span in spans.values())
+
+    summary = tracer.summary()
+    assert summary["tool"]["echo"]["count"] == 1
+    assert summary["model"]["ollama"]["count"] == 1
+    assert summary["agent"]["echo_agent"]["count"] == 1
+
+
+def test_failed_tool_closes_open_spans():
+    tracer = Tracer()
+    emit_run(tracer, tool_fails=True)
+
+    spans = {span.name: span for span in tracer.get_spans()}
+    assert spans["tool:echo"].status == "error"
+    assert spans["agent:echo_agent"].status == "unfinished"
+    assert spans["task:1"].status == "error"
+    assert not tracer._open
+
+
+def test_exporters(tmp_path):
+    tracer = Tracer()
+    emit_run(tracer)
+
+    text = tracer.export_prometheus()
+    assert '# TYPE orchestra_span_duration_seconds histogram' in text
+    assert 'orchestra_span_duration_seconds_count{dimension="tool",name="echo"} 1' in text
+    assert 'name="echo",le="+Inf"} 1' in text
+
+    path = tmp_path / "trace.json"
+    tracer.export_otlp_json(str(path))
+    document = json.loads(path.read_text())
+    spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(spans) == 6
+    assert all(span["traceId"] == RUN_ID for span in spans)
+
+
+def test_runs_with_custom_ids_are_kept_apart():
+    tracer = Tracer()
+    emit_run(tracer, run_id="checkout-1")
+    emit_run(tracer, run_id="checkout-2")
+
+    first, second = tracer.get_spans("checkout-1"), tracer.get_spans("checkout-2")
+    assert len(first) == len(second) == 6
+    # Trace ids are valid OTLP ids derived from the run id, stable across exports
+    trace_ids = {span.trace_id for span in first}
+    assert len(trace_ids) == 1 and len(trace_ids.pop()) == 32
+    assert first[0].trace_id != second[0].trace_id
+    assert len(tracer.to_otlp("checkout-2")["resourceSpans"][0]["scopeSpans"][0]["spans"]) == 6
+
+
+def test_histogram_quantile():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.99) == 10.0
+    assert histogram.cumulative_counts()[-1] == ("+Inf", 4)
@@ -0,0 +1,50 @@
+import pytest
+
+from orchestra.llm import base
+from orchestra.llm.usage import Budget, BudgetExceededError, RunUsage, Usage, current_usage
+
+OLLAMA_RESPONSE = {
+    "message": {"role": "assistant", "content": "hello"},
+    "prompt_eval_count": 120,
+    "eval_count": 30,
+    "load_duration": 500_000_000,
+    "prompt_eval_duration": 100_000_000,
+    "eval_duration": 1_500_000_000,
+    "total_duration": 2_000_000_000,
+}
+
+
+def test_usage_from_ollama_response():
+    usage = Usage.from_ollama(OLLAMA_RESPONSE, model="llama3")
+    assert usage.prompt_tokens == 120
+    assert usage.completion_tokens == 30
+    assert usage.total_tokens == 150
+    assert usage.load_duration == pytest.approx(0.5)
+    assert usage.tokens_per_second == pytest.approx(20.0)
+
+
+def test_model_invoke_accumulates_and_enforces_budget(monkeypatch):
+    def fake_backend(system_message, user_message, payload, model, **kwargs):
+        return "hello", Usage.from_ollama(OLLAMA_RESPONSE, model=model)
+
+    monkeypatch.setattr(base, "_invoke_backend", fake_backend)
+
+    run_usage = RunUsage(Budget(max_tokens=250))
+    token = current_usage.set(run_usage)
+    try:
+        response, usage = base.model_invoke("sys", "user", stage="planning", return_usage=True)
+        assert response == "hello"
+        assert usage.stage == "planning"
+
+        assert base.model_invoke("sys", "user", stage="synthesis") == "hello"
+        assert run_usage.total.total_tokens == 300
+        assert run_usage.by_stage["planning"].calls == 1
+
+        with pytest.raises(BudgetExceededError):
+            base.model_invoke("sys", "user", stage="synthesis")
+    finally:
+        current_usage.reset(token)
+
+    summary = run_usage.summary()
+    assert summary["total"]["calls"] == 2
+    assert set(summary["by_stage"]) == {"planning", "synthesis"}
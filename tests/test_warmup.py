@@ -0,0 +1,60 @@
+from typing import Any, Dict
+
+from orchestra.core import task as task_module
+from orchestra.core.agent import AgentTask, BaseAgent
+from orchestra.core.context import MessageRole, OrchestraContext
+from orchestra.llm import pool as pool_module
+from orchestra.llm.base import warmup_models
+from orchestra.llm.registry import register_provider, resolve_provider, unregister_provider
+from orchestra.orchestra import warmup
+
+
+class ModelAgent(BaseAgent):
+    model: str = "warm/small"
+
+    def execute(self, task: AgentTask) -> Dict[str, Any]:
+        return {}
+
+
+def test_planning_prompts_share_a_static_prefix(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(task_module, "model_invoke", lambda system, user, *a, **kw: prompts.append((system, user)) or {"steps": []})
+    agents = [ModelAgent(name="a", description="does a", backstory="")]
+
+    context = OrchestraContext()
+    context.add_message(MessageRole.USER, "first question")
+    task_module.generate("second question", agents, history=context)
+    context.add_message(MessageRole.USER, "another one")
+    task_module.generate("third question", agents, history=context)
+
+    # History and query only appear after the instructions and the agent catalog
+    assert prompts[0][0] == prompts[1][0]
+    assert "first question" not in prompts[0][0]
+    assert prompts[1][1].endswith("Current Query:\nthird question")
+
+
+def test_warmup_preloads_each_model_on_every_host(monkeypatch):
+    loaded = []
+    register_provider(
+        "warm",
+        lambda *a, **kw: None,
+        prefixes=["warm/"],
+        preload=lambda model_name=None, host=None: loaded.append((model_name, host)),
+    )
+    try:
+        pool_module.register_pool("warm/large", ["http://gpu-1:11434", "http://gpu-2:11434"])
+        assert warmup_models(["warm/small", "warm/large", "warm/small"]) == {"warm/small": None, "warm/large": None}
+        assert sorted(loaded) == [("large", "http://gpu-1:11434"), ("large", "http://gpu-2:11434"), ("small", None)]
+
+        # orchestra.warmup() also loads the planner's default model; failures are reported
+        def unreachable(model_name=None, host=None):
+            raise ConnectionError("refused")
+
+        monkeypatch.setattr(resolve_provider("ollama")[0], "preload", unreachable)
+        loaded.clear()
+        results = warmup([ModelAgent(name="a", description="", backstory="")])
+        assert loaded == [("small", None)]
+        assert results == {"ollama": "default host: refused", "warm/small": None}
+    finally:
+        pool_module.unregister_pool("warm/large")
+        unregister_provider("warm")
@@ -0,0 +1,63 @@
+"""
+Small in-process BM25 index for shortlisting agents and tools by query text.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Very common words carry no routing signal
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from get how i in is it me my of on or please "
+    "that the this to use what when which with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms; snake_case and kebab-case names are split into words"""
+    return [term for term in _TOKEN.findall(text.lower().replace("_", " ")) if term not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents"""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        self._lengths: List[int] = []
+        # term -> [(document, term frequency)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for index, document in enumerate(documents):
+            terms = Counter(tokenize(document))
+            self._lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self._postings.setdefault(term, []).append((index, count))
+        self._average_length = (sum(self._lengths) / self.size) if self.size else 0.0
+
+    def _idf(self, term: str) -> float:
+        matches = len(self._postings.get(term, ()))
+        return math.log(1 + (self.size - matches + 0.5) / (matches + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        scores = [0.0] * self.size
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for index, count in postings:
+                norm = 1 - self.b + self.b * self._lengths[index] / (self._average_length or 1.0)
+                scores[index] += idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        return scores
+
+    def top(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Indexes and scores of the `k` best matching documents with a positive score, best first"""
+        ranked = sorted(
+            ((index, score) for index, score in enumerate(self.scores(query)) if score > 0),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:k]
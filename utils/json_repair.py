@@ -0,0 +1,112 @@
+"""
+Tolerant JSON parsing for model output.
+
+Models without constrained decoding often wrap JSON in prose or code fences, or emit
+almost-JSON: trailing commas, single quotes, Python literals, unquoted keys, comments, or
+output cut off before the closing brackets. `loads` first tries the strict parser and
+only then repairs the text in a single pass.
+"""
+
+import json
+import re
+from typing import Any
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _extract(text: str) -> str:
+    """The part of `text` that looks like a JSON value: a fenced block or from the first bracket on"""
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return text[min(starts):] if starts else text.strip()
+
+
+def repair_json(text: str) -> str:
+    """Rewrite almost-JSON into JSON (see module docstring); valid JSON passes through unchanged"""
+    text = _extract(text)
+    out = []
+    closers = []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char in "\"'":
+            # Copy a string, normalizing single quotes to double quotes
+            quote, j = char, i + 1
+            chunk = []
+            while j < n and text[j] != quote:
+                if text[j] == "\\" and j + 1 < n:
+                    # \' is not a JSON escape
+                    chunk.append("'" if text[j + 1] == "'" else text[j:j + 2])
+                    j += 2
+                    continue
+                chunk.append('\\"' if text[j] == '"' else text[j])
+                j += 1
+            out.append('"' + "".join(chunk) + '"')
+            i = j + 1
+            continue
+        if char == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if char == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if closers:
+                closers.pop()
+            out.append(char)
+            i += 1
+            if not closers:
+                break
+            continue
+        elif char.isalpha() or char == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            rest = text[j:].lstrip()
+            if rest.startswith(":"):
+                # Unquoted key
+                out.append(f'"{word}"')
+            else:
+                out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        out.append(char)
+        i += 1
+
+    # Close whatever the output was cut off in
+    while out and (out[-1].isspace() or out[-1] in ",:"):
+        out.pop()
+    out.extend(reversed(closers))
+    return "".join(out)
+
+
+def loads(text: str) -> Any:
+    """
+    Parse model output as JSON, repairing it if needed.
+
+    Raises:
+        ValueError: The text could not be turned into JSON
+    """
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("No JSON in model output")
+    try:
+        return json.loads(repair_json(text), strict=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON in model output: {e}") from e
@@ -0,0 +1,30 @@
+"""
+Cheap token estimates for prompt budgeting.
+
+Backends tokenize differently and no tokenizer is available locally for most of them,
+so budgets use the common approximation of about four characters per token. It is
+meant for deciding how much to put into a prompt, not for billing.
+"""
+
+from typing import Iterable
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in `text`"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_total(texts: Iterable[str]) -> int:
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "…") -> str:
+    """Cut `text` to roughly `max_tokens`, appending `marker` when something was removed"""
+    limit = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - len(marker))] + marker